@@ -20,6 +20,10 @@ class OntologiaConfig:
     s3_lease_ttl_ms: int = 30000
     s3_request_timeout_s: float = 10.0
     s3_duckdb_memory_limit: str = "256MB"
+    sqlite_synchronous: str = "NORMAL"
+    sqlite_cache_size_kib: int = 65536
+    sqlite_mmap_size_bytes: int = 268435456
+    sqlite_covering_history_index: bool = False
     default_namespace: str = "default"
     event_poll_interval_ms: int = 1000
     event_claim_limit: int = 100
@@ -6,6 +6,7 @@ import json
 import random
 import sqlite3
 import uuid
+from collections.abc import Sequence
 from dataclasses import dataclass
 from datetime import datetime, timedelta, timezone
 from typing import Any, Protocol
@@ -18,6 +19,7 @@ from botocore.exceptions import ClientError, ParamValidationError
 from ontologia.config import OntologiaConfig
 from ontologia.errors import StorageBackendError
 from ontologia.events import Event, EventDeadLetter
+from ontologia.json_utils import loads_json
 
 
 @dataclass(frozen=True)
@@ -33,6 +35,8 @@ class EventStore(Protocol):
 
     def enqueue(self, event: Event, namespace: str) -> None: ...
 
+    def enqueue_many(self, events: Sequence[Event], namespace: str) -> None: ...
+
     def claim(
         self,
         namespace: str,
@@ -123,7 +127,7 @@ def _row_to_event(
         )
     payload = row.get("payload")
     if isinstance(payload, str):
-        data = json.loads(payload)
+        data = loads_json(payload)
     elif isinstance(payload, dict):
         data = payload
     else:
@@ -211,24 +215,33 @@ class SQLiteEventStore:
         )
 
     def enqueue(self, event: Event, namespace: str) -> None:
+        self.enqueue_many([event], namespace)
+
+    def enqueue_many(self, events: Sequence[Event], namespace: str) -> None:
+        """Insert events with one executemany and, outside a transaction, one commit."""
+        if not events:
+            return
         started_in_tx = self._conn.in_transaction
-        row = _event_to_row(event)
-        self._conn.execute(
+        rows = [_event_to_row(event) for event in events]
+        self._conn.executemany(
             """
             INSERT INTO events
                 (id, namespace, type, payload, created_at, priority, root_event_id, chain_depth)
             VALUES (?, ?, ?, ?, ?, ?, ?, ?)
             """,
-            (
-                row["id"],
-                namespace,
-                row["type"],
-                row["payload"],
-                row["created_at"],
-                row["priority"],
-                row["root_event_id"],
-                row["chain_depth"],
-            ),
+            [
+                (
+                    row["id"],
+                    namespace,
+                    row["type"],
+                    row["payload"],
+                    row["created_at"],
+                    row["priority"],
+                    row["root_event_id"],
+                    row["chain_depth"],
+                )
+                for row in rows
+            ],
         )
         if not started_in_tx:
             self._conn.commit()
@@ -583,7 +596,7 @@ class SQLiteEventStore:
                     "priority": int(row[3]),
                     "status": status,
                     "handler": str(row[8]) if row[8] else None,
-                    "payload": json.loads(row[4]),
+                    "payload": loads_json(row[4]),
                 }
             )
         return out
@@ -703,7 +716,7 @@ class SQLiteEventStore:
             "id": str(row[0]),
             "namespace": str(row[1]),
             "type": str(row[2]),
-            "payload": json.loads(str(row[3])),
+            "payload": loads_json(str(row[3])),
             "created_at": str(row[4]),
             "priority": int(row[5]),
             "root_event_id": str(row[6]),
@@ -835,7 +848,7 @@ class S3EventStore:
             "id": row["id"],
             "namespace": namespace,
             "type": row["type"],
-            "payload": json.loads(str(row["payload"])),
+            "payload": loads_json(str(row["payload"])),
             "created_at": row["created_at"],
             "priority": row["priority"],
             "root_event_id": row["root_event_id"],
@@ -843,6 +856,11 @@ class S3EventStore:
         }
         self._put_json(self._event_key(namespace, str(row["id"]), str(row["created_at"])), payload)
 
+    def enqueue_many(self, events: Sequence[Event], namespace: str) -> None:
+        # Each event is its own object; S3 has no multi-object put.
+        for event in events:
+            self.enqueue(event, namespace)
+
     def claim(
         self,
         namespace: str,
@@ -2,6 +2,7 @@
 
 from __future__ import annotations
 
+import copy
 import re
 from dataclasses import dataclass
 from typing import Any, ClassVar, Self
@@ -62,6 +63,13 @@ class Event:
     def model_validate(cls, data: dict[str, Any]) -> Self:
         return cls(**data)
 
+    def model_copy(self, *, deep: bool = False) -> Self:
+        """Copy the event without re-running field validation."""
+        cloned = object.__new__(self.__class__)
+        state = copy.deepcopy(self.__dict__) if deep else dict(self.__dict__)
+        cloned.__dict__.update(state)
+        return cloned
+
     @staticmethod
     def _derive_event_type(class_name: str) -> str:
         s1 = re.sub(r"(.)([A-Z][a-z]+)", r"\1.\2", class_name)
@@ -2,6 +2,8 @@
 
 from __future__ import annotations
 
+import inspect
+import types
 from collections.abc import Iterable
 from dataclasses import dataclass, field
 from typing import Any, Callable, Literal, TypeVar
@@ -24,9 +26,52 @@ class HandlerMeta:
     when: FilterExpression | None = None  # Condition filter for ON_COMMIT
     allow_self_trigger: bool = False
     cron: str | None = None  # Cron expression for ON_SCHEDULE
-
-
-@dataclass
+    # Positional-call arity, computed once at decoration time (None = not yet known)
+    accepts_ctx: bool | None = None
+    accepts_trigger: bool | None = None
+
+
+def _positional_arity(func: Callable[..., Any]) -> tuple[int, int, bool]:
+    """Return (required, positional, has_varargs) for a handler's positional params.
+
+    Plain functions are read straight from ``__code__``; anything else (bound
+    methods, partials, wrapped or callable objects) goes through inspect.signature.
+    """
+    if isinstance(func, types.FunctionType) and not hasattr(func, "__wrapped__"):
+        code = func.__code__
+        positional = code.co_argcount
+        required = positional - len(func.__defaults__ or ())
+        return required, positional, bool(code.co_flags & inspect.CO_VARARGS)
+
+    required = 0
+    positional = 0
+    has_varargs = False
+    for param in inspect.signature(func).parameters.values():
+        if param.kind in (
+            inspect.Parameter.POSITIONAL_ONLY,
+            inspect.Parameter.POSITIONAL_OR_KEYWORD,
+        ):
+            positional += 1
+            if param.default is inspect.Parameter.empty:
+                required += 1
+        elif param.kind == inspect.Parameter.VAR_POSITIONAL:
+            has_varargs = True
+    return required, positional, has_varargs
+
+
+def _positional_call_flags(func: Callable[..., Any]) -> tuple[bool, bool]:
+    """Return (accepts_ctx, accepts_trigger): callable with 1 / 2 positional args."""
+    required, positional, has_varargs = _positional_arity(func)
+
+    def accepts(arg_count: int) -> bool:
+        if arg_count < required:
+            return False
+        return has_varargs or arg_count <= positional
+
+    return accepts(1), accepts(2)
+
+
+@dataclass(slots=True)
 class HandlerContext:
     """Context object provided to all handlers."""
 
@@ -54,6 +99,12 @@ class HandlerContext:
         """
         self._commit_meta[key] = value
 
+    def _reset(self, commit_id: int | None) -> None:
+        """Prepare a dispatch loop's shared context for the next handler call."""
+        self.commit_id = commit_id
+        if self._commit_meta:
+            self._commit_meta.clear()
+
 
 def on_commit(
     when: FilterExpression | None = None,
@@ -63,11 +114,14 @@ def on_commit(
     """Decorator for unfiltered commit event handlers."""
 
     def decorator(func: Callable[..., Any]) -> Callable[..., Any]:
+        accepts_ctx, accepts_trigger = _positional_call_flags(func)
         func._ontologia_handler = HandlerMeta(  # type: ignore[attr-defined]
             event_type="ON_COMMIT",
             priority=priority,
             when=when,
             allow_self_trigger=allow_self_trigger,
+            accepts_ctx=accepts_ctx,
+            accepts_trigger=accepts_trigger,
         )
         return func
 
@@ -88,6 +142,7 @@ def on_commit_entity(
     def decorator(
         func: Callable[[HandlerContext, EntityT], Any],
     ) -> Callable[[HandlerContext, EntityT], Any]:
+        accepts_ctx, accepts_trigger = _positional_call_flags(func)
         func._ontologia_handler = HandlerMeta(  # type: ignore[attr-defined]
             event_type="ON_COMMIT",
             priority=priority,
@@ -95,6 +150,8 @@ def on_commit_entity(
             target_type=entity_type,
             when=when,
             allow_self_trigger=allow_self_trigger,
+            accepts_ctx=accepts_ctx,
+            accepts_trigger=accepts_trigger,
         )
         return func
 
@@ -115,6 +172,7 @@ def on_commit_relation(
     def decorator(
         func: Callable[[HandlerContext, RelationT], Any],
     ) -> Callable[[HandlerContext, RelationT], Any]:
+        accepts_ctx, accepts_trigger = _positional_call_flags(func)
         func._ontologia_handler = HandlerMeta(  # type: ignore[attr-defined]
             event_type="ON_COMMIT",
             priority=priority,
@@ -122,6 +180,8 @@ def on_commit_relation(
             target_type=relation_type,
             when=when,
             allow_self_trigger=allow_self_trigger,
+            accepts_ctx=accepts_ctx,
+            accepts_trigger=accepts_trigger,
         )
         return func
 
@@ -132,10 +192,13 @@ def on_schedule(cron: str, priority: int = 100) -> Callable[..., Any]:
     """Decorator for scheduled event handlers."""
 
     def decorator(func: Callable[..., Any]) -> Callable[..., Any]:
+        accepts_ctx, accepts_trigger = _positional_call_flags(func)
         func._ontologia_handler = HandlerMeta(  # type: ignore[attr-defined]
             event_type="ON_SCHEDULE",
             priority=priority,
             cron=cron,
+            accepts_ctx=accepts_ctx,
+            accepts_trigger=accepts_trigger,
         )
         return func
 
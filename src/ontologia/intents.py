@@ -8,8 +8,14 @@ from typing import Any
 
 from ontologia.types import Entity, Relation
 
+# isinstance() target for objects that can be queued as intents
+_INTENT_TYPES = (Entity, Relation)
+# Common batch containers, checked concretely before falling back to the slower
+# collections.abc.Iterable instance check.
+_BATCH_TYPES = (list, tuple)
 
-@dataclass
+
+@dataclass(slots=True)
 class Intent:
     """Opaque wrapper holding a typed Entity or Relation for state reconciliation."""
 
@@ -0,0 +1,25 @@
+"""JSON decoding shared by the storage and event-store backends."""
+
+from __future__ import annotations
+
+import json
+from typing import Any
+
+try:
+    import orjson  # pyright: ignore[reportMissingImports]
+except ImportError:  # pragma: no cover - orjson is an optional speedup
+    orjson = None
+
+
+def loads_json(text: str | bytes) -> Any:
+    """Parse stored JSON, using orjson when it is installed.
+
+    Writes stay on stdlib json. orjson rejects the NaN/Infinity tokens that
+    json.dumps can emit, so such documents fall back to json.loads.
+    """
+    if orjson is not None:
+        try:
+            return orjson.loads(text)  # pyright: ignore[reportUnknownMemberType]
+        except orjson.JSONDecodeError:  # pyright: ignore[reportUnknownMemberType]
+            pass
+    return json.loads(text)
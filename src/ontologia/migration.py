@@ -121,7 +121,8 @@ def _compute_plan_hash(diffs: list[TypeSchemaDiff]) -> str:
                 "stored_version": d.stored_version,
                 "added_fields": sorted(d.added_fields),
                 "removed_fields": sorted(d.removed_fields),
-                "changed_fields": dict(sorted(d.changed_fields.items())),
+                # sort_keys orders changed_fields; no pre-sorted copy needed
+                "changed_fields": d.changed_fields,
             }
             for d in sorted(diffs, key=lambda d: (d.type_kind, d.type_name))
         ],
@@ -2,12 +2,16 @@
 
 from __future__ import annotations
 
+import functools
 import inspect
+import itertools
 import json
 import random
+import secrets
 import time
 import uuid
 from collections.abc import Iterable as ABCIterable
+from dataclasses import dataclass
 from typing import Any, Callable, Literal, cast, overload
 
 from ontologia.config import OntologiaConfig
@@ -16,6 +20,7 @@ from ontologia.errors import (
     CommitChainDepthError,
     HandlerError,
     HeadMismatchError,
+    LeaseExpiredError,
     LockContentionError,
     MigrationError,
     MigrationTokenError,
@@ -23,10 +28,17 @@ from ontologia.errors import (
     SchemaOutdatedError,
     TypeSchemaDiff,
 )
-from ontologia.filters import ComparisonExpression, FilterExpression, resolve_nested_path
+from ontologia.filters import (
+    ComparisonExpression,
+    ExistsComparisonExpression,
+    FilterExpression,
+    LogicalExpression,
+    resolve_nested_path,
+)
 from ontologia.type_spec import build_type_spec, synthesize_type_spec_from_legacy
-from ontologia.handlers import HandlerContext, HandlerMeta
-from ontologia.intents import Intent
+from ontologia.handlers import HandlerContext, HandlerMeta, _positional_call_flags
+from ontologia.intents import _BATCH_TYPES, _INTENT_TYPES, Intent
+from ontologia.json_utils import loads_json
 from ontologia.migration import (
     MigrationPreview,
     MigrationResult,
@@ -38,13 +50,22 @@ from ontologia.migration import (
 )
 from ontologia.query import QueryBuilder
 from ontologia.storage import (
-    _schema_hash,
+    _canonical_schema_hash,
     open_repository,
     parse_storage_target,
 )
 from ontologia.types import Entity, Meta, Relation
 
+# Base sleep before each head-mismatch retry in Session._apply_intents; jitter is added on top.
+_HEAD_RETRY_BACKOFF_S = (0.01, 0.02, 0.04)
+
+
+def _new_root_event_id() -> str:
+    """Random id for an in-memory legacy event chain (32 hex chars, not persisted)."""
+    return secrets.token_hex(16)
 
+
+@functools.cache
 def _get_handler_id(func: Callable[..., Any]) -> str:
     """Compute stable handler identity from module.qualname."""
     return f"{func.__module__}.{func.__qualname__}"
@@ -88,6 +109,16 @@ def _relation_schema(cls: type[Relation]) -> dict[str, Any]:  # type: ignore[typ
     }
 
 
+def _equal_ignoring_type_spec(stored: dict[str, Any], code: dict[str, Any]) -> bool:
+    """Compare a stored field dict (without type_spec) to a code field dict, ignoring type_spec."""
+    if len(stored) != len(code) - ("type_spec" in code):
+        return False
+    for key, value in stored.items():
+        if key not in code or code[key] != value:
+            return False
+    return True
+
+
 def _compare_value(value: Any, op: str, rhs: Any) -> bool:
     """Compare a single value against an operator and right-hand side."""
     if op == "==":
@@ -135,8 +166,6 @@ def _matches_filter(data: dict[str, Any], expr: FilterExpression) -> bool:
 
         return _compare_value(value, expr.op, expr.value)
 
-    from ontologia.filters import ExistsComparisonExpression
-
     if isinstance(expr, ExistsComparisonExpression):
         path = expr.list_field_path
         if path.startswith("$."):
@@ -154,8 +183,6 @@ def _matches_filter(data: dict[str, Any], expr: FilterExpression) -> bool:
                 return True
         return False
 
-    from ontologia.filters import LogicalExpression
-
     if isinstance(expr, LogicalExpression):
         if expr.op == "AND":
             return all(_matches_filter(data, c) for c in expr.children)
@@ -167,9 +194,157 @@ def _matches_filter(data: dict[str, Any], expr: FilterExpression) -> bool:
     return True
 
 
+_FilterClass = Literal["const_true", "const_false", "dynamic"]
+
+
+def _classify_filter(expr: FilterExpression | None) -> _FilterClass:
+    """Classify a filter by whether ``_matches_filter`` can depend on the commit data.
+
+    Endpoint comparisons always pass at dispatch time, so filters built only from
+    them (and their logical combinations) resolve to a constant.
+    """
+    if expr is None:
+        return "const_true"
+
+    if isinstance(expr, ComparisonExpression):
+        return "dynamic" if expr.field_path.startswith("$.") else "const_true"
+    if isinstance(expr, ExistsComparisonExpression):
+        return "dynamic" if expr.list_field_path.startswith("$.") else "const_true"
+    if isinstance(expr, LogicalExpression):
+        if expr.op == "NOT":
+            if not expr.children:
+                return "dynamic"
+            child = _classify_filter(expr.children[0])
+            if child == "dynamic":
+                return "dynamic"
+            return "const_false" if child == "const_true" else "const_true"
+        if expr.op in ("AND", "OR"):
+            classes = [_classify_filter(c) for c in expr.children]
+            # AND is decided by any const_false child, OR by any const_true child.
+            decisive: _FilterClass = "const_false" if expr.op == "AND" else "const_true"
+            if decisive in classes:
+                return decisive
+            if "dynamic" in classes:
+                return "dynamic"
+            return "const_true" if expr.op == "AND" else "const_false"
+    return "const_true"
+
+
+_DispatchPredicate = Callable[[dict[str, Any]], bool]
+
+
+def _always_true(data: dict[str, Any]) -> bool:
+    return True
+
+
+def _compile_comparison(op: str, rhs: Any) -> Callable[[Any], bool]:
+    """Specialize ``_compare_value`` for a fixed operator and right-hand side."""
+    if op == "==":
+        return lambda v: v == rhs
+    if op == "!=":
+        return lambda v: v != rhs
+    if op == ">":
+        return lambda v: v is not None and v > rhs
+    if op == ">=":
+        return lambda v: v is not None and v >= rhs
+    if op == "<":
+        return lambda v: v is not None and v < rhs
+    if op == "<=":
+        return lambda v: v is not None and v <= rhs
+    if op == "IS_NULL":
+        return lambda v: v is None
+    if op == "IS_NOT_NULL":
+        return lambda v: v is not None
+    return lambda v: _compare_value(v, op, rhs)
+
+
+def _compile_dispatch_filter(expr: FilterExpression) -> _DispatchPredicate:
+    """Compile a filter into a predicate equivalent to ``_matches_filter(data, expr)``.
+
+    Built once per handler so dispatch skips the per-call isinstance walk.
+    """
+    if isinstance(expr, ComparisonExpression):
+        if not expr.field_path.startswith("$."):
+            return _always_true
+        field_name = expr.field_path[2:]
+        compare = _compile_comparison(expr.op, expr.value)
+        if "." not in field_name:
+            return lambda data: compare(data.get(field_name))
+        return lambda data: compare(resolve_nested_path(data, field_name))
+
+    if isinstance(expr, ExistsComparisonExpression):
+        if not expr.list_field_path.startswith("$."):
+            return _always_true
+        list_path = expr.list_field_path[2:]
+        item_path = expr.item_path
+        compare = _compile_comparison(expr.op, expr.value)
+
+        def exists(data: dict[str, Any]) -> bool:
+            list_val = resolve_nested_path(data, list_path)
+            if not isinstance(list_val, list):
+                return False
+            for item in cast(list[Any], list_val):
+                if isinstance(item, dict):
+                    item = resolve_nested_path(cast(dict[str, Any], item), item_path)
+                if compare(item):
+                    return True
+            return False
+
+        return exists
+
+    if isinstance(expr, LogicalExpression):
+        if expr.op == "NOT" and expr.children:
+            child = _compile_dispatch_filter(expr.children[0])
+            return lambda data: not child(data)
+        if expr.op == "AND":
+            children = [_compile_dispatch_filter(c) for c in expr.children]
+            return lambda data: all(c(data) for c in children)
+        if expr.op == "OR":
+            children = [_compile_dispatch_filter(c) for c in expr.children]
+            return lambda data: any(c(data) for c in children)
+        if expr.op == "NOT":
+            return lambda data: _matches_filter(data, expr)
+
+    return _always_true
+
+
+@dataclass(slots=True)
+class _Change:
+    """A row written by a commit; also the trigger record for legacy ON_COMMIT handlers."""
+
+    kind: Literal["entity", "relation"]
+    type_name: str
+    fields: dict[str, Any]
+    key: str = ""
+    left_key: str = ""
+    right_key: str = ""
+    instance_key: str = ""
+    commit_id: int = 0
+
+    @property
+    def identity(self) -> str | tuple[str, str, str]:
+        if self.kind == "entity":
+            return self.key
+        return (self.left_key, self.right_key, self.instance_key)
+
+
+# (handler_id, commit_id) -> {(type_name, identity)} already dispatched in this event chain
+_DispatchLog = dict[tuple[str, int], set[tuple[str, str | tuple[str, str, str]]]]
+
+
 class _HandlerEntry:
     """Internal registry entry for a discovered handler."""
 
+    __slots__ = (
+        "func",
+        "meta",
+        "handler_id",
+        "accepts_trigger",
+        "filter_class",
+        "when_fn",
+        "target_name",
+    )
+
     def __init__(
         self,
         func: Callable[..., Any],
@@ -181,6 +356,26 @@ class _HandlerEntry:
         self.meta = meta
         self.handler_id = handler_id
         self.accepts_trigger = accepts_trigger
+        self.filter_class = _classify_filter(meta.when)
+        # Only consulted for dynamic filters; constant ones are decided by filter_class.
+        self.when_fn: _DispatchPredicate = (
+            _compile_dispatch_filter(meta.when)
+            if self.filter_class == "dynamic" and meta.when is not None
+            else _always_true
+        )
+        # Registered name of the typed ON_COMMIT target (None for untyped handlers)
+        self.target_name: str | None = None
+        if meta.target_kind == "entity" and meta.target_type is not None:
+            self.target_name = cast(type[Entity], meta.target_type).__entity_name__
+        elif meta.target_kind == "relation" and meta.target_type is not None:
+            self.target_name = cast(type[Relation[Any, Any]], meta.target_type).__relation_name__
+
+    def targets(self, kind: str, type_name: str) -> bool:
+        """Whether this handler should see changes to the given type."""
+        target_kind = self.meta.target_kind
+        if target_kind is None:
+            return True
+        return target_kind == kind and self.target_name == type_name
 
 
 class Ontology:
@@ -204,6 +399,17 @@ class Ontology:
         self._relation_types: dict[str, type[Relation]] = {}  # type: ignore[type-arg]
         self._schema_version_ids: dict[str, int] = {}
         self._schema_validated = False
+        # Nesting depth of legacy Session applies holding the write lock as _runtime_id
+        self._write_lock_depth = 0
+        # Repository schema epoch observed when validation last succeeded.
+        self._validated_schema_epoch: tuple[int, int] | None = None
+        # Types that passed the drift check at _drift_verified_epoch
+        self._drift_verified: set[tuple[str, str]] = set()
+        self._drift_verified_epoch: tuple[int, int] | None = None
+        # Code schemas derived from the registered classes, keyed by (kind, type_name)
+        self._code_schema_cache: dict[tuple[str, str], dict[str, Any]] = {}
+        # Parsed stored schemas keyed by (kind, name, schema_version_id, schema_hash)
+        self._stored_schema_cache: dict[tuple[str, str, int, str], dict[str, Any]] = {}
 
         # Register explicitly provided types
         if entity_types:
@@ -263,13 +469,25 @@ class Ontology:
             diffs: list[TypeSchemaDiff] = []
             schema_version_ids: dict[str, int] = {}
 
-            for name, cls in self._entity_types.items():
-                version_id = self._validate_type_schema("entity", name, _entity_schema(cls), diffs)
+            stored_versions = self._repo.get_current_schema_versions(self._schema_keys())
+
+            for name in self._entity_types:
+                version_id = self._validate_type_schema(
+                    "entity",
+                    name,
+                    self._get_code_schema("entity", name),
+                    diffs,
+                    stored_versions[("entity", name)],
+                )
                 if version_id is not None:
                     schema_version_ids[name] = version_id
-            for name, cls in self._relation_types.items():
+            for name in self._relation_types:
                 version_id = self._validate_type_schema(
-                    "relation", name, _relation_schema(cls), diffs
+                    "relation",
+                    name,
+                    self._get_code_schema("relation", name),
+                    diffs,
+                    stored_versions[("relation", name)],
                 )
                 if version_id is not None:
                     schema_version_ids[name] = version_id
@@ -281,6 +499,8 @@ class Ontology:
 
             self._schema_version_ids = schema_version_ids
             self._schema_validated = True
+            self._validated_schema_epoch = self._repo.get_schema_epoch()
+            self._drift_verified.clear()
         finally:
             if lock_owner is not None:
                 try:
@@ -288,24 +508,28 @@ class Ontology:
                 except Exception:
                     pass
 
+    def _schema_keys(self) -> list[tuple[str, str]]:
+        """All registered (type_kind, type_name) pairs, entities first."""
+        return [("entity", name) for name in self._entity_types] + [
+            ("relation", name) for name in self._relation_types
+        ]
+
     def _validate_type_schema(
         self,
         kind: str,
         name: str,
         code_schema: dict[str, Any],
         diffs: list[TypeSchemaDiff],
+        stored: dict[str, Any] | None,
     ) -> int | None:
-        """Validate a single type's schema against stored version."""
-        code_json = json.dumps(code_schema, sort_keys=True)
-        code_hash = _schema_hash(code_json)
-
-        stored = self._repo.get_current_schema_version(kind, name)
+        """Validate a single type's schema against its prefetched stored version."""
+        code_hash = _canonical_schema_hash(code_schema)
 
         if stored is None:
             vid = self._repo.create_schema_version(
                 kind,
                 name,
-                code_json,
+                json.dumps(code_schema, sort_keys=True),
                 code_hash,
                 runtime_id=self._runtime_id,
                 reason="initial",
@@ -316,17 +540,15 @@ class Ontology:
             return cast(int, stored["schema_version_id"])
         else:
             # Check if drift is only due to missing type_spec (legacy upgrade)
-            stored_schema = json.loads(stored["schema_json"])
+            stored_schema = self._get_stored_schema(kind, name, stored)
             if self._try_legacy_type_spec_upgrade(stored_schema, code_schema):
                 # Stored schema was missing type_spec; synthesized specs match code.
                 # Re-store with the upgraded schema to avoid future drift.
-                upgraded_json = json.dumps(code_schema, sort_keys=True)
-                upgraded_hash = _schema_hash(upgraded_json)
                 vid = self._repo.create_schema_version(
                     kind,
                     name,
-                    upgraded_json,
-                    upgraded_hash,
+                    json.dumps(code_schema, sort_keys=True),
+                    code_hash,
                     runtime_id=self._runtime_id,
                     reason="type_spec_upgrade",
                 )
@@ -360,32 +582,25 @@ class Ontology:
             return False
 
         # Check non-fields keys match (entity_name, relation_name, etc.)
-        for key in stored_schema:
-            if key == "fields":
-                continue
-            if stored_schema.get(key) != code_schema.get(key):
-                return False
-        for key in code_schema:
-            if key == "fields":
-                continue
-            if key not in stored_schema:
+        meta_keys = stored_schema.keys() - {"fields"}
+        if meta_keys != code_schema.keys() - {"fields"}:
+            return False
+        for key in meta_keys:
+            if stored_schema[key] != code_schema[key]:
                 return False
 
-        for field_name in stored_fields:
-            sf = stored_fields[field_name]
+        for field_name, sf in stored_fields.items():
             cf = code_fields[field_name]
 
             if sf == cf:
                 continue
 
-            # The only allowed difference: stored is missing type_spec, code has it
-            sf_without_spec = {k: v for k, v in sf.items() if k != "type_spec"}
-            cf_without_spec = {k: v for k, v in cf.items() if k != "type_spec"}
-            if sf_without_spec != cf_without_spec:
-                return False
             if "type_spec" in sf:
                 # Stored already has type_spec but different — real drift
                 return False
+            # The only allowed difference: stored is missing type_spec, code has it
+            if not _equal_ignoring_type_spec(sf, cf):
+                return False
 
             # Try to synthesize from legacy type string
             type_str = sf.get("type")
@@ -447,23 +662,26 @@ class Ontology:
         estimated_rows: dict[str, int] = {}
         schema_only: list[str] = []
         needs_upgrader: list[str] = []
+        stored_versions = self._repo.get_current_schema_versions(self._schema_keys())
 
-        for name, cls in self._entity_types.items():
+        for name in self._entity_types:
             self._check_type_diff(
                 "entity",
                 name,
-                _entity_schema(cls),
+                self._get_code_schema("entity", name),
+                stored_versions[("entity", name)],
                 self._repo.count_latest_entities,
                 diffs,
                 estimated_rows,
                 schema_only,
                 needs_upgrader,
             )
-        for name, cls in self._relation_types.items():
+        for name in self._relation_types:
             self._check_type_diff(
                 "relation",
                 name,
-                _relation_schema(cls),
+                self._get_code_schema("relation", name),
+                stored_versions[("relation", name)],
                 self._repo.count_latest_relations,
                 diffs,
                 estimated_rows,
@@ -478,16 +696,15 @@ class Ontology:
         kind: str,
         name: str,
         code_schema: dict[str, Any],
+        stored: dict[str, Any] | None,
         count_fn: Callable[[str], int],
         diffs: list[TypeSchemaDiff],
         estimated_rows: dict[str, int],
         schema_only: list[str],
         needs_upgrader: list[str],
     ) -> None:
-        code_json = json.dumps(code_schema, sort_keys=True)
-        code_hash = _schema_hash(code_json)
+        code_hash = _canonical_schema_hash(code_schema)
 
-        stored = self._repo.get_current_schema_version(kind, name)
         if stored is None or stored["schema_hash"] == code_hash:
             return
 
@@ -495,7 +712,7 @@ class Ontology:
             kind,
             name,
             stored["schema_version_id"],
-            json.loads(stored["schema_json"]),
+            self._get_stored_schema(kind, name, stored),
             code_schema,
         )
         diffs.append(diff)
@@ -551,6 +768,7 @@ class Ontology:
         upgraders: dict[tuple[str, int], Callable[..., Any]] | None = None,
     ) -> MigrationPreview:
         diffs, estimated_rows, schema_only, needs_upgrader = self._compute_migration_plan()
+        diffs_by_name = {d.type_name: d for d in diffs}
 
         if not diffs:
             return MigrationPreview(
@@ -567,7 +785,7 @@ class Ontology:
         missing: list[str] = []
         if upgraders is not None:
             for name in needs_upgrader:
-                diff = next(d for d in diffs if d.type_name == name)
+                diff = diffs_by_name[name]
                 stored_ver = diff.stored_version
                 target_ver = stored_ver + 1
                 for v in range(stored_ver, target_ver):
@@ -615,6 +833,7 @@ class Ontology:
         try:
             # Recompute plan under lock
             diffs, _estimated_rows, schema_only, needs_upgrader = self._compute_migration_plan()
+            diffs_by_name = {d.type_name: d for d in diffs}
 
             if not diffs:
                 return MigrationResult(success=True, duration_s=time.monotonic() - start_time)
@@ -632,7 +851,7 @@ class Ontology:
             # Validate upgrader coverage for types with data
             missing: dict[str, list[int]] = {}
             for name in needs_upgrader:
-                diff = next(d for d in diffs if d.type_name == name)
+                diff = diffs_by_name[name]
                 stored_ver = diff.stored_version
                 target_ver = stored_ver + 1  # Each migration bumps by 1
                 missing_versions: list[int] = []
@@ -651,16 +870,17 @@ class Ontology:
                 types_migrated: list[str] = []
                 rows_migrated: dict[str, int] = {}
                 new_versions: dict[str, int] = {}
-                migrated_types_meta = [
-                    {
+
+                def _build_meta(d: TypeSchemaDiff) -> dict[str, Any]:
+                    return {
                         "type_kind": d.type_kind,
                         "type_name": d.type_name,
                         "from_schema_version_id": d.stored_version,
                         "to_schema_version_id": d.stored_version + 1,
-                        "rows_rewritten": int(_estimated_rows.get(d.type_name, 0)),
+                        "rows_rewritten": _estimated_rows.get(d.type_name, 0),
                     }
-                    for d in diffs
-                ]
+
+                migrated_types_meta = list(map(_build_meta, diffs))
                 migration_commit_id = self._repo.create_commit(
                     {
                         "kind": "migration",
@@ -670,90 +890,12 @@ class Ontology:
 
                 for diff in diffs:
                     name = diff.type_name
-                    kind = diff.type_kind
-                    code_schema = self._get_code_schema(kind, name)
-                    code_json = json.dumps(code_schema, sort_keys=True)
-                    code_hash = _schema_hash(code_json)
-                    vid = self._repo.create_schema_version(
-                        kind,
-                        name,
-                        code_json,
-                        code_hash,
-                        runtime_id=self._runtime_id,
-                        reason="migration",
+                    vid, row_count = self._migrate_one_type(
+                        diff,
+                        migration_commit_id,
+                        upgraders,
+                        schema_only=name in schema_only,
                     )
-
-                    if name in schema_only:
-                        row_count = 0
-                    else:
-                        # Needs upgrader: transform data
-                        stored_ver = diff.stored_version
-                        chain_fn = _chain_upgraders(upgraders, name, stored_ver, stored_ver + 1)
-
-                        row_count = 0
-                        if kind == "entity":
-                            cls = self._entity_types[name]
-                            for batch in self._repo.iter_latest_entities(name):
-                                for key, fields, _old_cid, _old_svid in batch:
-                                    try:
-                                        new_fields = chain_fn(dict(fields))
-                                        # Validate through type
-                                        cls(**new_fields)
-                                    except Exception as e:
-                                        raise MigrationError(
-                                            f"Upgrader failed for {kind} '{name}' "
-                                            f"key='{key}': {e}\n"
-                                            f"Old data: {fields}"
-                                        ) from e
-                                    self._repo.insert_entity(
-                                        name,
-                                        key,
-                                        new_fields,
-                                        migration_commit_id,
-                                        schema_version_id=vid,
-                                    )
-                                    row_count += 1
-                        else:
-                            cls = self._relation_types[name]
-                            for batch in self._repo.iter_latest_relations(name):
-                                for left_key, right_key, ik, fields, _old_cid, _old_svid in batch:
-                                    try:
-                                        new_fields = chain_fn(dict(fields))
-                                        ctor_kwargs: dict[str, Any] = {
-                                            **new_fields,
-                                            "left_key": left_key,
-                                            "right_key": right_key,
-                                        }
-                                        if ik and cls._instance_key_field:
-                                            ctor_kwargs[cls._instance_key_field] = ik
-                                        cls(**ctor_kwargs)
-                                    except Exception as e:
-                                        raise MigrationError(
-                                            f"Upgrader failed for {kind} '{name}' "
-                                            f"key='{left_key}:{right_key}': {e}\n"
-                                            f"Old data: {fields}"
-                                        ) from e
-                                    self._repo.insert_relation(
-                                        name,
-                                        left_key,
-                                        right_key,
-                                        new_fields,
-                                        migration_commit_id,
-                                        schema_version_id=vid,
-                                        instance_key=ik,
-                                    )
-                                    row_count += 1
-
-                    activator = getattr(self._repo, "activate_schema_version", None)
-                    if callable(activator):
-                        activator(
-                            type_kind=kind,
-                            type_name=name,
-                            schema_version_id=vid,
-                            activation_commit_id=migration_commit_id,
-                        )
-
-                    self._repo.store_schema(kind, name, code_schema)
                     new_versions[name] = vid
                     types_migrated.append(name)
                     rows_migrated[name] = row_count
@@ -766,6 +908,8 @@ class Ontology:
             # Force a fresh validate() on next session/write path after migration.
             self._schema_validated = False
             self._schema_version_ids.clear()
+            self._code_schema_cache.clear()
+            self._stored_schema_cache.clear()
 
             return MigrationResult(
                 success=True,
@@ -781,29 +925,246 @@ class Ontology:
             except Exception:
                 pass
 
+    def _migrate_one_type(
+        self,
+        diff: TypeSchemaDiff,
+        migration_commit_id: int,
+        upgraders: dict[tuple[str, int], Callable[..., Any]],
+        *,
+        schema_only: bool,
+    ) -> tuple[int, int]:
+        """Rewrite one type under a new schema version. Returns (version_id, rows_rewritten).
+
+        Types are independent of each other, but every backend stages writes on a
+        single connection/transaction, so callers run this sequentially.
+        """
+        name = diff.type_name
+        kind = diff.type_kind
+        code_schema = self._get_code_schema(kind, name)
+        vid = self._repo.create_schema_version(
+            kind,
+            name,
+            json.dumps(code_schema, sort_keys=True),
+            _canonical_schema_hash(code_schema),
+            runtime_id=self._runtime_id,
+            reason="migration",
+        )
+
+        row_count = 0
+        if not schema_only:
+            # Needs upgrader: transform data
+            stored_ver = diff.stored_version
+            chain_fn = _chain_upgraders(upgraders, name, stored_ver, stored_ver + 1)
+
+            if kind == "entity":
+                cls = self._entity_types[name]
+                for batch in self._repo.iter_latest_entities(name):
+                    for key, fields, _old_cid, _old_svid in batch:
+                        try:
+                            new_fields = chain_fn(dict(fields))
+                            # Validate through type
+                            cls(**new_fields)
+                        except Exception as e:
+                            raise MigrationError(
+                                f"Upgrader failed for {kind} '{name}' "
+                                f"key='{key}': {e}\n"
+                                f"Old data: {fields}"
+                            ) from e
+                        self._repo.insert_entity(
+                            name,
+                            key,
+                            new_fields,
+                            migration_commit_id,
+                            schema_version_id=vid,
+                        )
+                        row_count += 1
+            else:
+                cls = self._relation_types[name]
+                for batch in self._repo.iter_latest_relations(name):
+                    for left_key, right_key, ik, fields, _old_cid, _old_svid in batch:
+                        try:
+                            new_fields = chain_fn(dict(fields))
+                            ctor_kwargs: dict[str, Any] = {
+                                **new_fields,
+                                "left_key": left_key,
+                                "right_key": right_key,
+                            }
+                            if ik and cls._instance_key_field:
+                                ctor_kwargs[cls._instance_key_field] = ik
+                            cls(**ctor_kwargs)
+                        except Exception as e:
+                            raise MigrationError(
+                                f"Upgrader failed for {kind} '{name}' "
+                                f"key='{left_key}:{right_key}': {e}\n"
+                                f"Old data: {fields}"
+                            ) from e
+                        self._repo.insert_relation(
+                            name,
+                            left_key,
+                            right_key,
+                            new_fields,
+                            migration_commit_id,
+                            schema_version_id=vid,
+                            instance_key=ik,
+                        )
+                        row_count += 1
+
+        activator = getattr(self._repo, "activate_schema_version", None)
+        if callable(activator):
+            activator(
+                type_kind=kind,
+                type_name=name,
+                schema_version_id=vid,
+                activation_commit_id=migration_commit_id,
+            )
+
+        self._repo.store_schema(kind, name, code_schema)
+        return vid, row_count
+
     def _get_code_schema(self, kind: str, name: str) -> dict[str, Any]:
-        if kind == "entity":
-            return _entity_schema(self._entity_types[name])
-        return _relation_schema(self._relation_types[name])
+        """Return the (cached) code schema for a registered type. Callers must not mutate it."""
+        key = (kind, name)
+        schema = self._code_schema_cache.get(key)
+        if schema is None:
+            if kind == "entity":
+                schema = _entity_schema(self._entity_types[name])
+            else:
+                schema = _relation_schema(self._relation_types[name])
+            self._code_schema_cache[key] = schema
+        return schema
+
+    def _get_stored_schema(self, kind: str, name: str, stored: dict[str, Any]) -> dict[str, Any]:
+        """Return the parsed schema of a stored version row. Callers must not mutate it."""
+        key = (kind, name, cast(int, stored["schema_version_id"]), cast(str, stored["schema_hash"]))
+        schema = self._stored_schema_cache.get(key)
+        if schema is None:
+            schema = cast(dict[str, Any], loads_json(cast(str, stored["schema_json"])))
+            self._stored_schema_cache[key] = schema
+        return schema
+
+    def _compute_changes(self, objs: ABCIterable[Entity | Relation[Any, Any]]) -> list[_Change]:
+        """Diff staged objects against the latest stored rows, in staging order."""
+        return self._filter_changed(self._prepare_changes(objs))
 
-    def _assert_no_schema_drift(self, changes: list[dict[str, Any]]) -> None:
+    @staticmethod
+    def _prepare_changes(objs: ABCIterable[Entity | Relation[Any, Any]]) -> list[_Change]:
+        """Build candidate change records for staged objects. Needs no repository access.
+
+        An object staged more than once in the same batch is only dumped once. Only the
+        legacy runtime Session passes such repeats; the event Session coalesces its
+        intents per row before calling this.
+        """
+        pending: list[_Change] = []
+        dumped: dict[int, dict[str, Any]] = {}
+        for obj in objs:
+            fields = dumped.get(id(obj))
+            if fields is None:
+                fields = dumped[id(obj)] = obj.model_dump()
+            if isinstance(obj, Entity):
+                key = str(getattr(obj, obj._primary_key_field))
+                pending.append(_Change("entity", obj.__entity_name__, fields, key=key))
+            else:
+                pending.append(
+                    _Change(
+                        "relation",
+                        obj.__relation_name__,
+                        fields,
+                        left_key=obj.left_key,
+                        right_key=obj.right_key,
+                        instance_key=obj.instance_key,
+                    )
+                )
+        return pending
+
+    def _filter_changed(self, pending: list[_Change]) -> list[_Change]:
+        """Keep candidates whose fields differ from the latest stored row.
+
+        Current rows are fetched with one bulk lookup per type rather than one per object.
+        """
+        entity_keys: dict[str, list[str]] = {}
+        relation_keys: dict[str, list[tuple[str, str, str]]] = {}
+        for change in pending:
+            if change.kind == "entity":
+                entity_keys.setdefault(change.type_name, []).append(change.key)
+            else:
+                relation_keys.setdefault(change.type_name, []).append(
+                    (change.left_key, change.right_key, change.instance_key)
+                )
+
+        current_entities = {
+            type_name: self._repo.get_latest_entities(type_name, keys)
+            for type_name, keys in entity_keys.items()
+        }
+        current_relations = {
+            type_name: self._repo.get_latest_relations(type_name, keys)
+            for type_name, keys in relation_keys.items()
+        }
+
+        changes: list[_Change] = []
+        for change in pending:
+            if change.kind == "entity":
+                current = current_entities[change.type_name].get(change.key)
+            else:
+                current = current_relations[change.type_name].get(
+                    (change.left_key, change.right_key, change.instance_key)
+                )
+            if current is None or current["fields"] != change.fields:
+                changes.append(change)
+        return changes
+
+    def _write_changes(self, changes: list[_Change], commit_id: int) -> None:
+        """Write commit changes, batching consecutive rows of one type into a bulk insert.
+
+        Grouping only consecutive runs keeps the history rows in change order.
+        """
+        for (kind, type_name), group in itertools.groupby(
+            changes, key=lambda c: (c.kind, c.type_name)
+        ):
+            svid = self._schema_version_ids.get(type_name)
+            if kind == "entity":
+                self._repo.insert_entities(
+                    type_name,
+                    [(c.key, c.fields) for c in group],
+                    commit_id,
+                    schema_version_id=svid,
+                )
+            elif kind == "relation":
+                self._repo.insert_relations(
+                    type_name,
+                    [(c.left_key, c.right_key, c.instance_key, c.fields) for c in group],
+                    commit_id,
+                    schema_version_id=svid,
+                )
+
+    def _assert_no_schema_drift(self, changes: list[_Change]) -> None:
         """Abort writes when touched type schema versions drift from the validated snapshot."""
         if not self._schema_validated:
             return
-
-        touched_types: set[tuple[str, str]] = set()
-        for change in changes:
-            kind = cast(str, change["kind"])
-            type_name = cast(str, change["type_name"])
-            touched_types.add((kind, type_name))
+        # Nothing was added to or removed from the catalog since validation.
+        epoch = self._repo.get_schema_epoch()
+        if epoch is not None and epoch == self._validated_schema_epoch:
+            return
+        if epoch is None or epoch != self._drift_verified_epoch:
+            self._drift_verified.clear()
+            self._drift_verified_epoch = epoch
+
+        touched_types = {(change.kind, change.type_name) for change in changes}
+
+        # Order only matters for error reporting; the diffs are sorted before raising.
+        checked = [
+            (kind, type_name)
+            for kind, type_name in touched_types
+            if type_name in self._schema_version_ids
+            and (kind, type_name) not in self._drift_verified
+        ]
+        if not checked:
+            return
+        stored_map = self._repo.get_current_schema_versions(checked)
 
         diffs: list[TypeSchemaDiff] = []
-        for kind, type_name in sorted(touched_types):
-            expected_version = self._schema_version_ids.get(type_name)
-            if expected_version is None:
-                continue
-
-            stored = self._repo.get_current_schema_version(kind, type_name)
+        for kind, type_name in checked:
+            expected_version = self._schema_version_ids[type_name]
+            stored = stored_map[(kind, type_name)]
             if stored is None:
                 code_schema = self._get_code_schema(kind, type_name)
                 diffs.append(
@@ -816,7 +1177,7 @@ class Ontology:
                 continue
 
             code_schema = self._get_code_schema(kind, type_name)
-            stored_schema = json.loads(cast(str, stored["schema_json"]))
+            stored_schema = self._get_stored_schema(kind, type_name, stored)
             diffs.append(
                 self._build_schema_diff(
                     kind,
@@ -829,7 +1190,10 @@ class Ontology:
 
         if diffs:
             self._schema_validated = False
+            diffs.sort(key=lambda d: (d.type_kind, d.type_name))
             raise SchemaOutdatedError(diffs)
+        if epoch is not None:
+            self._drift_verified.update(checked)
 
     # --- Event execution ---
 
@@ -872,12 +1236,15 @@ class Session:
         if isinstance(obj, (Entity, Relation)):
             # Single object case
             self._intents.append(Intent(obj))
-        elif isinstance(obj, ABCIterable) and not isinstance(obj, (str, bytes)):
+        elif isinstance(obj, _BATCH_TYPES) or (
+            isinstance(obj, ABCIterable) and not isinstance(obj, (str, bytes))
+        ):
             # Iterable case - process each item
+            append = self._intents.append
             for item in obj:
-                if not isinstance(item, (Entity, Relation)):
+                if not isinstance(item, _INTENT_TYPES):
                     raise TypeError(f"Expected Entity or Relation, got {type(item)}")
-                self._intents.append(Intent(item))
+                append(Intent(item))
         else:
             raise TypeError(
                 f"Expected Entity, Relation, or Iterable of Entity/Relation, got {type(obj)}"
@@ -888,18 +1255,17 @@ class Session:
         if not self._intents:
             return None
 
-        batch_intents = list(self._intents)
-        self._intents.clear()
+        batch_intents, self._intents = self._intents, []
 
         # Imperative commit uses a fresh event scope
         return self._apply_intents(
             batch_intents,
             commit_meta={},
             snapshot_commit_id=self._ontology.repo.get_head_commit_id(),
-            root_event_id=str(uuid.uuid4()),
+            root_event_id=_new_root_event_id(),
             chain_depth=0,
             authoring_handler_ids=set(),
-            dispatch_log=set(),
+            dispatch_log={},
         )
 
     def run(self, handlers: list[Callable[..., Any]]) -> None:
@@ -961,49 +1327,27 @@ class Session:
         # This allows handlers to see data from pre-run ensure() calls
         # and triggers ON_COMMIT handlers on the initial commit
         if self._intents:
-            batch_intents = list(self._intents)
-            self._intents.clear()
+            batch_intents, self._intents = self._intents, []
 
             self._apply_intents(
                 batch_intents,
                 commit_meta={},
                 snapshot_commit_id=self._ontology.repo.get_head_commit_id(),
-                root_event_id=str(uuid.uuid4()),
+                root_event_id=_new_root_event_id(),
                 chain_depth=0,
                 authoring_handler_ids=set(),
-                dispatch_log=set(),
+                dispatch_log={},
             )
 
         # Execute ON_SCHEDULE handlers (may trigger more ON_COMMIT chains)
         self._fire_event("ON_SCHEDULE", handler_entries)
 
-    @staticmethod
-    def _can_call_with_positional_args(sig: inspect.Signature, arg_count: int) -> bool:
-        required = 0
-        positional = 0
-        has_varargs = False
-        for param in sig.parameters.values():
-            if param.kind in (
-                inspect.Parameter.POSITIONAL_ONLY,
-                inspect.Parameter.POSITIONAL_OR_KEYWORD,
-            ):
-                positional += 1
-                if param.default is inspect.Parameter.empty:
-                    required += 1
-            elif param.kind == inspect.Parameter.VAR_POSITIONAL:
-                has_varargs = True
-
-        if arg_count < required:
-            return False
-        if has_varargs:
-            return True
-        return arg_count <= positional
-
     def _validate_handler_signature(self, func: Callable[..., Any], meta: HandlerMeta) -> bool:
         """Validate handler function signature."""
-        sig = inspect.signature(func)
-        accepts_ctx = self._can_call_with_positional_args(sig, 1)
-        accepts_trigger = self._can_call_with_positional_args(sig, 2)
+        accepts_ctx, accepts_trigger = meta.accepts_ctx, meta.accepts_trigger
+        if accepts_ctx is None or accepts_trigger is None:
+            # Metadata not built by the decorators: introspect now.
+            accepts_ctx, accepts_trigger = _positional_call_flags(func)
 
         if meta.event_type == "ON_SCHEDULE":
             if not accepts_ctx:
@@ -1096,21 +1440,22 @@ class Session:
         self,
         event_type: str,
         handlers: list[_HandlerEntry],
-        trigger_data: list[dict[str, Any]] | None = None,
+        trigger_data: list[_Change] | None = None,
         root_event_id: str | None = None,
         chain_depth: int = 0,
         authoring_handler_ids: set[str] | None = None,
-        dispatch_log: set[tuple[str, int, str, str | tuple[str, str, str]]] | None = None,
+        dispatch_log: _DispatchLog | None = None,
     ) -> None:
         if root_event_id is None:
-            root_event_id = str(uuid.uuid4())
+            root_event_id = _new_root_event_id()
         if dispatch_log is None:
-            dispatch_log = set()
+            dispatch_log = {}
         if authoring_handler_ids is None:
             authoring_handler_ids = set()
 
-        if chain_depth > self._ontology._config.max_commit_chain_depth:
-            raise CommitChainDepthError(chain_depth, self._ontology._config.max_commit_chain_depth)
+        max_depth = self._ontology._config.max_commit_chain_depth
+        if chain_depth > max_depth:
+            raise CommitChainDepthError(chain_depth, max_depth)
 
         # Filter handlers by event type
         filtered_handlers = [h for h in handlers if h.meta.event_type == event_type]
@@ -1139,7 +1484,7 @@ class Session:
         event_type: str,
         root_event_id: str,
         chain_depth: int,
-        dispatch_log: set[tuple[str, int, str, str | tuple[str, str, str]]],
+        dispatch_log: _DispatchLog,
     ) -> None:
         # Use session queue (self._intents) but track what's added in this run
         all_meta: dict[str, str] = {}
@@ -1148,14 +1493,16 @@ class Session:
         snapshot_commit_id = self._ontology.repo.get_head_commit_id()
         initial_intents_len = len(self._intents)
 
+        # One context is reused across handlers; its commit meta is merged after each call.
+        ctx = HandlerContext(
+            event=event_type,
+            commit_id=None,
+            root_event_id=root_event_id,
+            chain_depth=chain_depth,
+            session=self,
+        )
         for handler in handlers:
-            ctx = HandlerContext(
-                event=event_type,
-                commit_id=None,
-                root_event_id=root_event_id,
-                chain_depth=chain_depth,
-                session=self,
-            )
+            ctx._reset(None)
 
             # Handler should use ctx.ensure(...) which appends to self._intents
             handler.func(ctx)
@@ -1171,12 +1518,12 @@ class Session:
         if not self._intents:
             return
 
-        if len(self._intents) > self._ontology._config.max_batch_size:
-            raise BatchSizeExceededError(len(self._intents), self._ontology._config.max_batch_size)
+        max_batch = self._ontology._config.max_batch_size
+        if len(self._intents) > max_batch:
+            raise BatchSizeExceededError(len(self._intents), max_batch)
 
         # Snapshot intents and clear queue before processing
-        batch_intents = list(self._intents)
-        self._intents.clear()
+        batch_intents, self._intents = self._intents, []
 
         # Apply all intents in the queue
         self._apply_intents(
@@ -1192,11 +1539,11 @@ class Session:
     def _execute_commit_handlers(
         self,
         handlers: list[_HandlerEntry],
-        trigger_data: list[dict[str, Any]],
+        trigger_data: list[_Change],
         root_event_id: str,
         chain_depth: int,
         authoring_handler_ids: set[str],
-        dispatch_log: set[tuple[str, int, str, str | tuple[str, str, str]]],
+        dispatch_log: _DispatchLog,
     ) -> None:
         all_meta: dict[str, str] = {}
         contributing_handler_ids: set[str] = set()
@@ -1204,56 +1551,57 @@ class Session:
         snapshot_commit_id = self._ontology.repo.get_head_commit_id()
         initial_intents_len = len(self._intents)
 
-        for change in trigger_data:
-            kind = cast(Literal["entity", "relation"], change.get("kind", "entity"))
-            type_name = change["type_name"]
-            fields = change["fields"]
-            commit_id = change["commit_id"]
-
-            for handler in handlers:
-                target_kind = handler.meta.target_kind
-                target_type = handler.meta.target_type
-                if target_kind is not None:
-                    if target_kind != kind or target_type is None:
-                        continue
-                    if target_kind == "entity":
-                        if cast(type[Entity], target_type).__entity_name__ != type_name:
-                            continue
-                    elif cast(type[Relation[Any, Any]], target_type).__relation_name__ != type_name:
-                        continue
+        buckets: dict[tuple[str, str], list[_HandlerEntry]] = {}
+        # One context is reused across handler calls; its commit meta is merged after each.
+        ctx = HandlerContext(
+            event="ON_COMMIT",
+            commit_id=None,
+            root_event_id=root_event_id,
+            chain_depth=chain_depth,
+            session=self,
+        )
 
+        for change in trigger_data:
+            kind = change.kind
+            type_name = change.type_name
+            fields = change.fields
+            commit_id = change.commit_id
+            dispatch_key = (type_name, change.identity)
+
+            bucket = buckets.get((kind, type_name))
+            if bucket is None:
+                # Handlers matching this type, still in priority order
+                bucket = [h for h in handlers if h.targets(kind, type_name)]
+                buckets[(kind, type_name)] = bucket
+
+            for handler in bucket:
+                handler_id = handler.handler_id
+                handler_meta = handler.meta
                 # Self-trigger check: skip if handler authored the triggering commit
-                if (
-                    not handler.meta.allow_self_trigger
-                    and handler.handler_id in authoring_handler_ids
-                ):
+                if handler_id in authoring_handler_ids and not handler_meta.allow_self_trigger:
                     continue
 
-                if change.get("key"):
-                    identity = change["key"]
-                else:
-                    ik = change.get("instance_key", "")
-                    identity = (change.get("left_key", ""), change.get("right_key", ""), ik)
-                dispatch_key = (handler.handler_id, commit_id, type_name, identity)
-                if dispatch_key in dispatch_log:
+                log_key = (handler_id, commit_id)
+                dispatched = dispatch_log.get(log_key)
+                if dispatched is None:
+                    dispatched = dispatch_log[log_key] = set()
+                if dispatch_key in dispatched:
                     continue
-                dispatch_log.add(dispatch_key)
-
-                if handler.meta.when is not None:
-                    if not _matches_filter(fields, handler.meta.when):
-                        continue
-
-                ctx = HandlerContext(
-                    event="ON_COMMIT",
-                    commit_id=commit_id,
-                    root_event_id=root_event_id,
-                    chain_depth=chain_depth,
-                    session=self,
-                )
+                dispatched.add(dispatch_key)
+
+                filter_class = handler.filter_class
+                if filter_class == "const_false":
+                    continue
+                if filter_class == "dynamic" and not handler.when_fn(fields):
+                    continue
+
+                ctx._reset(commit_id)
 
                 if not handler.accepts_trigger:
                     handler.func(ctx)
                 else:
+                    # Built per handler so no handler sees another's mutations; a fresh
+                    # build is cheaper than deep-copying a shared instance.
                     trigger_obj = self._build_trigger_object(change)
                     if trigger_obj is None:
                         raise HandlerError(
@@ -1265,8 +1613,7 @@ class Session:
 
                 current_len = len(self._intents)
                 if current_len > initial_intents_len:
-                    # print(f"DEBUG: Contributing {handler.handler_id}")
-                    contributing_handler_ids.add(handler.handler_id)
+                    contributing_handler_ids.add(handler_id)
                     initial_intents_len = current_len
 
                 all_meta.update(ctx._commit_meta)
@@ -1274,11 +1621,11 @@ class Session:
         if not self._intents:
             return
 
-        if len(self._intents) > self._ontology._config.max_batch_size:
-            raise BatchSizeExceededError(len(self._intents), self._ontology._config.max_batch_size)
+        max_batch = self._ontology._config.max_batch_size
+        if len(self._intents) > max_batch:
+            raise BatchSizeExceededError(len(self._intents), max_batch)
 
-        batch_intents = list(self._intents)
-        self._intents.clear()
+        batch_intents, self._intents = self._intents, []
 
         self._apply_intents(
             batch_intents,
@@ -1290,36 +1637,35 @@ class Session:
             dispatch_log,
         )
 
-    def _build_trigger_object(self, change: dict[str, Any]) -> Entity | Relation[Any, Any] | None:
-        type_name = change["type_name"]
-        fields = change["fields"]
-        kind = change.get("kind", "entity")
+    def _build_trigger_object(self, change: _Change) -> Entity | Relation[Any, Any] | None:
+        type_name = change.type_name
+        fields = change.fields
 
-        if kind == "entity" and type_name in self._ontology._entity_types:
+        if change.kind == "entity" and type_name in self._ontology._entity_types:
             cls = self._ontology._entity_types[type_name]
             obj = cls(**fields)
             obj.__onto_meta__ = Meta(
-                commit_id=change["commit_id"],
+                commit_id=change.commit_id,
                 type_name=type_name,
-                key=change.get("key"),
+                key=change.key,
             )
             return obj
-        elif kind == "relation" and type_name in self._ontology._relation_types:
+        elif change.kind == "relation" and type_name in self._ontology._relation_types:
             cls = self._ontology._relation_types[type_name]
             data = {
                 **fields,
-                "left_key": change.get("left_key", ""),
-                "right_key": change.get("right_key", ""),
+                "left_key": change.left_key,
+                "right_key": change.right_key,
             }
-            ik = change.get("instance_key", "")
+            ik = change.instance_key
             if ik and cls._instance_key_field:
                 data[cls._instance_key_field] = ik
             obj = cls(**data)
             obj.__onto_meta__ = Meta(
-                commit_id=change["commit_id"],
+                commit_id=change.commit_id,
                 type_name=type_name,
-                left_key=change.get("left_key"),
-                right_key=change.get("right_key"),
+                left_key=change.left_key,
+                right_key=change.right_key,
                 instance_key=ik if ik else None,
             )
             return obj
@@ -1334,149 +1680,101 @@ class Session:
         root_event_id: str,
         chain_depth: int,
         authoring_handler_ids: set[str],
-        dispatch_log: set[tuple[str, int, str, str | tuple[str, str, str]]],
+        dispatch_log: _DispatchLog,
         _retry: int = 0,
     ) -> int | None:
-        max_retries = 3
-
-        if not self._ontology.repo.acquire_lock(self._ontology._runtime_id, timeout_ms=5000):
-            raise LockContentionError(5000)
-
+        max_retries = len(_HEAD_RETRY_BACKOFF_S)
+        ontology = self._ontology
+        repo = ontology.repo
+        runtime_id = ontology._runtime_id
+
+        # The outermost apply holds the write lock until its ON_COMMIT chain has run;
+        # applies from chained handlers only renew the lease.
+        outermost = ontology._write_lock_depth == 0
+        if outermost:
+            if not repo.acquire_lock(runtime_id, timeout_ms=5000):
+                raise LockContentionError(5000)
+        elif not repo.renew_lock(runtime_id):
+            raise LeaseExpiredError()
+        ontology._write_lock_depth += 1
         try:
-            current_head = self._ontology.repo.get_head_commit_id()
-            if current_head != snapshot_commit_id:
-                self._ontology.repo.release_lock(self._ontology._runtime_id)
-                if _retry >= max_retries:
-                    raise HeadMismatchError(max_retries)
-                time.sleep(0.01 * (2**_retry) + random.uniform(0, 0.01))
-                return self._apply_intents(
+            current_head = repo.get_head_commit_id()
+            if current_head == snapshot_commit_id:
+                return self._commit_and_dispatch(
                     intents,
                     commit_meta,
-                    current_head,
                     root_event_id,
                     chain_depth,
                     authoring_handler_ids,
                     dispatch_log,
-                    _retry + 1,
                 )
+        finally:
+            ontology._write_lock_depth -= 1
+            if outermost:
+                try:
+                    repo.release_lock(runtime_id)
+                except Exception:
+                    pass
 
-            changes: list[dict[str, Any]] = []
+        if _retry >= max_retries:
+            raise HeadMismatchError(max_retries)
+        time.sleep(_HEAD_RETRY_BACKOFF_S[_retry] + random.random() * 0.01)
+        return self._apply_intents(
+            intents,
+            commit_meta,
+            current_head,
+            root_event_id,
+            chain_depth,
+            authoring_handler_ids,
+            dispatch_log,
+            _retry + 1,
+        )
 
-            for intent in intents:
-                obj = intent.obj
-                if isinstance(obj, Entity):
-                    change = self._compute_entity_delta(obj)
-                    if change:
-                        changes.append(change)
-                elif isinstance(obj, Relation):
-                    change = self._compute_relation_delta(obj)
-                    if change:
-                        changes.append(change)
+    def _commit_and_dispatch(
+        self,
+        intents: list[Intent],
+        commit_meta: dict[str, str],
+        root_event_id: str,
+        chain_depth: int,
+        authoring_handler_ids: set[str],
+        dispatch_log: _DispatchLog,
+    ) -> int | None:
+        """Write one commit and run its ON_COMMIT chain. Caller holds the write lock."""
+        ontology = self._ontology
+        repo = ontology.repo
+        try:
+            changes = ontology._compute_changes(
+                intent.obj for intent in intents if isinstance(intent.obj, (Entity, Relation))
+            )
 
             if not changes:
-                self._ontology.repo.release_lock(self._ontology._runtime_id)
                 return None
 
-            self._ontology._assert_no_schema_drift(changes)
+            ontology._assert_no_schema_drift(changes)
 
-            commit_id = self._ontology.repo.create_commit(commit_meta if commit_meta else None)
+            commit_id = repo.create_commit(commit_meta if commit_meta else None)
 
-            for change in changes:
-                svid = self._ontology._schema_version_ids.get(change["type_name"])
-                if change["kind"] == "entity":
-                    self._ontology.repo.insert_entity(
-                        change["type_name"],
-                        change["key"],
-                        change["fields"],
-                        commit_id,
-                        schema_version_id=svid,
-                    )
-                elif change["kind"] == "relation":
-                    self._ontology.repo.insert_relation(
-                        change["type_name"],
-                        change["left_key"],
-                        change["right_key"],
-                        change["fields"],
-                        commit_id,
-                        schema_version_id=svid,
-                        instance_key=change.get("instance_key", ""),
-                    )
+            ontology._write_changes(changes, commit_id)
 
-            self._ontology.repo.commit_transaction()
+            repo.commit_transaction()
         except Exception:
             try:
-                self._ontology.repo.rollback_transaction()
+                repo.rollback_transaction()
             except Exception:
                 pass
             raise
-        finally:
-            try:
-                self._ontology.repo.release_lock(self._ontology._runtime_id)
-            except Exception:
-                pass
 
-        trigger_data = [{**change, "commit_id": commit_id} for change in changes]
+        # Legacy ON_COMMIT dispatch reads the commit id from each _Change record.
+        for change in changes:
+            change.commit_id = commit_id
 
         self._fire_event(
             "ON_COMMIT",
             self._handlers,  # Use session's handlers for chains
-            trigger_data=trigger_data,
+            trigger_data=changes,
             root_event_id=root_event_id,
             chain_depth=chain_depth + 1,
             authoring_handler_ids=authoring_handler_ids,
             dispatch_log=dispatch_log,
         )
         return commit_id
-
-    def _compute_entity_delta(self, entity: Entity) -> dict[str, Any] | None:
-        type_name = entity.__entity_name__
-        pk_field = entity._primary_key_field
-        key = getattr(entity, pk_field)
-        fields = entity.model_dump()
-
-        current = self._ontology.repo.get_latest_entity(type_name, str(key))
-        if current is None:
-            return {
-                "kind": "entity",
-                "type_name": type_name,
-                "key": str(key),
-                "fields": fields,
-            }
-        elif current["fields"] != fields:
-            return {
-                "kind": "entity",
-                "type_name": type_name,
-                "key": str(key),
-                "fields": fields,
-            }
-        return None
-
-    def _compute_relation_delta(self, relation: Relation[Any, Any]) -> dict[str, Any] | None:
-        type_name = relation.__relation_name__
-        left_key = relation.left_key
-        right_key = relation.right_key
-        instance_key = relation.instance_key
-        fields = relation.model_dump()
-
-        current = self._ontology.repo.get_latest_relation(
-            type_name, left_key, right_key, instance_key=instance_key
-        )
-        if current is None:
-            return {
-                "kind": "relation",
-                "type_name": type_name,
-                "left_key": left_key,
-                "right_key": right_key,
-                "instance_key": instance_key,
-                "fields": fields,
-            }
-        elif current["fields"] != fields:
-            return {
-                "kind": "relation",
-                "type_name": type_name,
-                "left_key": left_key,
-                "right_key": right_key,
-                "instance_key": instance_key,
-                "fields": fields,
-            }
-        return None
@@ -2,14 +2,18 @@
 
 from __future__ import annotations
 
+import bisect
+import calendar
+import functools
+import heapq
 import os
 import socket
-import time
+import threading
 import uuid
 from collections.abc import Callable
 from collections.abc import Iterable as ABCIterable
-from dataclasses import dataclass
-from datetime import datetime, timedelta, timezone
+from dataclasses import dataclass, field
+from datetime import date, datetime, timedelta, timezone
 from typing import Any
 
 from ontologia.config import OntologiaConfig
@@ -23,7 +27,7 @@ from ontologia.errors import (
 from ontologia.event_handlers import EventHandlerMeta, HandlerContext
 from ontologia.event_store import ClaimedEvent, EventStore, create_event_store
 from ontologia.events import Event, EventDeadLetter, Schedule
-from ontologia.intents import Intent
+from ontologia.intents import _BATCH_TYPES, _INTENT_TYPES, Intent
 from ontologia.query import QueryBuilder
 from ontologia.runtime import Ontology
 from ontologia.runtime import Session as LegacySession
@@ -31,22 +35,51 @@ from ontologia.storage import parse_storage_target
 from ontologia.types import Entity, Relation
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class _HandlerEntry:
     func: Callable[[HandlerContext[Any]], None]
     meta: EventHandlerMeta
 
 
-@dataclass(frozen=True)
-class _CronSpec:
-    minutes: set[int]
-    hours: set[int]
-    days: set[int]
-    months: set[int]
-    weekdays: set[int]
+def _bitmask(values: ABCIterable[int]) -> int:
+    mask = 0
+    for value in values:
+        mask |= 1 << value
+    return mask
 
 
-@dataclass
+@dataclass(frozen=True, slots=True)
+class _CronSpec:
+    minutes: frozenset[int]
+    hours: frozenset[int]
+    days: frozenset[int]
+    months: frozenset[int]
+    weekdays: frozenset[int]
+    # Sorted copies used by _next_fire to jump straight to the next admissible value.
+    minutes_sorted: tuple[int, ...] = field(init=False, repr=False, compare=False)
+    hours_sorted: tuple[int, ...] = field(init=False, repr=False, compare=False)
+    days_sorted: tuple[int, ...] = field(init=False, repr=False, compare=False)
+    months_sorted: tuple[int, ...] = field(init=False, repr=False, compare=False)
+    # Bit n set when value n is allowed; weekday bit 0 also covers cron's 7 (Sunday).
+    minutes_mask: int = field(init=False, repr=False, compare=False)
+    hours_mask: int = field(init=False, repr=False, compare=False)
+    days_mask: int = field(init=False, repr=False, compare=False)
+    months_mask: int = field(init=False, repr=False, compare=False)
+    weekdays_mask: int = field(init=False, repr=False, compare=False)
+
+    def __post_init__(self) -> None:
+        object.__setattr__(self, "minutes_sorted", tuple(sorted(self.minutes)))
+        object.__setattr__(self, "hours_sorted", tuple(sorted(self.hours)))
+        object.__setattr__(self, "days_sorted", tuple(sorted(self.days)))
+        object.__setattr__(self, "months_sorted", tuple(sorted(self.months)))
+        object.__setattr__(self, "minutes_mask", _bitmask(self.minutes))
+        object.__setattr__(self, "hours_mask", _bitmask(self.hours))
+        object.__setattr__(self, "days_mask", _bitmask(self.days))
+        object.__setattr__(self, "months_mask", _bitmask(self.months))
+        object.__setattr__(self, "weekdays_mask", _bitmask(d % 7 for d in self.weekdays))
+
+
+@dataclass(slots=True)
 class _ScheduleState:
     schedule: Schedule
     cron: _CronSpec
@@ -57,7 +90,27 @@ def _now() -> datetime:
     return datetime.now(timezone.utc)
 
 
-def _parse_cron_field(field: str, minimum: int, maximum: int) -> set[int]:
+def _coalesce_intents(intents: list[Intent]) -> list[Intent]:
+    """Keep the last intent per logical row, in first-seen row order."""
+    latest: dict[tuple[str, ...], Intent] = {}
+    for intent in intents:
+        obj = intent.obj
+        if isinstance(obj, Entity):
+            key = ("entity", obj.__entity_name__, str(getattr(obj, obj._primary_key_field)))
+        else:
+            key = (
+                "relation",
+                obj.__relation_name__,
+                obj.left_key,
+                obj.right_key,
+                obj.instance_key,
+            )
+        latest[key] = intent
+    return list(latest.values())
+
+
+@functools.lru_cache(maxsize=1024)
+def _parse_cron_field(field: str, minimum: int, maximum: int) -> frozenset[int]:
     values: set[int] = set()
     parts = field.split(",")
     for part in parts:
@@ -85,10 +138,12 @@ def _parse_cron_field(field: str, minimum: int, maximum: int) -> set[int]:
         if value < minimum or value > maximum:
             raise ValueError(f"cron value out of bounds '{token}'")
         values.add(value)
-    return values
+    return frozenset(values)
 
 
+@functools.lru_cache(maxsize=512)
 def _compile_cron(expr: str) -> _CronSpec:
+    """Parse a 5-field cron expression. Specs are immutable and shared across callers."""
     parts = expr.split()
     if len(parts) != 5:
         raise ValueError(f"cron expression must have 5 fields: '{expr}'")
@@ -102,26 +157,66 @@ def _compile_cron(expr: str) -> _CronSpec:
     )
 
 
-def _cron_matches(spec: _CronSpec, dt: datetime) -> bool:
-    # Cron weekday: 0/7=Sunday, 1=Monday, ..., 6=Saturday.
-    cron_weekday = (dt.weekday() + 1) % 7
-    weekday_match = cron_weekday in spec.weekdays or (cron_weekday == 0 and 7 in spec.weekdays)
-
-    return (
-        dt.minute in spec.minutes
-        and dt.hour in spec.hours
-        and dt.day in spec.days
-        and dt.month in spec.months
-        and weekday_match
-    )
+def _next_at_or_after(values: tuple[int, ...], current: int) -> int | None:
+    idx = bisect.bisect_left(values, current)
+    return values[idx] if idx < len(values) else None
 
 
 def _next_fire(spec: _CronSpec, after: datetime) -> datetime:
-    candidate = after.replace(second=0, microsecond=0) + timedelta(minutes=1)
-    for _ in range(0, 366 * 24 * 60):
-        if _cron_matches(spec, candidate):
-            return candidate
-        candidate += timedelta(minutes=1)
+    """Return the first minute strictly after ``after`` that matches ``spec``.
+
+    Advances month, day, hour and minute directly to their next admissible values
+    instead of testing every minute. Day-of-month and weekday must both match.
+    """
+    start = after.replace(second=0, microsecond=0) + timedelta(minutes=1)
+    limit = start + timedelta(minutes=366 * 24 * 60)
+    year, month, day, hour, minute = start.year, start.month, start.day, start.hour, start.minute
+
+    while year <= limit.year:
+        next_month = _next_at_or_after(spec.months_sorted, month)
+        if next_month is None:
+            year, month, day, hour, minute = year + 1, 1, 1, 0, 0
+            continue
+        if next_month != month:
+            month, day, hour, minute = next_month, 1, 0, 0
+
+        days_in_month = calendar.monthrange(year, month)[1]
+        next_day = _next_at_or_after(spec.days_sorted, day)
+        while next_day is not None and next_day <= days_in_month:
+            if (spec.weekdays_mask >> ((date(year, month, next_day).weekday() + 1) % 7)) & 1:
+                break
+            next_day = _next_at_or_after(spec.days_sorted, next_day + 1)
+        if next_day is None or next_day > days_in_month:
+            year, month = (year + 1, 1) if month == 12 else (year, month + 1)
+            day, hour, minute = 1, 0, 0
+            continue
+        if next_day != day:
+            day, hour, minute = next_day, 0, 0
+
+        next_hour = _next_at_or_after(spec.hours_sorted, hour)
+        if next_hour is None:
+            day, hour, minute = day + 1, 0, 0
+            if day > days_in_month:
+                year, month = (year + 1, 1) if month == 12 else (year, month + 1)
+                day = 1
+            continue
+        if next_hour != hour:
+            hour, minute = next_hour, 0
+
+        next_minute = _next_at_or_after(spec.minutes_sorted, minute)
+        if next_minute is None:
+            hour, minute = hour + 1, 0
+            if hour > 23:
+                day, hour = day + 1, 0
+                if day > days_in_month:
+                    year, month = (year + 1, 1) if month == 12 else (year, month + 1)
+                    day = 1
+            continue
+
+        candidate = datetime(year, month, day, hour, next_minute, tzinfo=after.tzinfo)
+        if candidate >= limit:
+            break
+        return candidate
     raise ValueError("unable to find next cron trigger within one year")
 
 
@@ -161,6 +256,8 @@ class Session:
         )
 
         self._repo = self._ontology.repo
+        # SQLite enqueues commit events inside the write transaction; other backends after it.
+        self._backend_is_sqlite = str(self._repo.storage_info().get("backend", "")) == "sqlite"
         self._event_store: EventStore = create_event_store(
             datastore_uri=self.datastore_uri,
             repo=self._repo,
@@ -169,6 +266,12 @@ class Session:
 
         self._intents: list[Intent] = []
         self._stop_requested = False
+        # Set when this session enqueues work so run() can skip the rest of its poll wait.
+        self._wake = threading.Event()
+        # Validated, priority-sorted entries for the most recent run() handler list. The
+        # key holds the handler objects themselves, so a hit means the very same functions.
+        self._handler_cache_key: tuple[Callable[..., Any], ...] | None = None
+        self._handler_cache: list[_HandlerEntry] = []
         self._legacy_session: LegacySession | None = None
 
         metadata = {
@@ -230,6 +333,7 @@ class Session:
 
     def stop(self) -> None:
         self._stop_requested = True
+        self._wake.set()
 
     def validate(self) -> None:
         """Validate code-defined schemas against stored schemas."""
@@ -247,11 +351,14 @@ class Session:
             self._intents.append(Intent(obj))
             return
 
-        if isinstance(obj, ABCIterable) and not isinstance(obj, (str, bytes)):
+        if isinstance(obj, _BATCH_TYPES) or (
+            isinstance(obj, ABCIterable) and not isinstance(obj, (str, bytes))
+        ):
+            append = self._intents.append
             for item in obj:
-                if not isinstance(item, (Entity, Relation)):
+                if not isinstance(item, _INTENT_TYPES):
                     raise TypeError(f"Expected Entity or Relation, got {type(item)}")
-                self._intents.append(Intent(item))
+                append(Intent(item))
             return
 
         raise TypeError(
@@ -320,43 +427,6 @@ class Session:
         event.chain_depth = chain_depth
         return event
 
-    def _compute_entity_delta(self, entity: Entity) -> dict[str, Any] | None:
-        type_name = entity.__entity_name__
-        pk_field = entity._primary_key_field
-        key = getattr(entity, pk_field)
-        fields = entity.model_dump()
-
-        current = self._repo.get_latest_entity(type_name, str(key))
-        if current is None or current["fields"] != fields:
-            return {
-                "kind": "entity",
-                "type_name": type_name,
-                "key": str(key),
-                "fields": fields,
-            }
-        return None
-
-    def _compute_relation_delta(self, relation: Relation[Any, Any]) -> dict[str, Any] | None:
-        type_name = relation.__relation_name__
-        left_key = relation.left_key
-        right_key = relation.right_key
-        instance_key = relation.instance_key
-        fields = relation.model_dump()
-
-        current = self._repo.get_latest_relation(
-            type_name, left_key, right_key, instance_key=instance_key
-        )
-        if current is None or current["fields"] != fields:
-            return {
-                "kind": "relation",
-                "type_name": type_name,
-                "left_key": left_key,
-                "right_key": right_key,
-                "instance_key": instance_key,
-                "fields": fields,
-            }
-        return None
-
     def _commit_internal(
         self,
         *,
@@ -374,56 +444,41 @@ class Session:
         if len(self._intents) > self._config.max_batch_size:
             raise BatchSizeExceededError(len(self._intents), self._config.max_batch_size)
 
-        intents = list(self._intents)
-        self._intents.clear()
+        intents, self._intents = self._intents, []
+        # Diff against current state before taking the lock so the critical section only
+        # covers writes. The head commit pins the snapshot the diff was computed against.
+        pending = self._ontology._prepare_changes(
+            intent.obj for intent in _coalesce_intents(intents)
+        )
+        read_head = self._repo.get_head_commit_id() if pending else None
+        changes = self._ontology._filter_changed(pending)
 
         timeout_ms = self._config.s3_lock_timeout_ms
         if not self._repo.acquire_lock(self.session_id, timeout_ms=timeout_ms):
             raise LockContentionError(timeout_ms)
 
-        changes: list[dict[str, Any]] = []
-        for intent in intents:
-            obj = intent.obj
-            if isinstance(obj, Entity):
-                change = self._compute_entity_delta(obj)
-            else:
-                change = self._compute_relation_delta(obj)
-            if change is not None:
-                changes.append(change)
+        try:
+            if pending and self._repo.get_head_commit_id() != read_head:
+                # Another writer committed in between; the diff may be stale.
+                changes = self._ontology._filter_changed(pending)
+        except Exception:
+            self._repo.release_lock(self.session_id)
+            raise
 
         metadata = {"namespace": self.namespace}
         metadata.update(commit_meta)
 
         commit_id: int | None = None
-        backend = str(self._repo.storage_info().get("backend", ""))
 
         try:
             self._repo.begin_transaction()
             if changes:
                 self._ontology._assert_no_schema_drift(changes)
-                commit_id = self._repo.create_commit(metadata)
-                for change in changes:
-                    svid = self._ontology._schema_version_ids.get(change["type_name"])
-                    if change["kind"] == "entity":
-                        self._repo.insert_entity(
-                            change["type_name"],
-                            change["key"],
-                            change["fields"],
-                            commit_id,
-                            schema_version_id=svid,
-                        )
-                    else:
-                        self._repo.insert_relation(
-                            change["type_name"],
-                            change["left_key"],
-                            change["right_key"],
-                            change["fields"],
-                            commit_id,
-                            schema_version_id=svid,
-                            instance_key=change.get("instance_key", ""),
-                        )
+                new_commit_id = self._repo.create_commit(metadata)
+                self._ontology._write_changes(changes, new_commit_id)
+                commit_id = new_commit_id
 
-            if event is not None and backend == "sqlite":
+            if event is not None and self._backend_is_sqlite:
                 prepared = self._prepare_event(event, parent_event=parent_event)
                 self._event_store.enqueue(prepared, self.namespace)
 
@@ -437,16 +492,27 @@ class Session:
             except Exception:
                 pass
 
-        if event is not None and backend != "sqlite":
+        if event is not None and not self._backend_is_sqlite:
             prepared = self._prepare_event(event, parent_event=parent_event)
             self._event_store.enqueue(prepared, self.namespace)
 
+        if event is not None:
+            self._wake.set()
         return commit_id
 
     def _build_handlers(
         self,
         handlers: list[Callable[..., Any]],
     ) -> list[_HandlerEntry]:
+        cache_key = tuple(handlers)
+        cached_key = self._handler_cache_key
+        if (
+            cached_key is not None
+            and len(cached_key) == len(cache_key)
+            and all(a is b for a, b in zip(cached_key, cache_key))
+        ):
+            return self._handler_cache
+
         entries: list[_HandlerEntry] = []
         seen: set[str] = set()
 
@@ -468,17 +534,24 @@ class Session:
             entries.append(_HandlerEntry(func=func, meta=meta))
 
         entries.sort(key=lambda e: (-e.meta.priority, e.meta.handler_id))
+        self._handler_cache_key = cache_key
+        self._handler_cache = entries
         return entries
 
     def _clone_event(self, event: Event) -> Event:
-        cloned = event.__class__.model_validate(event.model_dump())
-        cloned.priority = event.priority
+        cloned = event.model_copy(deep=True)
+        cloned.id = None
+        cloned.created_at = None
+        cloned.root_event_id = None
+        cloned.chain_depth = 0
         return cloned
 
     def _flush_buffered_events(self, buffered: list[Event], parent_event: Event) -> None:
-        for out_evt in buffered:
-            prepared = self._prepare_event(out_evt, parent_event=parent_event)
-            self._event_store.enqueue(prepared, self.namespace)
+        if not buffered:
+            return
+        prepared = [self._prepare_event(out_evt, parent_event=parent_event) for out_evt in buffered]
+        self._event_store.enqueue_many(prepared, self.namespace)
+        self._wake.set()
 
     def run(
         self,
@@ -526,79 +599,99 @@ class Session:
         for entry in handler_entries:
             event_registry[entry.meta.event_cls.__event_type__] = entry.meta.event_cls
 
-        schedule_states: list[_ScheduleState] = []
-        for schedule in schedules or []:
+        # Min-heap of (next_fire, seq, state); seq breaks ties without comparing states.
+        schedule_heap: list[tuple[datetime, int, _ScheduleState]] = []
+        for seq, schedule in enumerate(schedules or []):
             spec = _compile_cron(schedule.cron)
-            schedule_states.append(
-                _ScheduleState(
-                    schedule=schedule,
-                    cron=spec,
-                    next_fire=_next_fire(spec, _now()),
-                )
+            next_fire = _next_fire(spec, _now())
+            schedule_heap.append(
+                (next_fire, seq, _ScheduleState(schedule=schedule, cron=spec, next_fire=next_fire))
             )
             event_registry[schedule.event.__class__.__event_type__] = schedule.event.__class__
+        heapq.heapify(schedule_heap)
 
         self._event_store.register_session(self.session_id, self.namespace, self._instance_metadata)
 
         heartbeat_interval = timedelta(milliseconds=self._config.session_heartbeat_interval_ms)
         poll_interval = self._config.event_poll_interval_ms / 1000.0
+        max_per_iteration = self._config.max_events_per_iteration
+        event_claim_limit = self._config.event_claim_limit
+        claim_lease_ms = self._config.event_claim_lease_ms
+        # Per-handler values that stay fixed for the whole run: (func, handler_id, event_types).
+        handler_loop_info = [
+            (entry.func, entry.meta.handler_id, [entry.meta.event_cls.__event_type__])
+            for entry in handler_entries
+        ]
         next_heartbeat = _now()
 
         self._stop_requested = False
 
         # Track outstanding claims so they can be released on graceful shutdown.
-        outstanding_claims: list[tuple[str, str]] = []  # (handler_id, event_id)
+        outstanding_claims: dict[str, str] = {}  # event_id -> handler_id
 
         try:
+            # Local bindings for names used on every pass of the loop.
+            now_fn = _now
+            next_fire_fn = _next_fire
+            store = self._event_store
+            namespace = self.namespace
+            session_id = self.session_id
+            wake = self._wake
             iterations = 0
             while not self._stop_requested:
                 if max_iterations is not None and iterations >= max_iterations:
                     break
-                now = _now()
+                # Enqueues from here on wake the wait at the end of this iteration.
+                wake.clear()
+                # A stop() racing the clear above has already set the flag.
+                if self._stop_requested:
+                    break
+                now = now_fn()
                 if now >= next_heartbeat:
-                    self._event_store.heartbeat(self.session_id, self.namespace)
+                    store.heartbeat(session_id, namespace)
                     next_heartbeat = now + heartbeat_interval
 
-                for state in schedule_states:
-                    while now >= state.next_fire:
-                        evt = self._clone_event(state.schedule.event)
-                        prepared = self._prepare_event(evt, parent_event=None)
-                        self._event_store.enqueue(prepared, self.namespace)
-                        state.next_fire = _next_fire(state.cron, state.next_fire)
+                while schedule_heap and schedule_heap[0][0] <= now:
+                    _, seq, state = schedule_heap[0]
+                    evt = self._clone_event(state.schedule.event)
+                    prepared = self._prepare_event(evt, parent_event=None)
+                    store.enqueue(prepared, namespace)
+                    state.next_fire = next_fire_fn(state.cron, state.next_fire)
+                    heapq.heapreplace(schedule_heap, (state.next_fire, seq, state))
 
                 processed = 0
-                for entry in handler_entries:
-                    if processed >= self._config.max_events_per_iteration:
+                for func, handler_id, event_types in handler_loop_info:
+                    if processed >= max_per_iteration:
                         break
 
-                    remaining = self._config.max_events_per_iteration - processed
-                    claim_limit = min(self._config.event_claim_limit, remaining)
+                    remaining = max_per_iteration - processed
+                    claim_limit = min(event_claim_limit, remaining)
 
-                    claimed: list[ClaimedEvent] = self._event_store.claim(
-                        self.namespace,
-                        entry.meta.handler_id,
-                        self.session_id,
-                        [entry.meta.event_cls.__event_type__],
+                    claimed: list[ClaimedEvent] = store.claim(
+                        namespace,
+                        handler_id,
+                        session_id,
+                        event_types,
                         claim_limit,
-                        self._config.event_claim_lease_ms,
+                        claim_lease_ms,
                         event_registry,
                     )
 
                     for claimed_event in claimed:
-                        if processed >= self._config.max_events_per_iteration:
+                        if processed >= max_per_iteration:
                             break
 
                         event = claimed_event.event
                         if event.id is None:
-                            self._event_store.release(
-                                entry.meta.handler_id,
+                            store.release(
+                                handler_id,
                                 "",
-                                self.namespace,
+                                namespace,
                                 error="claimed event missing id",
                             )
                             continue
 
-                        outstanding_claims.append((entry.meta.handler_id, event.id))
+                        outstanding_claims[event.id] = handler_id
 
                         self._intents.clear()
                         ctx = HandlerContext(
@@ -608,14 +701,14 @@ class Session:
                         )
 
                         try:
-                            entry.func(ctx)
+                            func(ctx)
                         except Exception as e:
                             self._intents.clear()
-                            outstanding_claims.pop()
-                            self._event_store.release(
-                                entry.meta.handler_id,
+                            outstanding_claims.pop(event.id, None)
+                            store.release(
+                                handler_id,
                                 event.id,
-                                self.namespace,
+                                namespace,
                                 error=str(e),
                             )
                             processed += 1
@@ -626,10 +719,10 @@ class Session:
                         # cause the handler to be retried (which could duplicate
                         # events already enqueued via ctx.commit(event=...)).
                         try:
-                            self._event_store.ack(entry.meta.handler_id, event.id, self.namespace)
-                            outstanding_claims.pop()
+                            store.ack(handler_id, event.id, namespace)
+                            outstanding_claims.pop(event.id, None)
                         except Exception:
-                            outstanding_claims.pop()
+                            outstanding_claims.pop(event.id, None)
                             # Ack failed — the claim will expire and the handler
                             # may be retried.  Skip flush to avoid partial state.
                             processed += 1
@@ -646,10 +739,10 @@ class Session:
 
                         processed += 1
 
-                time.sleep(poll_interval)
+                wake.wait(poll_interval)
                 iterations += 1
         except KeyboardInterrupt:
-            for handler_id, event_id in outstanding_claims:
+            for event_id, handler_id in outstanding_claims.items():
                 try:
                     self._event_store.release(
                         handler_id,
@@ -2,6 +2,7 @@
 
 from __future__ import annotations
 
+import functools
 import hashlib
 import json
 import os
@@ -22,6 +23,67 @@ from ontologia.filters import (
     FilterExpression,
     LogicalExpression,
 )
+from ontologia.json_utils import loads_json
+
+# Size of sqlite3's per-connection prepared-statement cache, which is keyed by SQL text.
+# Above the stdlib default of 128 so query shapes from filters and history reads do not
+# evict the point reads and inserts used on every commit. SQLite re-prepares cached
+# statements itself after schema changes.
+_SQLITE_STATEMENT_CACHE_SIZE = 512
+
+
+def _dumps_fields(fields: dict[str, Any]) -> str:
+    """Serialize a history row's fields compactly (no whitespace after separators)."""
+    return json.dumps(fields, separators=(",", ":"))
+
+
+def _paging_clause(limit: int | None, offset: int | None, params: list[Any]) -> str:
+    """Render LIMIT/OFFSET with bound values so paged and unpaged reads share one SQL text.
+
+    SQLite treats a negative LIMIT as unbounded.
+    """
+    params.append(-1 if limit is None else limit)
+    params.append(0 if offset is None else offset)
+    return " LIMIT ? OFFSET ?"
+
+
+_FILTER_SQL_CACHE_SIZE = 1024
+_filter_sql_cache: dict[tuple[Any, ...], str] = {}
+
+
+def _filter_shape(expr: FilterExpression, values: list[Any]) -> tuple[Any, ...] | None:
+    """Return a hashable shape of ``expr`` (values excluded) and collect its bound values.
+
+    The shape is the pre-order node list, with child counts on logical nodes. Values
+    are appended in the order the compiler binds them. Returns None for expression
+    types the compiler does not know, so the caller skips the cache.
+    """
+    shape: list[tuple[Any, ...]] = []
+    stack: list[FilterExpression] = [expr]
+    while stack:
+        node = stack.pop()
+        if isinstance(node, ExistsComparisonExpression):
+            if node.op == "IN":
+                values.extend(node.value)
+                shape.append(("E", node.list_field_path, node.item_path, "IN", len(node.value)))
+                continue
+            if node.op not in ("IS_NULL", "IS_NOT_NULL"):
+                values.append(node.value)
+            shape.append(("E", node.list_field_path, node.item_path, node.op))
+        elif isinstance(node, ComparisonExpression):
+            if node.op == "IN":
+                values.extend(node.value)
+                shape.append(("C", node.field_path, "IN", len(node.value)))
+                continue
+            if node.op not in ("IS_NULL", "IS_NOT_NULL"):
+                values.append(node.value)
+            shape.append(("C", node.field_path, node.op))
+        elif isinstance(node, LogicalExpression):
+            shape.append(("L", node.op, len(node.children)))
+            stack.extend(reversed(node.children))
+        else:
+            return None
+    return tuple(shape)
 
 
 def _compile_filter(
@@ -32,41 +94,84 @@ def _compile_filter(
     left_entity_type: str | None = None,
     right_entity_type: str | None = None,
 ) -> str:
-    """Compile a FilterExpression tree into a SQL WHERE clause fragment."""
-    if isinstance(expr, ExistsComparisonExpression):
-        return _compile_exists(expr, params, table_alias=table_alias)
-    elif isinstance(expr, ComparisonExpression):
-        return _compile_comparison(
+    """Compile a FilterExpression tree into a SQL WHERE clause fragment.
+
+    The SQL only depends on the expression's shape, so it is cached per shape and
+    compile options; a repeat of the same filter with new values just binds them.
+    """
+    values: list[Any] = []
+    shape = _filter_shape(expr, values)
+    if shape is None:
+        return _compile_filter_tree(
             expr,
             params,
             table_alias=table_alias,
             left_entity_type=left_entity_type,
             right_entity_type=right_entity_type,
         )
-    elif isinstance(expr, LogicalExpression):
-        if expr.op == "NOT":
-            child_sql = _compile_filter(
-                expr.children[0],
-                params,
-                table_alias=table_alias,
-                left_entity_type=left_entity_type,
-                right_entity_type=right_entity_type,
-            )
-            return f"NOT ({child_sql})"
-        elif expr.op in ("AND", "OR"):
-            parts = [
-                _compile_filter(
-                    c,
+    key = (shape, table_alias, left_entity_type, right_entity_type)
+    sql = _filter_sql_cache.get(key)
+    if sql is None:
+        sql = _compile_filter_tree(
+            expr,
+            [],
+            table_alias=table_alias,
+            left_entity_type=left_entity_type,
+            right_entity_type=right_entity_type,
+        )
+        if len(_filter_sql_cache) >= _FILTER_SQL_CACHE_SIZE:
+            _filter_sql_cache.clear()
+        _filter_sql_cache[key] = sql
+    params.extend(values)
+    return sql
+
+
+def _compile_filter_tree(
+    expr: FilterExpression,
+    params: list[Any],
+    *,
+    table_alias: str = "",
+    left_entity_type: str | None = None,
+    right_entity_type: str | None = None,
+) -> str:
+    """Compile a FilterExpression tree, appending bound values to params.
+
+    Walks iteratively and joins the fragments once, so deep trees neither hit the
+    recursion limit nor re-copy their SQL at every level.
+    """
+    parts: list[str] = []
+    # Items are nodes to compile or literal SQL tokens, popped in output order.
+    stack: list[FilterExpression | str] = [expr]
+    while stack:
+        item = stack.pop()
+        if isinstance(item, str):
+            parts.append(item)
+        elif isinstance(item, ExistsComparisonExpression):
+            parts.append(_compile_exists(item, params, table_alias=table_alias))
+        elif isinstance(item, ComparisonExpression):
+            parts.append(
+                _compile_comparison(
+                    item,
                     params,
                     table_alias=table_alias,
                     left_entity_type=left_entity_type,
                     right_entity_type=right_entity_type,
                 )
-                for c in expr.children
-            ]
-            joiner = f" {expr.op} "
-            return f"({joiner.join(parts)})"
-    raise ValueError(f"Unknown filter expression type: {type(expr)}")
+            )
+        elif isinstance(item, LogicalExpression) and item.op == "NOT":
+            stack.extend((")", item.children[0]))
+            parts.append("NOT (")
+        elif isinstance(item, LogicalExpression) and item.op in ("AND", "OR"):
+            joiner = f" {item.op} "
+            stack.append(")")
+            for i in range(len(item.children) - 1, -1, -1):
+                stack.append(item.children[i])
+                if i:
+                    stack.append(joiner)
+            parts.append("(")
+        else:
+            raise ValueError(f"Unknown filter expression type: {type(item)}")
+    return "".join(parts)
 
 
 def _compile_comparison(
@@ -157,22 +262,33 @@ def _compile_exists(
     )
 
 
-def _needs_endpoint_join(expr: FilterExpression | None, prefix: str) -> bool:
-    """Check if a filter expression references endpoint fields."""
-    if expr is None:
-        return False
-    if isinstance(expr, ComparisonExpression):
-        return expr.field_path.startswith(f"{prefix}.")
-    if isinstance(expr, ExistsComparisonExpression):
-        return expr.list_field_path.startswith(f"{prefix}.")
-    if isinstance(expr, LogicalExpression):
-        return any(_needs_endpoint_join(c, prefix) for c in expr.children)
-    return False
+def _filter_prefixes(expr: FilterExpression | None) -> frozenset[str]:
+    """Collect the leading path segments ("$", "left", "right") a filter references."""
+    prefixes: set[str] = set()
+    stack = [expr] if expr is not None else []
+    while stack:
+        node = stack.pop()
+        if isinstance(node, ComparisonExpression):
+            prefixes.add(node.field_path.split(".", 1)[0])
+        elif isinstance(node, ExistsComparisonExpression):
+            prefixes.add(node.list_field_path.split(".", 1)[0])
+        elif isinstance(node, LogicalExpression):
+            stack.extend(node.children)
+    return frozenset(prefixes)
 
 
+@functools.lru_cache(maxsize=512)
 def _schema_hash(schema_json: str) -> str:
     """Compute deterministic SHA-256 hash of schema JSON."""
-    canonical = json.dumps(json.loads(schema_json), sort_keys=True, separators=(",", ":"))
+    return _canonical_schema_hash(json.loads(schema_json))
+
+
+def _canonical_schema_hash(schema: dict[str, Any]) -> str:
+    """Hash a JSON-native schema dict; equal to ``_schema_hash(json.dumps(schema))``.
+
+    Skips the serialize/parse round-trip when the caller already holds the dict.
+    """
+    canonical = json.dumps(schema, sort_keys=True, separators=(",", ":"))
     return hashlib.sha256(canonical.encode()).hexdigest()
 
 
@@ -199,6 +315,27 @@ def parse_storage_target(
         return StorageTarget(backend="sqlite", uri=f"sqlite:///{db_path}", db_path=db_path)
 
     assert storage_uri is not None
+    target = _parse_storage_uri(storage_uri)
+    if db_path is None:
+        return target
+
+    if target.backend == "s3":
+        raise StorageBackendError(
+            "parse_storage_uri",
+            "db_path cannot be provided for s3 storage targets",
+        )
+    assert target.db_path is not None
+    if os.path.abspath(db_path) != os.path.abspath(target.db_path):
+        raise StorageBackendError(
+            "parse_storage_uri",
+            f"Conflicting db_path '{db_path}' and storage_uri '{storage_uri}'",
+        )
+    return target
+
+
+@functools.lru_cache(maxsize=256)
+def _parse_storage_uri(storage_uri: str) -> StorageTarget:
+    """Parse a storage URI on its own; cached since StorageTarget is immutable."""
     parsed = urlparse(storage_uri)
 
     if parsed.scheme == "sqlite":
@@ -212,11 +349,6 @@ def parse_storage_target(
             sqlite_path = ":memory:"
         if not sqlite_path:
             raise StorageBackendError("parse_storage_uri", f"Invalid sqlite URI: {storage_uri}")
-        if db_path is not None and os.path.abspath(db_path) != os.path.abspath(sqlite_path):
-            raise StorageBackendError(
-                "parse_storage_uri",
-                f"Conflicting db_path '{db_path}' and storage_uri '{storage_uri}'",
-            )
         return StorageTarget(backend="sqlite", uri=storage_uri, db_path=sqlite_path)
 
     if parsed.scheme == "s3":
@@ -224,11 +356,6 @@ def parse_storage_target(
         prefix = parsed.path.lstrip("/").rstrip("/")
         if not bucket:
             raise StorageBackendError("parse_storage_uri", f"Invalid s3 URI: {storage_uri}")
-        if db_path is not None:
-            raise StorageBackendError(
-                "parse_storage_uri",
-                "db_path cannot be provided for s3 storage targets",
-            )
         return StorageTarget(backend="s3", uri=storage_uri, bucket=bucket, prefix=prefix)
 
     raise StorageBackendError(
@@ -258,6 +385,8 @@ class RepositoryProtocol(Protocol):
 
     def get_latest_entity(self, type_name: str, key: str) -> dict[str, Any] | None: ...
 
+    def get_latest_entities(self, type_name: str, keys: list[str]) -> dict[str, dict[str, Any]]: ...
+
     def insert_entity(
         self,
         type_name: str,
@@ -267,6 +396,14 @@ class RepositoryProtocol(Protocol):
         schema_version_id: int | None = None,
     ) -> None: ...
 
+    def insert_entities(
+        self,
+        type_name: str,
+        rows: list[tuple[str, dict[str, Any]]],
+        commit_id: int,
+        schema_version_id: int | None = None,
+    ) -> None: ...
+
     def query_entities(
         self,
         type_name: str,
@@ -313,6 +450,10 @@ class RepositoryProtocol(Protocol):
         self, type_name: str, left_key: str, right_key: str, instance_key: str = ""
     ) -> dict[str, Any] | None: ...
 
+    def get_latest_relations(
+        self, type_name: str, keys: list[tuple[str, str, str]]
+    ) -> dict[tuple[str, str, str], dict[str, Any]]: ...
+
     def insert_relation(
         self,
         type_name: str,
@@ -324,6 +465,14 @@ class RepositoryProtocol(Protocol):
         instance_key: str = "",
     ) -> None: ...
 
+    def insert_relations(
+        self,
+        type_name: str,
+        rows: list[tuple[str, str, str, dict[str, Any]]],
+        commit_id: int,
+        schema_version_id: int | None = None,
+    ) -> None: ...
+
     def query_relations(
         self,
         type_name: str,
@@ -401,6 +550,12 @@ class RepositoryProtocol(Protocol):
         self, type_kind: str, type_name: str
     ) -> dict[str, Any] | None: ...
 
+    def get_current_schema_versions(
+        self, keys: list[tuple[str, str]]
+    ) -> dict[tuple[str, str], dict[str, Any] | None]: ...
+
+    def get_schema_epoch(self) -> tuple[int, int] | None: ...
+
     def get_schema_version(
         self, type_kind: str, type_name: str, version_id: int
     ) -> dict[str, Any] | None: ...
@@ -453,12 +608,23 @@ class RepositoryProtocol(Protocol):
 class Repository:
     """SQLite-backed repository for entity and relation history."""
 
-    def __init__(self, db_path: str) -> None:
+    def __init__(self, db_path: str, config: OntologiaConfig | None = None) -> None:
+        cfg = config or OntologiaConfig()
         self.engine_version = "v1"
         self.db_path = db_path
-        self._conn = sqlite3.connect(db_path)
+        self._conn = sqlite3.connect(db_path, cached_statements=_SQLITE_STATEMENT_CACHE_SIZE)
         self._conn.execute("PRAGMA journal_mode=WAL")
         self._conn.execute("PRAGMA foreign_keys=ON")
+        # WAL keeps the database consistent under synchronous=NORMAL; only the last
+        # commits before a power loss can be lost, in exchange for no fsync per commit.
+        synchronous = cfg.sqlite_synchronous.upper()
+        if synchronous not in ("OFF", "NORMAL", "FULL", "EXTRA"):
+            raise ValueError(f"Invalid sqlite_synchronous: {cfg.sqlite_synchronous!r}")
+        self._conn.execute(f"PRAGMA synchronous={synchronous}")
+        self._conn.execute(f"PRAGMA cache_size={-int(cfg.sqlite_cache_size_kib)}")
+        self._conn.execute(f"PRAGMA mmap_size={int(cfg.sqlite_mmap_size_bytes)}")
+        self._conn.execute("PRAGMA temp_store=MEMORY")
+        self._covering_history_index = cfg.sqlite_covering_history_index
         self._last_query_diagnostics: dict[str, Any] | None = None
         self._create_tables()
 
@@ -482,6 +648,9 @@ class Repository:
             CREATE INDEX IF NOT EXISTS idx_entity_history_lookup
                 ON entity_history(entity_type, entity_key, commit_id DESC);
 
+            CREATE INDEX IF NOT EXISTS idx_entity_history_commit
+                ON entity_history(commit_id);
+
             CREATE TABLE IF NOT EXISTS relation_history (
                 id INTEGER PRIMARY KEY AUTOINCREMENT,
                 relation_type TEXT NOT NULL,
@@ -495,6 +664,9 @@ class Repository:
             CREATE INDEX IF NOT EXISTS idx_relation_history_lookup
                 ON relation_history(relation_type, left_key, right_key, commit_id DESC);
 
+            CREATE INDEX IF NOT EXISTS idx_relation_history_commit
+                ON relation_history(commit_id);
+
             CREATE TABLE IF NOT EXISTS schema_registry (
                 type_kind TEXT NOT NULL,
                 type_name TEXT NOT NULL,
@@ -523,23 +695,36 @@ class Repository:
             );
         """)
         self._conn.commit()
-        self._migrate_history_columns()
-        self._migrate_instance_key_column()
+        history_columns = self._history_columns()
+        self._migrate_history_columns(history_columns)
+        self._migrate_instance_key_column(history_columns["relation_history"])
+        self._migrate_latest_tables()
+        self._migrate_type_counts()
         self._bootstrap_schema_versions()
+        self._migrate_field_indexes()
+        if self._covering_history_index:
+            self._ensure_covering_history_indexes()
 
-    def _migrate_history_columns(self) -> None:
+    def _history_columns(self) -> dict[str, set[str]]:
+        """Read the column names of both history tables in one query."""
+        columns: dict[str, set[str]] = {"entity_history": set(), "relation_history": set()}
+        rows = self._conn.execute(
+            "SELECT m.name, p.name FROM sqlite_master m, pragma_table_info(m.name) p "
+            "WHERE m.type = 'table' AND m.name IN ('entity_history', 'relation_history')"
+        ).fetchall()
+        for table, column in rows:
+            columns[table].add(column)
+        return columns
+
+    def _migrate_history_columns(self, history_columns: dict[str, set[str]]) -> None:
         """Add schema_version_id column to history tables if missing."""
-        for table in ("entity_history", "relation_history"):
-            cols = {row[1] for row in self._conn.execute(f"PRAGMA table_info({table})").fetchall()}
+        for table, cols in history_columns.items():
             if "schema_version_id" not in cols:
                 self._conn.execute(f"ALTER TABLE {table} ADD COLUMN schema_version_id INTEGER")
                 self._conn.commit()
 
-    def _migrate_instance_key_column(self) -> None:
+    def _migrate_instance_key_column(self, cols: set[str]) -> None:
         """Add instance_key column to relation_history if missing."""
-        cols = {
-            row[1] for row in self._conn.execute("PRAGMA table_info(relation_history)").fetchall()
-        }
         if "instance_key" not in cols:
             self._conn.execute(
                 "ALTER TABLE relation_history ADD COLUMN instance_key TEXT NOT NULL DEFAULT ''"
@@ -553,6 +738,224 @@ class Repository:
             )
             self._conn.commit()
 
+    def _ensure_covering_history_indexes(self) -> None:
+        """Create lookup indexes that also carry fields_json, so as-of reads skip the table.
+
+        Opt-in: these roughly double history storage. Never dropped automatically, so a
+        connection opened without the flag leaves an existing index in place.
+        """
+        self._conn.executescript("""
+            CREATE INDEX IF NOT EXISTS idx_entity_history_covering
+                ON entity_history(
+                    entity_type, entity_key, commit_id DESC, schema_version_id, fields_json
+                );
+
+            CREATE INDEX IF NOT EXISTS idx_relation_history_covering
+                ON relation_history(
+                    relation_type, left_key, right_key, instance_key, commit_id DESC,
+                    schema_version_id, fields_json
+                );
+        """)
+        self._conn.commit()
+
+    def _migrate_field_indexes(self) -> None:
+        """Create field indexes for schemas stored before they were maintained."""
+        rows = self._conn.execute(
+            "SELECT type_kind, type_name, schema_json FROM schema_registry"
+        ).fetchall()
+        for kind, _name, schema_json in rows:
+            self._ensure_field_indexes(kind, loads_json(schema_json))
+        self._conn.commit()
+
+    def _ensure_field_indexes(self, type_kind: str, schema: dict[str, Any]) -> None:
+        """Index ``Field(index=True)`` fields by the json_extract expression filters compile to.
+
+        SQLite uses an expression index when the query repeats the indexed expression, so
+        ``_compile_comparison`` output can seek on it unchanged. Indexes are per history
+        table and field name, shared by every type that declares the same indexed field.
+        """
+        if type_kind == "entity":
+            table, type_col = "entity_history", "entity_type"
+        else:
+            table, type_col = "relation_history", "relation_type"
+        for field_name, info in (schema.get("fields") or {}).items():
+            if not (isinstance(info, dict) and info.get("index")):
+                continue
+            index_name = f"idx_{table}_field_{field_name}".replace('"', '""')
+            json_path = field_name.replace("'", "''")
+            self._conn.execute(
+                f'CREATE INDEX IF NOT EXISTS "{index_name}" '
+                f"ON {table}({type_col}, json_extract(fields_json, '$.{json_path}'))"
+            )
+
+    def _migrate_latest_tables(self) -> None:
+        """Create the latest-row pointer tables and backfill them for existing histories.
+
+        ``latest_entity`` / ``latest_relation`` map each identity to the id of its newest
+        history row. Triggers keep them current on every history insert and delete, so
+        "latest" reads join one row per identity instead of grouping the whole history.
+        """
+        existing = {
+            row[0]
+            for row in self._conn.execute(
+                "SELECT name FROM sqlite_master WHERE type = 'table' "
+                "AND name IN ('latest_entity', 'latest_relation')"
+            ).fetchall()
+        }
+        self._conn.executescript("""
+            CREATE TABLE IF NOT EXISTS latest_entity (
+                entity_type TEXT NOT NULL,
+                entity_key TEXT NOT NULL,
+                history_id INTEGER NOT NULL,
+                commit_id INTEGER NOT NULL,
+                PRIMARY KEY (entity_type, entity_key)
+            ) WITHOUT ROWID;
+
+            CREATE INDEX IF NOT EXISTS idx_latest_entity_history
+                ON latest_entity(history_id);
+
+            CREATE TRIGGER IF NOT EXISTS trg_entity_history_latest_insert
+            AFTER INSERT ON entity_history BEGIN
+                INSERT INTO latest_entity (entity_type, entity_key, history_id, commit_id)
+                VALUES (NEW.entity_type, NEW.entity_key, NEW.id, NEW.commit_id)
+                ON CONFLICT (entity_type, entity_key) DO UPDATE SET
+                    history_id = excluded.history_id, commit_id = excluded.commit_id
+                WHERE excluded.commit_id >= latest_entity.commit_id;
+            END;
+
+            CREATE TRIGGER IF NOT EXISTS trg_entity_history_latest_delete
+            AFTER DELETE ON entity_history BEGIN
+                DELETE FROM latest_entity
+                WHERE entity_type = OLD.entity_type AND entity_key = OLD.entity_key
+                    AND history_id = OLD.id;
+                INSERT OR IGNORE INTO latest_entity
+                    (entity_type, entity_key, history_id, commit_id)
+                SELECT entity_type, entity_key, id, commit_id FROM entity_history
+                WHERE entity_type = OLD.entity_type AND entity_key = OLD.entity_key
+                ORDER BY commit_id DESC, id DESC LIMIT 1;
+            END;
+
+            CREATE TABLE IF NOT EXISTS latest_relation (
+                relation_type TEXT NOT NULL,
+                left_key TEXT NOT NULL,
+                right_key TEXT NOT NULL,
+                instance_key TEXT NOT NULL,
+                history_id INTEGER NOT NULL,
+                commit_id INTEGER NOT NULL,
+                PRIMARY KEY (relation_type, left_key, right_key, instance_key)
+            ) WITHOUT ROWID;
+
+            CREATE INDEX IF NOT EXISTS idx_latest_relation_history
+                ON latest_relation(history_id);
+
+            CREATE INDEX IF NOT EXISTS idx_latest_relation_right
+                ON latest_relation(relation_type, right_key, history_id);
+
+            CREATE TRIGGER IF NOT EXISTS trg_relation_history_latest_insert
+            AFTER INSERT ON relation_history BEGIN
+                INSERT INTO latest_relation
+                    (relation_type, left_key, right_key, instance_key, history_id, commit_id)
+                VALUES (
+                    NEW.relation_type, NEW.left_key, NEW.right_key, NEW.instance_key,
+                    NEW.id, NEW.commit_id
+                )
+                ON CONFLICT (relation_type, left_key, right_key, instance_key) DO UPDATE SET
+                    history_id = excluded.history_id, commit_id = excluded.commit_id
+                WHERE excluded.commit_id >= latest_relation.commit_id;
+            END;
+
+            CREATE TRIGGER IF NOT EXISTS trg_relation_history_latest_delete
+            AFTER DELETE ON relation_history BEGIN
+                DELETE FROM latest_relation
+                WHERE relation_type = OLD.relation_type AND left_key = OLD.left_key
+                    AND right_key = OLD.right_key AND instance_key = OLD.instance_key
+                    AND history_id = OLD.id;
+                INSERT OR IGNORE INTO latest_relation
+                    (relation_type, left_key, right_key, instance_key, history_id, commit_id)
+                SELECT relation_type, left_key, right_key, instance_key, id, commit_id
+                FROM relation_history
+                WHERE relation_type = OLD.relation_type AND left_key = OLD.left_key
+                    AND right_key = OLD.right_key AND instance_key = OLD.instance_key
+                ORDER BY commit_id DESC, id DESC LIMIT 1;
+            END;
+        """)
+        # Rows are replayed oldest first so the newest row per identity wins.
+        if "latest_entity" not in existing:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO latest_entity "
+                "(entity_type, entity_key, history_id, commit_id) "
+                "SELECT entity_type, entity_key, id, commit_id FROM entity_history "
+                "ORDER BY commit_id, id"
+            )
+        if "latest_relation" not in existing:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO latest_relation "
+                "(relation_type, left_key, right_key, instance_key, history_id, commit_id) "
+                "SELECT relation_type, left_key, right_key, instance_key, id, commit_id "
+                "FROM relation_history ORDER BY commit_id, id"
+            )
+        self._conn.commit()
+
+    def _migrate_type_counts(self) -> None:
+        """Create per-type live counts kept in step with the latest-row pointer tables.
+
+        Pointer rows are only inserted for a new identity (version updates are upserts
+        that fire no INSERT trigger) and only deleted when history is purged, so +1/-1
+        triggers on the pointer tables keep ``type_counts.n`` exact.
+        """
+        # Count triggers are dropped along with a pointer table, so anything missing
+        # means the counts were never seeded or a pointer table was rebuilt.
+        installed = self._conn.execute(
+            "SELECT COUNT(*) FROM sqlite_master WHERE name IN ('type_counts', "
+            "'trg_latest_entity_count_insert', 'trg_latest_relation_count_insert')"
+        ).fetchone()[0]
+        self._conn.executescript("""
+            CREATE TABLE IF NOT EXISTS type_counts (
+                type_kind TEXT NOT NULL,
+                type_name TEXT NOT NULL,
+                n INTEGER NOT NULL,
+                PRIMARY KEY (type_kind, type_name)
+            ) WITHOUT ROWID;
+
+            CREATE TRIGGER IF NOT EXISTS trg_latest_entity_count_insert
+            AFTER INSERT ON latest_entity BEGIN
+                INSERT INTO type_counts (type_kind, type_name, n)
+                VALUES ('entity', NEW.entity_type, 1)
+                ON CONFLICT (type_kind, type_name) DO UPDATE SET n = n + 1;
+            END;
+
+            CREATE TRIGGER IF NOT EXISTS trg_latest_entity_count_delete
+            AFTER DELETE ON latest_entity BEGIN
+                UPDATE type_counts SET n = n - 1
+                WHERE type_kind = 'entity' AND type_name = OLD.entity_type;
+            END;
+
+            CREATE TRIGGER IF NOT EXISTS trg_latest_relation_count_insert
+            AFTER INSERT ON latest_relation BEGIN
+                INSERT INTO type_counts (type_kind, type_name, n)
+                VALUES ('relation', NEW.relation_type, 1)
+                ON CONFLICT (type_kind, type_name) DO UPDATE SET n = n + 1;
+            END;
+
+            CREATE TRIGGER IF NOT EXISTS trg_latest_relation_count_delete
+            AFTER DELETE ON latest_relation BEGIN
+                UPDATE type_counts SET n = n - 1
+                WHERE type_kind = 'relation' AND type_name = OLD.relation_type;
+            END;
+        """)
+        if installed < 3:
+            self._conn.execute("DELETE FROM type_counts")
+            self._conn.execute(
+                "INSERT INTO type_counts (type_kind, type_name, n) "
+                "SELECT 'entity', entity_type, COUNT(*) FROM latest_entity GROUP BY entity_type"
+            )
+            self._conn.execute(
+                "INSERT INTO type_counts (type_kind, type_name, n) "
+                "SELECT 'relation', relation_type, COUNT(*) FROM latest_relation "
+                "GROUP BY relation_type"
+            )
+        self._conn.commit()
+
     def _bootstrap_schema_versions(self) -> None:
         """Seed schema_versions from schema_registry if empty."""
         has_versions = self._conn.execute("SELECT COUNT(*) FROM schema_versions").fetchone()[0]
@@ -564,18 +967,23 @@ class Repository:
         if not rows:
             return
         now = datetime.now(timezone.utc).isoformat()
-        for kind, name, schema_json in rows:
-            schema_hash = _schema_hash(schema_json)
-            self._conn.execute(
-                "INSERT INTO schema_versions "
-                "(type_kind, type_name, schema_version_id, schema_json, "
-                "schema_hash, created_at, reason) "
-                "VALUES (?, ?, 1, ?, ?, ?, ?)",
-                (kind, name, schema_json, schema_hash, now, "bootstrap"),
-            )
+        self._conn.executemany(
+            "INSERT INTO schema_versions "
+            "(type_kind, type_name, schema_version_id, schema_json, "
+            "schema_hash, created_at, reason) "
+            "VALUES (?, ?, 1, ?, ?, ?, ?)",
+            [
+                (kind, name, schema_json, _schema_hash(schema_json), now, "bootstrap")
+                for kind, name, schema_json in rows
+            ],
+        )
         self._conn.commit()
 
     def close(self) -> None:
+        try:
+            self._conn.execute("PRAGMA optimize")
+        except sqlite3.Error:
+            pass
         self._conn.close()
 
     # --- Commit operations ---
@@ -603,7 +1011,7 @@ class Repository:
         return {
             "id": row[0],
             "created_at": row[1],
-            "metadata": json.loads(row[2]) if row[2] else None,
+            "metadata": loads_json(row[2]) if row[2] else None,
         }
 
     def list_commits(
@@ -627,7 +1035,7 @@ class Repository:
             {
                 "id": r[0],
                 "created_at": r[1],
-                "metadata": json.loads(r[2]) if r[2] else None,
+                "metadata": loads_json(r[2]) if r[2] else None,
             }
             for r in rows
         ]
@@ -636,14 +1044,32 @@ class Repository:
 
     def get_latest_entity(self, type_name: str, key: str) -> dict[str, Any] | None:
         row = self._conn.execute(
-            "SELECT fields_json, commit_id FROM entity_history "
-            "WHERE entity_type = ? AND entity_key = ? "
-            "ORDER BY commit_id DESC LIMIT 1",
+            "SELECT h.fields_json, h.commit_id FROM latest_entity l "
+            "INNER JOIN entity_history h ON h.id = l.history_id "
+            "WHERE l.entity_type = ? AND l.entity_key = ?",
             (type_name, key),
         ).fetchone()
         if row is None:
             return None
-        return {"fields": json.loads(row[0]), "commit_id": row[1]}
+        return {"fields": loads_json(row[0]), "commit_id": row[1]}
+
+    def get_latest_entities(self, type_name: str, keys: list[str]) -> dict[str, dict[str, Any]]:
+        """Latest row per key for many keys of one entity type. Missing keys are omitted."""
+        result: dict[str, dict[str, Any]] = {}
+        unique = list(dict.fromkeys(keys))
+        chunk_size = 500
+        for start in range(0, len(unique), chunk_size):
+            chunk = unique[start : start + chunk_size]
+            placeholders = ", ".join("?" for _ in chunk)
+            rows = self._conn.execute(
+                "SELECT h.entity_key, h.fields_json, h.commit_id FROM latest_entity l "
+                "INNER JOIN entity_history h ON h.id = l.history_id "
+                f"WHERE l.entity_type = ? AND l.entity_key IN ({placeholders})",
+                [type_name, *chunk],
+            ).fetchall()
+            for row in rows:
+                result[row[0]] = {"fields": loads_json(row[1]), "commit_id": row[2]}
+        return result
 
     def insert_entity(
         self,
@@ -657,7 +1083,25 @@ class Repository:
             "INSERT INTO entity_history "
             "(entity_type, entity_key, fields_json, commit_id, schema_version_id) "
             "VALUES (?, ?, ?, ?, ?)",
-            (type_name, key, json.dumps(fields), commit_id, schema_version_id),
+            (type_name, key, _dumps_fields(fields), commit_id, schema_version_id),
+        )
+
+    def insert_entities(
+        self,
+        type_name: str,
+        rows: list[tuple[str, dict[str, Any]]],
+        commit_id: int,
+        schema_version_id: int | None = None,
+    ) -> None:
+        """Insert many (key, fields) rows of one entity type with a single executemany."""
+        self._conn.executemany(
+            "INSERT INTO entity_history "
+            "(entity_type, entity_key, fields_json, commit_id, schema_version_id) "
+            "VALUES (?, ?, ?, ?, ?)",
+            [
+                (type_name, key, _dumps_fields(fields), commit_id, schema_version_id)
+                for key, fields in rows
+            ],
         )
 
     def query_entities(
@@ -689,10 +1133,9 @@ class Repository:
                 "FROM entity_history eh "
                 "WHERE eh.entity_type = ?"
             )
-            params.append(type_name)
-            if history_since is not None:
-                sql += " AND eh.commit_id > ?"
-                params.append(history_since)
+            # Bound even when unset (0 keeps every row) so the SQL text does not vary.
+            sql += " AND eh.commit_id > ?"
+            params.extend([type_name, history_since or 0])
             if _apply_sv:
                 sql += " AND eh.schema_version_id = ?"
                 params.append(schema_version_id)
@@ -726,12 +1169,8 @@ class Repository:
             sql = (
                 "SELECT eh.entity_key, eh.fields_json, eh.commit_id "
                 "FROM entity_history eh "
-                "INNER JOIN ("
-                "  SELECT entity_key, MAX(commit_id) as max_cid "
-                "  FROM entity_history "
-                "  WHERE entity_type = ? "
-                "  GROUP BY entity_key"
-                ") latest ON eh.entity_key = latest.entity_key AND eh.commit_id = latest.max_cid "
+                "INNER JOIN latest_entity latest ON latest.entity_type = ? "
+                "AND latest.entity_key = eh.entity_key AND latest.history_id = eh.id "
                 "WHERE eh.entity_type = ?"
             )
             params.extend([type_name, type_name])
@@ -747,18 +1186,13 @@ class Repository:
         elif with_history or history_since is not None:
             sql += " ORDER BY eh.commit_id ASC"
 
-        if limit is not None:
-            sql += " LIMIT ?"
-            params.append(limit)
-        if offset is not None:
-            sql += " OFFSET ?"
-            params.append(offset)
+        sql += _paging_clause(limit, offset, params)
 
         rows = self._conn.execute(sql, params).fetchall()
         return [
             {
                 "key": r[0],
-                "fields": json.loads(r[1]),
+                "fields": loads_json(r[1]),
                 "commit_id": r[2],
             }
             for r in rows
@@ -773,10 +1207,8 @@ class Repository:
         params: list[Any] = []
         sql = (
             "SELECT COUNT(*) FROM entity_history eh "
-            "INNER JOIN ("
-            "  SELECT entity_key, MAX(commit_id) as max_cid "
-            "  FROM entity_history WHERE entity_type = ? GROUP BY entity_key"
-            ") latest ON eh.entity_key = latest.entity_key AND eh.commit_id = latest.max_cid "
+            "INNER JOIN latest_entity latest ON latest.entity_type = ? "
+            "AND latest.entity_key = eh.entity_key AND latest.history_id = eh.id "
             "WHERE eh.entity_type = ?"
         )
         params.extend([type_name, type_name])
@@ -808,10 +1240,8 @@ class Repository:
 
         sql = (
             f"SELECT {agg_func}({expr}) FROM entity_history eh "
-            "INNER JOIN ("
-            "  SELECT entity_key, MAX(commit_id) as max_cid "
-            "  FROM entity_history WHERE entity_type = ? GROUP BY entity_key"
-            ") latest ON eh.entity_key = latest.entity_key AND eh.commit_id = latest.max_cid "
+            "INNER JOIN latest_entity latest ON latest.entity_type = ? "
+            "AND latest.entity_key = eh.entity_key AND latest.history_id = eh.id "
             "WHERE eh.entity_type = ?"
         )
         params.extend([type_name, type_name])
@@ -854,10 +1284,8 @@ class Repository:
 
         sql = (
             f"SELECT {select_clause} FROM entity_history eh "
-            "INNER JOIN ("
-            "  SELECT entity_key, MAX(commit_id) as max_cid "
-            "  FROM entity_history WHERE entity_type = ? GROUP BY entity_key"
-            ") latest ON eh.entity_key = latest.entity_key AND eh.commit_id = latest.max_cid "
+            "INNER JOIN latest_entity latest ON latest.entity_type = ? "
+            "AND latest.entity_key = eh.entity_key AND latest.history_id = eh.id "
             "WHERE eh.entity_type = ?"
         )
         params.extend([type_name, type_name])
@@ -888,14 +1316,43 @@ class Repository:
         self, type_name: str, left_key: str, right_key: str, instance_key: str = ""
     ) -> dict[str, Any] | None:
         row = self._conn.execute(
-            "SELECT fields_json, commit_id FROM relation_history "
-            "WHERE relation_type = ? AND left_key = ? AND right_key = ? AND instance_key = ? "
-            "ORDER BY commit_id DESC LIMIT 1",
+            "SELECT h.fields_json, h.commit_id FROM latest_relation l "
+            "INNER JOIN relation_history h ON h.id = l.history_id "
+            "WHERE l.relation_type = ? AND l.left_key = ? AND l.right_key = ? "
+            "AND l.instance_key = ?",
             (type_name, left_key, right_key, instance_key),
         ).fetchone()
         if row is None:
             return None
-        return {"fields": json.loads(row[0]), "commit_id": row[1]}
+        return {"fields": loads_json(row[0]), "commit_id": row[1]}
+
+    def get_latest_relations(
+        self, type_name: str, keys: list[tuple[str, str, str]]
+    ) -> dict[tuple[str, str, str], dict[str, Any]]:
+        """Latest row per (left_key, right_key, instance_key) for one relation type."""
+        result: dict[tuple[str, str, str], dict[str, Any]] = {}
+        unique = list(dict.fromkeys(keys))
+        chunk_size = 300
+        for start in range(0, len(unique), chunk_size):
+            chunk = unique[start : start + chunk_size]
+            values = ", ".join("(?, ?, ?)" for _ in chunk)
+            params: list[Any] = [type_name]
+            for key in chunk:
+                params.extend(key)
+            rows = self._conn.execute(
+                "SELECT h.left_key, h.right_key, h.instance_key, h.fields_json, h.commit_id "
+                "FROM latest_relation l "
+                "INNER JOIN relation_history h ON h.id = l.history_id "
+                "WHERE l.relation_type = ? "
+                f"AND (l.left_key, l.right_key, l.instance_key) IN (VALUES {values})",
+                params,
+            ).fetchall()
+            for row in rows:
+                result[(row[0], row[1], row[2])] = {
+                    "fields": loads_json(row[3]),
+                    "commit_id": row[4],
+                }
+        return result
 
     def insert_relation(
         self,
@@ -917,12 +1374,39 @@ class Repository:
                 left_key,
                 right_key,
                 instance_key,
-                json.dumps(fields),
+                _dumps_fields(fields),
                 commit_id,
                 schema_version_id,
             ),
         )
 
+    def insert_relations(
+        self,
+        type_name: str,
+        rows: list[tuple[str, str, str, dict[str, Any]]],
+        commit_id: int,
+        schema_version_id: int | None = None,
+    ) -> None:
+        """Insert many (left_key, right_key, instance_key, fields) rows of one relation type."""
+        self._conn.executemany(
+            "INSERT INTO relation_history "
+            "(relation_type, left_key, right_key, instance_key, fields_json, commit_id, "
+            "schema_version_id) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?)",
+            [
+                (
+                    type_name,
+                    left_key,
+                    right_key,
+                    instance_key,
+                    _dumps_fields(fields),
+                    commit_id,
+                    schema_version_id,
+                )
+                for left_key, right_key, instance_key, fields in rows
+            ],
+        )
+
     def query_relations(
         self,
         type_name: str,
@@ -941,8 +1425,9 @@ class Repository:
     ) -> list[dict[str, Any]]:
         self._last_query_diagnostics = None
         params: list[Any] = []
-        needs_left = _needs_endpoint_join(filter_expr, "left")
-        needs_right = _needs_endpoint_join(filter_expr, "right")
+        prefixes = _filter_prefixes(filter_expr)
+        needs_left = "left" in prefixes
+        needs_right = "right" in prefixes
         if needs_left and left_entity_type is None:
             raise ValueError("left_entity_type is required for left endpoint filters")
         if needs_right and right_entity_type is None:
@@ -959,10 +1444,9 @@ class Repository:
                 "FROM relation_history rh "
                 "WHERE rh.relation_type = ?"
             )
-            params.append(type_name)
-            if history_since is not None:
-                sql += " AND rh.commit_id > ?"
-                params.append(history_since)
+            # Bound even when unset (0 keeps every row) so the SQL text does not vary.
+            sql += " AND rh.commit_id > ?"
+            params.extend([type_name, history_since or 0])
             if _apply_sv:
                 sql += " AND rh.schema_version_id = ?"
                 params.append(schema_version_id)
@@ -993,86 +1477,82 @@ class Repository:
             if _apply_sv:
                 params.append(schema_version_id)
         else:
+            # Latest endpoints are one pointer row per key, so they join directly and the
+            # planner may drive the query from a selective endpoint filter.
             sql = (
                 "SELECT rh.left_key, rh.right_key, rh.instance_key, rh.fields_json, rh.commit_id "
                 "FROM relation_history rh "
-                "INNER JOIN ("
-                "  SELECT left_key, right_key, instance_key, MAX(commit_id) as max_cid "
-                "  FROM relation_history "
-                "  WHERE relation_type = ? "
-                "  GROUP BY left_key, right_key, instance_key"
-                ") latest ON rh.left_key = latest.left_key AND rh.right_key = latest.right_key "
-                "AND rh.instance_key = latest.instance_key "
-                "AND rh.commit_id = latest.max_cid "
-                "WHERE rh.relation_type = ?"
+                "INNER JOIN latest_relation latest ON latest.relation_type = ? "
+                "AND latest.history_id = rh.id"
             )
-            params.extend([type_name, type_name])
+            params.append(type_name)
+            for side, entity_type, needed in (
+                ("le", left_entity_type, needs_left),
+                ("re", right_entity_type, needs_right),
+            ):
+                if needed:
+                    key_col = "rh.left_key" if side == "le" else "rh.right_key"
+                    sql += (
+                        f" INNER JOIN latest_entity {side}_latest "
+                        f"ON {side}_latest.entity_type = ? AND {side}_latest.entity_key = {key_col}"
+                        f" INNER JOIN entity_history {side} ON {side}.id = {side}_latest.history_id"
+                    )
+                    params.append(entity_type)
+            sql += " WHERE rh.relation_type = ?"
+            params.append(type_name)
+            for prefix, alias, needed in (("left", "le", needs_left), ("right", "re", needs_right)):
+                endpoint_filter = _extract_prefix_filter(filter_expr, prefix) if needed else None
+                if endpoint_filter:
+                    endpoint_where = _compile_filter(endpoint_filter, params, table_alias=alias)
+                    sql += f" AND {endpoint_where}"
+
+        # History and as_of reads match endpoints through correlated EXISTS probes
+        endpoint_exists = with_history or history_since is not None or as_of is not None
 
         # Join left endpoint entity for filtering
-        if needs_left and left_entity_type:
+        if endpoint_exists and needs_left and left_entity_type:
             sql += " AND EXISTS ( SELECT 1 FROM entity_history le "
             if with_history or history_since is not None:
-                sql += " WHERE le.entity_type = ? AND le.entity_key = rh.left_key"
-                params.append(left_entity_type)
-                if history_since is not None:
-                    sql += " AND le.commit_id > ?"
-                    params.append(history_since)
-            elif as_of is not None:
                 sql += (
-                    " INNER JOIN ("
-                    "   SELECT entity_key, MAX(commit_id) as max_cid "
-                    "   FROM entity_history WHERE entity_type = ? AND commit_id <= ? "
-                    "   GROUP BY entity_key"
-                    " ) le_latest ON le.entity_key = le_latest.entity_key "
-                    " AND le.commit_id = le_latest.max_cid "
-                    " WHERE le.entity_type = ? AND le.entity_key = rh.left_key"
+                    " WHERE le.entity_type = ? AND le.entity_key = rh.left_key AND le.commit_id > ?"
                 )
-                params.extend([left_entity_type, as_of, left_entity_type])
+                params.extend([left_entity_type, history_since or 0])
             else:
                 sql += (
                     " INNER JOIN ("
                     "   SELECT entity_key, MAX(commit_id) as max_cid "
-                    "   FROM entity_history WHERE entity_type = ? GROUP BY entity_key"
+                    "   FROM entity_history WHERE entity_type = ? AND commit_id <= ? "
+                    "   GROUP BY entity_key"
                     " ) le_latest ON le.entity_key = le_latest.entity_key "
                     " AND le.commit_id = le_latest.max_cid "
                     " WHERE le.entity_type = ? AND le.entity_key = rh.left_key"
                 )
-                params.extend([left_entity_type, left_entity_type])
+                params.extend([left_entity_type, as_of, left_entity_type])
             left_filter = _extract_prefix_filter(filter_expr, "left")
             if left_filter:
                 left_where = _compile_filter(left_filter, params, table_alias="le")
                 sql += f" AND {left_where}"
             sql += ")"
 
-        if needs_right and right_entity_type:
+        if endpoint_exists and needs_right and right_entity_type:
             sql += " AND EXISTS ( SELECT 1 FROM entity_history re "
             if with_history or history_since is not None:
-                sql += " WHERE re.entity_type = ? AND re.entity_key = rh.right_key"
-                params.append(right_entity_type)
-                if history_since is not None:
-                    sql += " AND re.commit_id > ?"
-                    params.append(history_since)
-            elif as_of is not None:
                 sql += (
-                    " INNER JOIN ("
-                    "   SELECT entity_key, MAX(commit_id) as max_cid "
-                    "   FROM entity_history WHERE entity_type = ? AND commit_id <= ? "
-                    "   GROUP BY entity_key"
-                    " ) re_latest ON re.entity_key = re_latest.entity_key "
-                    " AND re.commit_id = re_latest.max_cid "
                     " WHERE re.entity_type = ? AND re.entity_key = rh.right_key"
+                    " AND re.commit_id > ?"
                 )
-                params.extend([right_entity_type, as_of, right_entity_type])
+                params.extend([right_entity_type, history_since or 0])
             else:
                 sql += (
                     " INNER JOIN ("
                     "   SELECT entity_key, MAX(commit_id) as max_cid "
-                    "   FROM entity_history WHERE entity_type = ? GROUP BY entity_key"
+                    "   FROM entity_history WHERE entity_type = ? AND commit_id <= ? "
+                    "   GROUP BY entity_key"
                     " ) re_latest ON re.entity_key = re_latest.entity_key "
                     " AND re.commit_id = re_latest.max_cid "
                     " WHERE re.entity_type = ? AND re.entity_key = rh.right_key"
                 )
-                params.extend([right_entity_type, right_entity_type])
+                params.extend([right_entity_type, as_of, right_entity_type])
             right_filter = _extract_prefix_filter(filter_expr, "right")
             if right_filter:
                 right_where = _compile_filter(right_filter, params, table_alias="re")
@@ -1092,12 +1572,7 @@ class Repository:
         elif with_history or history_since is not None:
             sql += " ORDER BY rh.commit_id ASC"
 
-        if limit is not None:
-            sql += " LIMIT ?"
-            params.append(limit)
-        if offset is not None:
-            sql += " OFFSET ?"
-            params.append(offset)
+        sql += _paging_clause(limit, offset, params)
 
         rows = self._conn.execute(sql, params).fetchall()
         return [
@@ -1105,7 +1580,7 @@ class Repository:
                 "left_key": r[0],
                 "right_key": r[1],
                 "instance_key": r[2],
-                "fields": json.loads(r[3]),
+                "fields": loads_json(r[3]),
                 "commit_id": r[4],
             }
             for r in rows
@@ -1122,13 +1597,8 @@ class Repository:
         params: list[Any] = []
         sql = (
             "SELECT COUNT(*) FROM relation_history rh "
-            "INNER JOIN ("
-            "  SELECT left_key, right_key, instance_key, MAX(commit_id) as max_cid "
-            "  FROM relation_history WHERE relation_type = ? "
-            "  GROUP BY left_key, right_key, instance_key"
-            ") latest ON rh.left_key = latest.left_key AND rh.right_key = latest.right_key "
-            "AND rh.instance_key = latest.instance_key "
-            "AND rh.commit_id = latest.max_cid "
+            "INNER JOIN latest_relation latest ON latest.relation_type = ? "
+            "AND latest.history_id = rh.id "
             "WHERE rh.relation_type = ?"
         )
         params.extend([type_name, type_name])
@@ -1160,13 +1630,8 @@ class Repository:
 
         sql = (
             f"SELECT {agg_expr} FROM relation_history rh "
-            "INNER JOIN ("
-            "  SELECT left_key, right_key, instance_key, MAX(commit_id) as max_cid "
-            "  FROM relation_history WHERE relation_type = ? "
-            "  GROUP BY left_key, right_key, instance_key"
-            ") latest ON rh.left_key = latest.left_key AND rh.right_key = latest.right_key "
-            "AND rh.instance_key = latest.instance_key "
-            "AND rh.commit_id = latest.max_cid "
+            "INNER JOIN latest_relation latest ON latest.relation_type = ? "
+            "AND latest.history_id = rh.id "
             "WHERE rh.relation_type = ?"
         )
         params.extend([type_name, type_name])
@@ -1217,38 +1682,29 @@ class Repository:
 
         sql = (
             f"SELECT {select_clause} FROM relation_history rh "
-            "INNER JOIN ("
-            "  SELECT left_key, right_key, instance_key, MAX(commit_id) as max_cid "
-            "  FROM relation_history WHERE relation_type = ? "
-            "  GROUP BY left_key, right_key, instance_key"
-            ") latest ON rh.left_key = latest.left_key AND rh.right_key = latest.right_key "
-            "AND rh.instance_key = latest.instance_key "
-            "AND rh.commit_id = latest.max_cid "
-            "WHERE rh.relation_type = ?"
+            "INNER JOIN latest_relation latest ON latest.relation_type = ? "
+            "AND latest.history_id = rh.id"
         )
-        params.extend([type_name, type_name])
+        params.append(type_name)
 
-        # Join left entities if needed for grouping
+        # Join the grouped endpoint's latest row: one pointer probe, then one rowid hop
         if group_field.startswith("left.$.") and left_entity_type:
-            sql = (
-                f"SELECT {select_clause} FROM relation_history rh "
-                "INNER JOIN ("
-                "  SELECT left_key, right_key, instance_key, MAX(commit_id) as max_cid "
-                "  FROM relation_history WHERE relation_type = ? "
-                "  GROUP BY left_key, right_key, instance_key"
-                ") latest ON rh.left_key = latest.left_key AND rh.right_key = latest.right_key "
-                "AND rh.instance_key = latest.instance_key "
-                "AND rh.commit_id = latest.max_cid "
-                "INNER JOIN entity_history le ON le.entity_key = rh.left_key "
-                "AND le.entity_type = ? "
-                "INNER JOIN ("
-                "  SELECT entity_key, MAX(commit_id) as max_cid "
-                "  FROM entity_history WHERE entity_type = ? GROUP BY entity_key"
-                ") le_latest ON le.entity_key = le_latest.entity_key "
-                "AND le.commit_id = le_latest.max_cid "
-                "WHERE rh.relation_type = ?"
+            sql += (
+                " INNER JOIN latest_entity le_latest ON le_latest.entity_type = ? "
+                "AND le_latest.entity_key = rh.left_key "
+                "INNER JOIN entity_history le ON le.id = le_latest.history_id"
+            )
+            params.append(left_entity_type)
+        elif group_field.startswith("right.$.") and right_entity_type:
+            sql += (
+                " INNER JOIN latest_entity re_latest ON re_latest.entity_type = ? "
+                "AND re_latest.entity_key = rh.right_key "
+                "INNER JOIN entity_history re ON re.id = re_latest.history_id"
             )
-            params = [type_name, left_entity_type, left_entity_type, type_name]
+            params.append(right_entity_type)
+
+        sql += " WHERE rh.relation_type = ?"
+        params.append(type_name)
 
         if filter_expr is not None:
             direct = _extract_direct_filter(filter_expr)
@@ -1296,18 +1752,14 @@ class Repository:
         else:
             key_col = "right_key"
 
-        params: list[Any] = [relation_type, relation_type, entity_key]
+        # Seek the entity's neighbours in the pointer table (primary key for left,
+        # idx_latest_relation_right for right), then hop to each history row by id.
+        params: list[Any] = [relation_type, entity_key]
         sql = (
             "SELECT rh.left_key, rh.right_key, rh.instance_key, rh.fields_json, rh.commit_id "
-            "FROM relation_history rh "
-            "INNER JOIN ("
-            "  SELECT left_key, right_key, instance_key, MAX(commit_id) as max_cid "
-            "  FROM relation_history WHERE relation_type = ? "
-            "  GROUP BY left_key, right_key, instance_key"
-            ") latest ON rh.left_key = latest.left_key AND rh.right_key = latest.right_key "
-            "AND rh.instance_key = latest.instance_key "
-            "AND rh.commit_id = latest.max_cid "
-            f"WHERE rh.relation_type = ? AND rh.{key_col} = ?"
+            "FROM latest_relation latest "
+            "INNER JOIN relation_history rh ON rh.id = latest.history_id "
+            f"WHERE latest.relation_type = ? AND latest.{key_col} = ?"
         )
         rows = self._conn.execute(sql, params).fetchall()
         return [
@@ -1315,7 +1767,7 @@ class Repository:
                 "left_key": r[0],
                 "right_key": r[1],
                 "instance_key": r[2],
-                "fields": json.loads(r[3]),
+                "fields": loads_json(r[3]),
                 "commit_id": r[4],
             }
             for r in rows
@@ -1328,22 +1780,26 @@ class Repository:
             "SELECT schema_json FROM schema_registry WHERE type_kind = ? AND type_name = ?",
             (type_kind, type_name),
         ).fetchone()
-        return json.loads(row[0]) if row else None
+        return loads_json(row[0]) if row else None
 
     def store_schema(self, type_kind: str, type_name: str, schema: dict[str, Any]) -> None:
+        started_in_tx = self._conn.in_transaction
         self._conn.execute(
             "INSERT OR REPLACE INTO schema_registry (type_kind, type_name, schema_json) "
             "VALUES (?, ?, ?)",
             (type_kind, type_name, json.dumps(schema)),
         )
-        self._conn.commit()
+        self._ensure_field_indexes(type_kind, schema)
+        # Inside a caller's transaction (e.g. a migration) the caller decides durability.
+        if not started_in_tx:
+            self._conn.commit()
 
     def list_schemas(self, type_kind: str) -> list[dict[str, Any]]:
         rows = self._conn.execute(
             "SELECT type_name, schema_json FROM schema_registry WHERE type_kind = ?",
             (type_kind,),
         ).fetchall()
-        return [{"type_name": r[0], "schema": json.loads(r[1])} for r in rows]
+        return [{"type_name": r[0], "schema": loads_json(r[1])} for r in rows]
 
     # --- Schema versions ---
 
@@ -1364,6 +1820,7 @@ class Repository:
         ).fetchone()
         next_id = (row[0] or 0) + 1
         now = datetime.now(timezone.utc).isoformat()
+        started_in_tx = self._conn.in_transaction
         self._conn.execute(
             "INSERT INTO schema_versions "
             "(type_kind, type_name, schema_version_id, schema_json, schema_hash, "
@@ -1371,7 +1828,8 @@ class Repository:
             "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
             (type_kind, type_name, next_id, schema_json, schema_hash, now, runtime_id, reason),
         )
-        self._conn.commit()
+        if not started_in_tx:
+            self._conn.commit()
         return next_id
 
     def get_current_schema_version(self, type_kind: str, type_name: str) -> dict[str, Any] | None:
@@ -1393,6 +1851,50 @@ class Repository:
             "reason": row[5],
         }
 
+    def get_current_schema_versions(
+        self, keys: list[tuple[str, str]]
+    ) -> dict[tuple[str, str], dict[str, Any] | None]:
+        """Get the latest schema version row for many (type_kind, type_name) pairs at once."""
+        result: dict[tuple[str, str], dict[str, Any] | None] = {key: None for key in keys}
+        pending = list(result)
+        # Stay well below SQLite's bound-parameter limit (two params per key).
+        chunk_size = 400
+        for start in range(0, len(pending), chunk_size):
+            chunk = pending[start : start + chunk_size]
+            values = ", ".join("(?, ?)" for _ in chunk)
+            params: list[Any] = [p for key in chunk for p in key]
+            rows = self._conn.execute(
+                "SELECT sv.type_kind, sv.type_name, sv.schema_version_id, sv.schema_json, "
+                "sv.schema_hash, sv.created_at, sv.runtime_id, sv.reason "
+                "FROM schema_versions sv "
+                "JOIN ("
+                "  SELECT type_kind, type_name, MAX(schema_version_id) AS max_vid "
+                "  FROM schema_versions "
+                f"  WHERE (type_kind, type_name) IN (VALUES {values}) "
+                "  GROUP BY type_kind, type_name"
+                ") cur ON sv.type_kind = cur.type_kind AND sv.type_name = cur.type_name "
+                "AND sv.schema_version_id = cur.max_vid",
+                params,
+            ).fetchall()
+            for row in rows:
+                result[(row[0], row[1])] = {
+                    "schema_version_id": row[2],
+                    "schema_json": row[3],
+                    "schema_hash": row[4],
+                    "created_at": row[5],
+                    "runtime_id": row[6],
+                    "reason": row[7],
+                }
+        return result
+
+    def get_schema_epoch(self) -> tuple[int, int] | None:
+        """Cheap token that changes whenever schema versions are added or removed.
+
+        Row ids are never reused, so (row count, max id) moves on every insert and delete.
+        """
+        row = self._conn.execute("SELECT COUNT(*), MAX(id) FROM schema_versions").fetchone()
+        return (row[0], row[1] or 0)
+
     def get_schema_version(
         self, type_kind: str, type_name: str, version_id: int
     ) -> dict[str, Any] | None:
@@ -1436,7 +1938,7 @@ class Repository:
     def count_latest_entities(self, type_name: str) -> int:
         """Count distinct latest entities of a given type."""
         row = self._conn.execute(
-            "SELECT COUNT(DISTINCT entity_key) FROM entity_history WHERE entity_type = ?",
+            "SELECT n FROM type_counts WHERE type_kind = 'entity' AND type_name = ?",
             (type_name,),
         ).fetchone()
         return row[0] if row else 0
@@ -1444,10 +1946,7 @@ class Repository:
     def count_latest_relations(self, type_name: str) -> int:
         """Count distinct latest relations of a given type."""
         row = self._conn.execute(
-            "SELECT COUNT(*) FROM ("
-            "  SELECT DISTINCT left_key, right_key, instance_key "
-            "  FROM relation_history WHERE relation_type = ?"
-            ")",
+            "SELECT n FROM type_counts WHERE type_kind = 'relation' AND type_name = ?",
             (type_name,),
         ).fetchone()
         return row[0] if row else 0
@@ -1455,73 +1954,69 @@ class Repository:
     def iter_latest_entities(
         self, type_name: str, batch_size: int = 1000
     ) -> Iterator[list[tuple[str, dict[str, Any], int, int | None]]]:
-        """Yield batches of (key, fields_dict, commit_id, schema_version_id) for latest entities."""
-        offset = 0
+        """Yield batches of (key, fields_dict, commit_id, schema_version_id) for latest entities.
+
+        Pages by key (keyset) rather than OFFSET, so each batch is a single index range
+        and callers may insert new versions between batches.
+        """
+        op, after = ">=", ""
         while True:
             rows = self._conn.execute(
-                "SELECT eh.entity_key, eh.fields_json, eh.commit_id, eh.schema_version_id "
-                "FROM entity_history eh "
-                "INNER JOIN ("
-                "  SELECT entity_key, MAX(commit_id) as max_cid "
-                "  FROM entity_history WHERE entity_type = ? GROUP BY entity_key"
-                ") latest ON eh.entity_key = latest.entity_key AND eh.commit_id = latest.max_cid "
-                "WHERE eh.entity_type = ? "
-                "ORDER BY eh.entity_key "
-                "LIMIT ? OFFSET ?",
-                (type_name, type_name, batch_size, offset),
+                "SELECT latest.entity_key, eh.fields_json, eh.commit_id, eh.schema_version_id "
+                "FROM latest_entity latest "
+                "INNER JOIN entity_history eh ON eh.id = latest.history_id "
+                f"WHERE latest.entity_type = ? AND latest.entity_key {op} ? "
+                "ORDER BY latest.entity_key "
+                "LIMIT ?",
+                (type_name, after, batch_size),
             ).fetchall()
             if not rows:
                 break
-            batch = [(r[0], json.loads(r[1]), r[2], r[3]) for r in rows]
+            batch = [(r[0], loads_json(r[1]), r[2], r[3]) for r in rows]
             yield batch
             if len(rows) < batch_size:
                 break
-            offset += batch_size
+            op, after = ">", rows[-1][0]
 
     def iter_latest_relations(
         self, type_name: str, batch_size: int = 1000
     ) -> Iterator[list[tuple[str, str, str, dict[str, Any], int, int | None]]]:
         """Yield batches of latest relation rows with schema version metadata."""
-        offset = 0
+        op, after = ">=", ("", "", "")
         while True:
             rows = self._conn.execute(
-                "SELECT rh.left_key, rh.right_key, rh.instance_key, rh.fields_json, "
+                "SELECT latest.left_key, latest.right_key, latest.instance_key, rh.fields_json, "
                 "rh.commit_id, rh.schema_version_id "
-                "FROM relation_history rh "
-                "INNER JOIN ("
-                "  SELECT left_key, right_key, instance_key, MAX(commit_id) as max_cid "
-                "  FROM relation_history WHERE relation_type = ? "
-                "  GROUP BY left_key, right_key, instance_key"
-                ") latest ON rh.left_key = latest.left_key AND rh.right_key = latest.right_key "
-                "AND rh.instance_key = latest.instance_key "
-                "AND rh.commit_id = latest.max_cid "
-                "WHERE rh.relation_type = ? "
-                "ORDER BY rh.left_key, rh.right_key, rh.instance_key "
-                "LIMIT ? OFFSET ?",
-                (type_name, type_name, batch_size, offset),
+                "FROM latest_relation latest "
+                "INNER JOIN relation_history rh ON rh.id = latest.history_id "
+                "WHERE latest.relation_type = ? "
+                f"AND (latest.left_key, latest.right_key, latest.instance_key) {op} (?, ?, ?) "
+                "ORDER BY latest.left_key, latest.right_key, latest.instance_key "
+                "LIMIT ?",
+                (type_name, *after, batch_size),
             ).fetchall()
             if not rows:
                 break
-            batch = [(r[0], r[1], r[2], json.loads(r[3]), r[4], r[5]) for r in rows]
+            batch = [(r[0], r[1], r[2], loads_json(r[3]), r[4], r[5]) for r in rows]
             yield batch
             if len(rows) < batch_size:
                 break
-            offset += batch_size
+            op, after = ">", (rows[-1][0], rows[-1][1], rows[-1][2])
 
     def list_commit_changes(self, commit_id: int) -> list[dict[str, Any]]:
         """List commit changes with inferred operation kind."""
         changes: list[dict[str, Any]] = []
 
+        # One statement per table; the prior-version probe is a correlated EXISTS
+        # served by the (type, key, commit_id) lookup index.
         entity_rows = self._conn.execute(
-            "SELECT entity_type, entity_key FROM entity_history WHERE commit_id = ?",
+            "SELECT e.entity_type, e.entity_key, EXISTS ("
+            "  SELECT 1 FROM entity_history p WHERE p.entity_type = e.entity_type "
+            "  AND p.entity_key = e.entity_key AND p.commit_id < e.commit_id"
+            ") FROM entity_history e WHERE e.commit_id = ? ORDER BY e.id",
             (commit_id,),
         ).fetchall()
-        for etype, ekey in entity_rows:
-            prev = self._conn.execute(
-                "SELECT 1 FROM entity_history "
-                "WHERE entity_type = ? AND entity_key = ? AND commit_id < ? LIMIT 1",
-                (etype, ekey, commit_id),
-            ).fetchone()
+        for etype, ekey, prev in entity_rows:
             changes.append(
                 {
                     "kind": "entity",
@@ -1532,17 +2027,14 @@ class Repository:
             )
 
         relation_rows = self._conn.execute(
-            "SELECT relation_type, left_key, right_key, instance_key "
-            "FROM relation_history WHERE commit_id = ?",
+            "SELECT r.relation_type, r.left_key, r.right_key, r.instance_key, EXISTS ("
+            "  SELECT 1 FROM relation_history p WHERE p.relation_type = r.relation_type "
+            "  AND p.left_key = r.left_key AND p.right_key = r.right_key "
+            "  AND p.instance_key = r.instance_key AND p.commit_id < r.commit_id"
+            ") FROM relation_history r WHERE r.commit_id = ? ORDER BY r.id",
             (commit_id,),
         ).fetchall()
-        for rtype, lkey, rkey, ikey in relation_rows:
-            prev = self._conn.execute(
-                "SELECT 1 FROM relation_history "
-                "WHERE relation_type = ? AND left_key = ? AND right_key = ? "
-                "AND instance_key = ? AND commit_id < ? LIMIT 1",
-                (rtype, lkey, rkey, ikey, commit_id),
-            ).fetchone()
+        for rtype, lkey, rkey, ikey, prev in relation_rows:
             changes.append(
                 {
                     "kind": "relation",
@@ -1772,11 +2264,11 @@ def open_repository(
         assert target.db_path is not None
         resolved_engine = engine_version or _sqlite_detect_engine_version(target.db_path)
         if resolved_engine == "v1":
-            return SqliteRepositoryV1(target.db_path)
+            return SqliteRepositoryV1(target.db_path, config=config)
         if resolved_engine == "v2":
             from ontologia.storage_sqlite_v2 import SqliteRepositoryV2
 
-            return SqliteRepositoryV2(target.db_path)
+            return SqliteRepositoryV2(target.db_path, config=config)
         raise StorageBackendError(
             "open_repository",
             f"Unsupported sqlite engine version '{resolved_engine}'",
@@ -1821,5 +2313,4 @@ __all__ = [
     "StorageTarget",
     "parse_storage_target",
     "open_repository",
-    "_schema_hash",
 ]
@@ -41,7 +41,7 @@ from ontologia.storage import (
     _compile_filter,
     _extract_direct_filter,
     _extract_prefix_filter,
-    _needs_endpoint_join,
+    _filter_prefixes,
 )
 
 
@@ -349,6 +349,16 @@ class S3Repository:
             content_type="application/json",
         )
 
+    def _iter_keys(self, prefix: str) -> list[str]:
+        paginator = self._s3.get_paginator("list_objects_v2")
+        keys: list[str] = []
+        for page in paginator.paginate(Bucket=self.bucket, Prefix=prefix):
+            for item in page.get("Contents", []):
+                key = item.get("Key")
+                if isinstance(key, str):
+                    keys.append(key)
+        return keys
+
     def _get_json(
         self, key: str, *, required: bool = True
     ) -> tuple[dict[str, Any] | None, str | None]:
@@ -528,6 +538,26 @@ class S3Repository:
             return []
         return [dict(v) for v in versions if isinstance(v, dict)]
 
+    def _load_schema_versions_many(
+        self, keys: list[tuple[str, str]]
+    ) -> dict[tuple[str, str], list[dict[str, Any]]]:
+        """Load version documents for several types, reading each existing document once.
+
+        One listing of the versions prefix tells which types have a document, so types
+        without one cost no request.
+        """
+        if len(keys) <= 1:
+            return {key: self._load_schema_versions(*key) for key in keys}
+        existing = set(self._iter_keys(self._k("meta/schema/versions/")))
+        return {
+            key: (
+                self._load_schema_versions(*key)
+                if self._schema_versions_key(*key) in existing
+                else []
+            )
+            for key in keys
+        }
+
     def _write_schema_versions(
         self, kind: str, type_name: str, versions: list[dict[str, Any]]
     ) -> None:
@@ -1256,6 +1286,44 @@ class S3Repository:
         self._staged_order.append(commit_id)
         return commit_id
 
+    def _check_v2_write(
+        self,
+        op: str,
+        type_kind: str,
+        type_name: str,
+        schema_version_id: int | None,
+        commit_id: int,
+    ) -> None:
+        if getattr(self, "engine_version", "v1") != "v2":
+            return
+        if schema_version_id is None:
+            raise StorageBackendError(op, "schema_version_id is required for s3/v2")
+        current = self.get_current_schema_version(type_kind, type_name)
+        if current is None:
+            raise StorageBackendError(
+                op, f"No schema version registered for {type_kind} '{type_name}'"
+            )
+        expected = int(current["schema_version_id"])
+        if int(schema_version_id) != expected:
+            raise StorageBackendError(
+                op,
+                f"schema_version_id mismatch for {type_kind} '{type_name}': expected {expected}, got {schema_version_id}",
+            )
+        layout = self._get_current_layout(type_kind, type_name)
+        if layout is None:
+            self._pending_layout_activations[(type_kind, type_name)] = (expected, int(commit_id))
+        elif int(layout["schema_version_id"]) != expected:
+            raise StorageBackendError(
+                op,
+                f"{type_kind} '{type_name}' current layout is v{layout['schema_version_id']}, expected v{expected}",
+            )
+
+    def _staged_commit_for(self, op: str, commit_id: int) -> _StagedCommit:
+        staged = self._staged_commits.get(commit_id)
+        if staged is None:
+            raise StorageBackendError(op, f"Unknown staged commit_id {commit_id}")
+        return staged
+
     def insert_entity(
         self,
         type_name: str,
@@ -1264,33 +1332,8 @@ class S3Repository:
         commit_id: int,
         schema_version_id: int | None = None,
     ) -> None:
-        if getattr(self, "engine_version", "v1") == "v2":
-            if schema_version_id is None:
-                raise StorageBackendError(
-                    "insert_entity", "schema_version_id is required for s3/v2"
-                )
-            current = self.get_current_schema_version("entity", type_name)
-            if current is None:
-                raise StorageBackendError(
-                    "insert_entity", f"No schema version registered for entity '{type_name}'"
-                )
-            expected = int(current["schema_version_id"])
-            if int(schema_version_id) != expected:
-                raise StorageBackendError(
-                    "insert_entity",
-                    f"schema_version_id mismatch for entity '{type_name}': expected {expected}, got {schema_version_id}",
-                )
-            layout = self._get_current_layout("entity", type_name)
-            if layout is None:
-                self._pending_layout_activations[("entity", type_name)] = (expected, int(commit_id))
-            elif int(layout["schema_version_id"]) != expected:
-                raise StorageBackendError(
-                    "insert_entity",
-                    f"entity '{type_name}' current layout is v{layout['schema_version_id']}, expected v{expected}",
-                )
-        staged = self._staged_commits.get(commit_id)
-        if staged is None:
-            raise StorageBackendError("insert_entity", f"Unknown staged commit_id {commit_id}")
+        self._check_v2_write("insert_entity", "entity", type_name, schema_version_id, commit_id)
+        staged = self._staged_commit_for("insert_entity", commit_id)
         staged.entities.setdefault(type_name, []).append(
             _StagedEntityRow(
                 type_name=type_name,
@@ -1300,6 +1343,26 @@ class S3Repository:
             )
         )
 
+    def insert_entities(
+        self,
+        type_name: str,
+        rows: list[tuple[str, dict[str, Any]]],
+        commit_id: int,
+        schema_version_id: int | None = None,
+    ) -> None:
+        # Schema/layout checks run once per call, not once per row.
+        self._check_v2_write("insert_entities", "entity", type_name, schema_version_id, commit_id)
+        staged = self._staged_commit_for("insert_entities", commit_id)
+        staged.entities.setdefault(type_name, []).extend(
+            _StagedEntityRow(
+                type_name=type_name,
+                key=key,
+                fields=dict(fields),
+                schema_version_id=schema_version_id,
+            )
+            for key, fields in rows
+        )
+
     def insert_relation(
         self,
         type_name: str,
@@ -1310,36 +1373,8 @@ class S3Repository:
         schema_version_id: int | None = None,
         instance_key: str = "",
     ) -> None:
-        if getattr(self, "engine_version", "v1") == "v2":
-            if schema_version_id is None:
-                raise StorageBackendError(
-                    "insert_relation", "schema_version_id is required for s3/v2"
-                )
-            current = self.get_current_schema_version("relation", type_name)
-            if current is None:
-                raise StorageBackendError(
-                    "insert_relation", f"No schema version registered for relation '{type_name}'"
-                )
-            expected = int(current["schema_version_id"])
-            if int(schema_version_id) != expected:
-                raise StorageBackendError(
-                    "insert_relation",
-                    f"schema_version_id mismatch for relation '{type_name}': expected {expected}, got {schema_version_id}",
-                )
-            layout = self._get_current_layout("relation", type_name)
-            if layout is None:
-                self._pending_layout_activations[("relation", type_name)] = (
-                    expected,
-                    int(commit_id),
-                )
-            elif int(layout["schema_version_id"]) != expected:
-                raise StorageBackendError(
-                    "insert_relation",
-                    f"relation '{type_name}' current layout is v{layout['schema_version_id']}, expected v{expected}",
-                )
-        staged = self._staged_commits.get(commit_id)
-        if staged is None:
-            raise StorageBackendError("insert_relation", f"Unknown staged commit_id {commit_id}")
+        self._check_v2_write("insert_relation", "relation", type_name, schema_version_id, commit_id)
+        staged = self._staged_commit_for("insert_relation", commit_id)
         staged.relations.setdefault(type_name, []).append(
             _StagedRelationRow(
                 type_name=type_name,
@@ -1351,6 +1386,29 @@ class S3Repository:
             )
         )
 
+    def insert_relations(
+        self,
+        type_name: str,
+        rows: list[tuple[str, str, str, dict[str, Any]]],
+        commit_id: int,
+        schema_version_id: int | None = None,
+    ) -> None:
+        self._check_v2_write(
+            "insert_relations", "relation", type_name, schema_version_id, commit_id
+        )
+        staged = self._staged_commit_for("insert_relations", commit_id)
+        staged.relations.setdefault(type_name, []).extend(
+            _StagedRelationRow(
+                type_name=type_name,
+                left_key=left_key,
+                right_key=right_key,
+                instance_key=instance_key,
+                fields=dict(fields),
+                schema_version_id=schema_version_id,
+            )
+            for left_key, right_key, instance_key, fields in rows
+        )
+
     def rollback_transaction(self) -> None:
         self._tx_active = False
         self._implicit_tx = False
@@ -1953,6 +2011,18 @@ class S3Repository:
                 return {"fields": row["fields"], "commit_id": row["commit_id"]}
         return None
 
+    def get_latest_entities(self, type_name: str, keys: list[str]) -> dict[str, dict[str, Any]]:
+        # One snapshot scan for the whole batch instead of one per key.
+        wanted = set(keys)
+        if not wanted:
+            return {}
+        result: dict[str, dict[str, Any]] = {}
+        for row in self.query_entities(type_name):
+            key = row["key"]
+            if key in wanted and key not in result:
+                result[key] = {"fields": row["fields"], "commit_id": row["commit_id"]}
+        return result
+
     def query_entities(
         self,
         type_name: str,
@@ -2250,6 +2320,19 @@ class S3Repository:
                 return {"fields": row["fields"], "commit_id": row["commit_id"]}
         return None
 
+    def get_latest_relations(
+        self, type_name: str, keys: list[tuple[str, str, str]]
+    ) -> dict[tuple[str, str, str], dict[str, Any]]:
+        wanted = set(keys)
+        if not wanted:
+            return {}
+        result: dict[tuple[str, str, str], dict[str, Any]] = {}
+        for row in self.query_relations(type_name):
+            key = (row["left_key"], row["right_key"], row.get("instance_key", ""))
+            if key in wanted and key not in result:
+                result[key] = {"fields": row["fields"], "commit_id": row["commit_id"]}
+        return result
+
     def query_relations(
         self,
         type_name: str,
@@ -2289,8 +2372,9 @@ class S3Repository:
                 as_of = head_now
             schema_version_id = current_schema_version_id
 
-        left_filter_needed = _needs_endpoint_join(filter_expr, "left")
-        right_filter_needed = _needs_endpoint_join(filter_expr, "right")
+        prefixes = _filter_prefixes(filter_expr)
+        left_filter_needed = "left" in prefixes
+        right_filter_needed = "right" in prefixes
         if left_filter_needed and left_entity_type is None:
             raise ValueError("left_entity_type is required for left endpoint filters")
         if right_filter_needed and right_entity_type is None:
@@ -2744,6 +2828,32 @@ class S3Repository:
             return None
         return dict(versions[-1])
 
+    def get_current_schema_versions(
+        self, keys: list[tuple[str, str]]
+    ) -> dict[tuple[str, str], dict[str, Any] | None]:
+        # Read the dropped-type map once instead of once per key.
+        dropped = self._read_dropped_map()
+        result: dict[tuple[str, str], dict[str, Any] | None] = {}
+        live: list[tuple[str, str]] = []
+        for type_kind, type_name in dict.fromkeys(keys):
+            key = (type_kind, type_name)
+            if key in self._staged_dropped_updates:
+                dropped_rec = self._staged_dropped_updates[key]
+            else:
+                dropped_rec = dropped.get(type_kind, {}).get(type_name)
+            if dropped_rec is not None or key in self._staged_schema_deletes:
+                result[key] = None
+            else:
+                live.append(key)
+        for key, versions in self._load_schema_versions_many(live).items():
+            versions.extend(self._staged_schema_versions.get(key, []))
+            result[key] = dict(versions[-1]) if versions else None
+        return result
+
+    def get_schema_epoch(self) -> tuple[int, int] | None:
+        # No cheap catalog-wide token on S3; callers fall back to a full check.
+        return None
+
     def get_schema_version(
         self,
         type_kind: str,
@@ -4,6 +4,7 @@ from __future__ import annotations
 
 from typing import Any
 
+from ontologia.config import OntologiaConfig
 from ontologia.errors import StorageBackendError
 from ontologia.filters import FilterExpression
 from ontologia.storage import Repository
@@ -16,8 +17,8 @@ class SqliteRepositoryV2(Repository):
     v2 semantics through type layout activation metadata.
     """
 
-    def __init__(self, db_path: str) -> None:
-        super().__init__(db_path)
+    def __init__(self, db_path: str, config: OntologiaConfig | None = None) -> None:
+        super().__init__(db_path, config=config)
         self.engine_version = "v2"
 
     def _create_tables(self) -> None:
@@ -110,40 +111,53 @@ class SqliteRepositoryV2(Repository):
             "activation_commit_id": int(activation_commit_id),
         }
 
-    def insert_entity(
+    def _prepare_layout_write(
         self,
+        op: str,
+        type_kind: str,
         type_name: str,
-        key: str,
-        fields: dict[str, Any],
+        schema_version_id: int | None,
         commit_id: int,
-        schema_version_id: int | None = None,
-    ) -> None:
-        current = self.get_current_schema_version("entity", type_name)
+    ) -> int | None:
+        """Check a write against the current schema version and activate its layout.
+
+        Returns the schema_version_id to store with the written rows.
+        """
+        current = self.get_current_schema_version(type_kind, type_name)
         if current is None:
             # Compatibility fallback for low-level repo usage that bypasses schema registration.
-            super().insert_entity(
-                type_name, key, fields, commit_id, schema_version_id=schema_version_id
-            )
-            return
+            return schema_version_id
 
         expected = int(current["schema_version_id"])
         if schema_version_id is None:
             schema_version_id = expected
         if int(schema_version_id) != expected:
             raise StorageBackendError(
-                "insert_entity",
-                f"schema_version_id mismatch for entity '{type_name}': expected {expected}, got {schema_version_id}",
+                op,
+                f"schema_version_id mismatch for {type_kind} '{type_name}': expected {expected}, got {schema_version_id}",
             )
 
-        layout = self._get_current_layout("entity", type_name)
+        layout = self._get_current_layout(type_kind, type_name)
         if layout is None or int(layout["schema_version_id"]) != expected:
             self.activate_schema_version(
-                type_kind="entity",
+                type_kind=type_kind,
                 type_name=type_name,
                 schema_version_id=expected,
                 activation_commit_id=commit_id,
             )
+        return schema_version_id
 
+    def insert_entity(
+        self,
+        type_name: str,
+        key: str,
+        fields: dict[str, Any],
+        commit_id: int,
+        schema_version_id: int | None = None,
+    ) -> None:
+        schema_version_id = self._prepare_layout_write(
+            "insert_entity", "entity", type_name, schema_version_id, commit_id
+        )
         super().insert_entity(
             type_name,
             key,
@@ -152,6 +166,20 @@ class SqliteRepositoryV2(Repository):
             schema_version_id=schema_version_id,
         )
 
+    def insert_entities(
+        self,
+        type_name: str,
+        rows: list[tuple[str, dict[str, Any]]],
+        commit_id: int,
+        schema_version_id: int | None = None,
+    ) -> None:
+        if not rows:
+            return
+        schema_version_id = self._prepare_layout_write(
+            "insert_entities", "entity", type_name, schema_version_id, commit_id
+        )
+        super().insert_entities(type_name, rows, commit_id, schema_version_id=schema_version_id)
+
     def insert_relation(
         self,
         type_name: str,
@@ -162,38 +190,9 @@ class SqliteRepositoryV2(Repository):
         schema_version_id: int | None = None,
         instance_key: str = "",
     ) -> None:
-        current = self.get_current_schema_version("relation", type_name)
-        if current is None:
-            # Compatibility fallback for low-level repo usage that bypasses schema registration.
-            super().insert_relation(
-                type_name,
-                left_key,
-                right_key,
-                fields,
-                commit_id,
-                schema_version_id=schema_version_id,
-                instance_key=instance_key,
-            )
-            return
-
-        expected = int(current["schema_version_id"])
-        if schema_version_id is None:
-            schema_version_id = expected
-        if int(schema_version_id) != expected:
-            raise StorageBackendError(
-                "insert_relation",
-                f"schema_version_id mismatch for relation '{type_name}': expected {expected}, got {schema_version_id}",
-            )
-
-        layout = self._get_current_layout("relation", type_name)
-        if layout is None or int(layout["schema_version_id"]) != expected:
-            self.activate_schema_version(
-                type_kind="relation",
-                type_name=type_name,
-                schema_version_id=expected,
-                activation_commit_id=commit_id,
-            )
-
+        schema_version_id = self._prepare_layout_write(
+            "insert_relation", "relation", type_name, schema_version_id, commit_id
+        )
         super().insert_relation(
             type_name,
             left_key,
@@ -204,6 +203,20 @@ class SqliteRepositoryV2(Repository):
             instance_key=instance_key,
         )
 
+    def insert_relations(
+        self,
+        type_name: str,
+        rows: list[tuple[str, str, str, dict[str, Any]]],
+        commit_id: int,
+        schema_version_id: int | None = None,
+    ) -> None:
+        if not rows:
+            return
+        schema_version_id = self._prepare_layout_write(
+            "insert_relations", "relation", type_name, schema_version_id, commit_id
+        )
+        super().insert_relations(type_name, rows, commit_id, schema_version_id=schema_version_id)
+
     def query_entities(
         self,
         type_name: str,
@@ -272,7 +272,10 @@ class Entity:
             setattr(self, name, getattr(validated, name))
 
     def model_dump(self) -> dict[str, Any]:
-        return {name: getattr(self, name) for name in self.__entity_fields__}
+        # Read instance storage directly; equivalent to Field.__get__ without the
+        # per-field descriptor call.
+        values = self.__dict__
+        return {name: values.get(name, _SENTINEL) for name in self.__entity_fields__}
 
     @classmethod
     def model_validate(cls, data: dict[str, Any]) -> Any:
@@ -402,7 +405,8 @@ class Relation(Generic[L, R]):
         self.right: Any = None
 
     def model_dump(self) -> dict[str, Any]:
-        return {name: getattr(self, name) for name in self.__relation_fields__}
+        values = self.__dict__
+        return {name: values.get(name, _SENTINEL) for name in self.__relation_fields__}
 
     @classmethod
     def model_validate(cls, data: dict[str, Any]) -> Any:
@@ -2,11 +2,25 @@
 
 from __future__ import annotations
 
-from datetime import datetime, timezone
+from datetime import datetime, timedelta, timezone
 
 import pytest
 
-from ontologia.session import _compile_cron, _cron_matches, _next_fire, _parse_cron_field
+from ontologia.session import _compile_cron, _CronSpec, _next_fire, _parse_cron_field
+
+
+def _cron_matches(spec: _CronSpec, dt: datetime) -> bool:
+    """Reference minute-by-minute matcher that ``_next_fire`` must agree with."""
+    # Cron weekday: 0/7=Sunday, 1=Monday, ..., 6=Saturday.
+    cron_weekday = (dt.weekday() + 1) % 7
+    return bool(
+        (spec.minutes_mask >> dt.minute)
+        & (spec.hours_mask >> dt.hour)
+        & (spec.days_mask >> dt.day)
+        & (spec.months_mask >> dt.month)
+        & (spec.weekdays_mask >> cron_weekday)
+        & 1
+    )
 
 
 class TestParseCronField:
@@ -51,6 +65,12 @@ class TestParseCronField:
         with pytest.raises(ValueError, match="cron range out of bounds"):
             _parse_cron_field("0-32", 1, 31)
 
+    def test_fields_are_cached_per_bounds(self):
+        values = _parse_cron_field("*/5", 0, 59)
+        assert isinstance(values, frozenset)
+        assert _parse_cron_field("*/5", 0, 59) is values
+        assert _parse_cron_field("*/5", 0, 23) != values
+
 
 class TestCompileCron:
     """Test _compile_cron for full cron expression parsing."""
@@ -79,10 +99,25 @@ class TestCompileCron:
         spec = _compile_cron("*/5 * * * *")
         assert spec.minutes == {0, 5, 10, 15, 20, 25, 30, 35, 40, 45, 50, 55}
 
+    def test_specs_are_cached_and_immutable(self):
+        spec = _compile_cron("0 3 1 * *")
+        assert _compile_cron("0 3 1 * *") is spec
+        assert isinstance(spec.minutes, frozenset)
+        assert not hasattr(spec, "__dict__")
+
 
 class TestCronMatches:
     """Test _cron_matches for cron schedule matching."""
 
+    def test_masks_mirror_field_sets(self):
+        spec = _compile_cron("*/20 9-10 1,15 6 7")
+        assert spec.minutes_mask == (1 << 0) | (1 << 20) | (1 << 40)
+        assert spec.hours_mask == (1 << 9) | (1 << 10)
+        assert spec.days_mask == (1 << 1) | (1 << 15)
+        assert spec.months_mask == 1 << 6
+        # Cron 7 (Sunday) folds onto bit 0
+        assert spec.weekdays_mask == 1
+
     def test_every_minute_matches(self):
         spec = _compile_cron("* * * * *")
         dt = datetime(2024, 6, 15, 10, 30, tzinfo=timezone.utc)
@@ -156,3 +191,48 @@ class TestNextFire:
         result = _next_fire(spec, after)
         # 2024-06-17 is Monday
         assert result == datetime(2024, 6, 17, 9, 0, 0, tzinfo=timezone.utc)
+
+    def test_sparse_monthly_schedule(self):
+        spec = _compile_cron("0 3 1 * *")
+        after = datetime(2024, 6, 15, 10, 0, 0, tzinfo=timezone.utc)
+        assert _next_fire(spec, after) == datetime(2024, 7, 1, 3, 0, 0, tzinfo=timezone.utc)
+
+    def test_year_rollover(self):
+        spec = _compile_cron("30 6 2 1 *")
+        after = datetime(2024, 12, 31, 23, 59, 30, tzinfo=timezone.utc)
+        assert _next_fire(spec, after) == datetime(2025, 1, 2, 6, 30, 0, tzinfo=timezone.utc)
+
+    def test_leap_day(self):
+        spec = _compile_cron("0 0 29 2 *")
+        after = datetime(2023, 3, 1, 0, 0, 0, tzinfo=timezone.utc)
+        assert _next_fire(spec, after) == datetime(2024, 2, 29, 0, 0, 0, tzinfo=timezone.utc)
+
+    def test_day_of_month_and_weekday_must_both_match(self):
+        # The 13th that is also a Friday (cron weekday 5)
+        spec = _compile_cron("0 12 13 * 5")
+        after = datetime(2024, 1, 1, 0, 0, 0, tzinfo=timezone.utc)
+        assert _next_fire(spec, after) == datetime(2024, 9, 13, 12, 0, 0, tzinfo=timezone.utc)
+
+    @pytest.mark.parametrize(
+        "expr", ["*/7 * * * *", "15 3,17 * * *", "0 0 1,31 * *", "30 12 * 2 1-5", "45 23 28-31 * *"]
+    )
+    def test_agrees_with_minute_scan(self, expr: str):
+        spec = _compile_cron(expr)
+        after = datetime(2023, 12, 30, 22, 0, 0, tzinfo=timezone.utc)
+        for _ in range(5):
+            expected = after.replace(second=0) + timedelta(minutes=1)
+            while not _cron_matches(spec, expected):
+                expected += timedelta(minutes=1)
+            assert _next_fire(spec, after) == expected
+            after = expected
+
+    def test_sunday_as_seven(self):
+        spec = _compile_cron("0 0 * * 7")
+        after = datetime(2024, 6, 15, 10, 0, 0, tzinfo=timezone.utc)
+        assert _next_fire(spec, after) == datetime(2024, 6, 16, 0, 0, 0, tzinfo=timezone.utc)
+
+    def test_impossible_date_raises(self):
+        spec = _compile_cron("0 0 30 2 *")
+        after = datetime(2024, 1, 1, 0, 0, 0, tzinfo=timezone.utc)
+        with pytest.raises(ValueError, match="within one year"):
+            _next_fire(spec, after)
@@ -2,6 +2,11 @@
 
 from __future__ import annotations
 
+import threading
+import time
+
+import pytest
+
 from ontologia import Event, Field, HandlerContext, OntologiaConfig, Session, on_event
 from tests.conftest import Customer
 
@@ -84,3 +89,127 @@ def test_emit_buffering_and_chaining(tmp_db: str) -> None:
         assert len(customers) == 1
         assert customers[0].id == "c3"
         assert processed == ["c3"]
+
+
+def test_enqueued_events_cut_poll_wait_short(tmp_db: str) -> None:
+    config = OntologiaConfig(event_poll_interval_ms=5000)
+    processed: list[str] = []
+
+    @on_event(UserCreated)
+    def on_created(ctx: HandlerContext[UserCreated]) -> None:
+        ctx.emit(FollowUp(user_id=ctx.event.user_id))
+
+    @on_event(FollowUp)
+    def on_follow_up(ctx: HandlerContext[FollowUp]) -> None:
+        processed.append(ctx.event.user_id)
+        ctx.session.stop()
+
+    with Session(
+        datastore_uri=f"sqlite:///{tmp_db}",
+        config=config,
+        entity_types=[Customer],
+    ) as session:
+        session.commit(event=UserCreated(user_id="c4"))
+        started = time.monotonic()
+        session.run([on_created, on_follow_up], max_iterations=4)
+        elapsed = time.monotonic() - started
+
+    assert processed == ["c4"]
+    assert elapsed < 2.5
+
+
+def test_stop_racing_wake_clear_is_not_lost(tmp_db: str) -> None:
+    config = OntologiaConfig(event_poll_interval_ms=5000)
+
+    @on_event(UserCreated)
+    def on_created(ctx: HandlerContext[UserCreated]) -> None:
+        pass
+
+    with Session(
+        datastore_uri=f"sqlite:///{tmp_db}",
+        config=config,
+        entity_types=[Customer],
+    ) as session:
+
+        class StopOnClear(threading.Event):
+            def clear(self) -> None:
+                # stop() lands just before the loop clears the wake flag.
+                session.stop()
+                super().clear()
+
+        session._wake = StopOnClear()
+        started = time.monotonic()
+        session.run([on_created], max_iterations=4)
+        elapsed = time.monotonic() - started
+
+    assert elapsed < 2.5
+
+
+def test_commit_rediffs_when_head_moves_before_lock(tmp_db: str) -> None:
+    with Session(datastore_uri=f"sqlite:///{tmp_db}", entity_types=[Customer]) as session:
+        session.ensure(Customer(id="c1", name="Alice", age=30))
+        session.commit()
+
+        repo = session._repo
+        original_acquire = repo.acquire_lock
+
+        def acquire_after_concurrent_write(owner_id: str, **kwargs: object) -> bool:
+            # Simulate another writer landing the same row between the diff and the lock.
+            repo.begin_transaction()
+            commit_id = repo.create_commit({"namespace": "other"})
+            fields = Customer(id="c1", name="Alice", age=31).model_dump()
+            repo.insert_entity("Customer", "c1", fields, commit_id)
+            repo.commit_transaction()
+            return original_acquire(owner_id, **kwargs)
+
+        repo.acquire_lock = acquire_after_concurrent_write  # type: ignore[method-assign]
+        session.ensure(Customer(id="c1", name="Alice", age=31))
+        head_before = repo.get_head_commit_id()
+        assert session.commit() is None
+        assert repo.get_head_commit_id() == head_before + 1  # only the concurrent write
+
+
+def test_object_ensured_twice_is_dumped_once(tmp_db: str, monkeypatch: pytest.MonkeyPatch) -> None:
+    calls: list[str] = []
+    original_dump = Customer.model_dump
+
+    def counting_dump(self: Customer, *args: object, **kwargs: object) -> dict[str, object]:
+        calls.append(self.id)
+        return original_dump(self, *args, **kwargs)
+
+    with Session(datastore_uri=f"sqlite:///{tmp_db}", entity_types=[Customer]) as session:
+        customer = Customer(id="c1", name="Alice", age=30)
+        session.ensure(customer)
+        session.ensure(customer)
+        monkeypatch.setattr(Customer, "model_dump", counting_dump)
+        assert session.commit() is not None
+        monkeypatch.undo()
+
+    assert calls == ["c1"]
+
+
+def test_repeated_ensures_of_one_row_coalesce_to_last(tmp_db: str) -> None:
+    with Session(datastore_uri=f"sqlite:///{tmp_db}", entity_types=[Customer]) as session:
+        session.ensure(Customer(id="c1", name="Alice", age=30))
+        session.ensure(Customer(id="c2", name="Bob", age=40))
+        session.ensure(Customer(id="c1", name="Alice", age=31))
+        commit_id = session.commit()
+        assert commit_id is not None
+
+        changes = session.list_commit_changes(commit_id)
+        assert [change["key"] for change in changes] == ["c1", "c2"]
+        customers = {c.id: c for c in session.query().entities(Customer).collect()}
+        assert customers["c1"].age == 31
+
+
+def test_enqueue_many_inserts_each_event(tmp_db: str) -> None:
+    with Session(datastore_uri=f"sqlite:///{tmp_db}", entity_types=[Customer]) as session:
+        store = session._event_store
+        events = [FollowUp(user_id=f"u{i}") for i in range(3)]
+        for event in events:
+            event.id = f"evt-{event.user_id}"
+        store.enqueue_many(events, session.namespace)
+        store.enqueue_many([], session.namespace)
+
+        listed = store.list_events(session.namespace, limit=10)
+        assert sorted(row["id"] for row in listed) == ["evt-u0", "evt-u1", "evt-u2"]
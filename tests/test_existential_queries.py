@@ -17,7 +17,7 @@ from ontologia.storage import (
     _compile_exists,
     _compile_filter,
     _extract_direct_filter,
-    _needs_endpoint_join,
+    _filter_prefixes,
 )
 
 
@@ -150,10 +150,18 @@ class TestCompileExists:
         assert "json_extract(eh.fields_json, '$.name')" in sql
         assert "EXISTS" in sql
 
-    def test_needs_endpoint_join_exists(self):
+    def test_filter_prefixes_exists_endpoint(self):
         expr = ExistsComparisonExpression("left.$.events", "kind", "==", "click")
-        assert _needs_endpoint_join(expr, "left") is True
-        assert _needs_endpoint_join(expr, "right") is False
+        assert "left" in _filter_prefixes(expr)
+        assert "right" not in _filter_prefixes(expr)
+
+    def test_filter_prefixes_single_walk(self):
+        expr = (
+            ComparisonExpression("$.name", "==", "a")
+            | ~ExistsComparisonExpression("left.$.events", "kind", "==", "click")
+        ) & ComparisonExpression("right.$.price", ">", 1)
+        assert _filter_prefixes(expr) == {"$", "left", "right"}
+        assert _filter_prefixes(None) == frozenset()
 
     def test_extract_direct_filter_exists(self):
         expr = ExistsComparisonExpression("$.events", "kind", "==", "click")
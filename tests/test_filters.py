@@ -12,11 +12,13 @@ from ontologia.filters import (
     NULL_NE_ERROR,
     ComparisonExpression,
     EndpointProxy,
+    ExistsComparisonExpression,
     FieldProxy,
     LogicalExpression,
     left,
     right,
 )
+from ontologia.runtime import _classify_filter, _compile_dispatch_filter, _matches_filter
 from ontologia.storage import _compile_filter
 
 
@@ -243,3 +245,108 @@ class TestSQLCompilation:
         params: list[Any] = []
         sql = _compile_filter(expr, params)
         assert "re.fields_json" in sql
+
+    def test_same_shape_reuses_sql_with_new_params(self):
+        def build(tier: str, seats: int, tiers: list[str]) -> Any:
+            return (
+                (
+                    ComparisonExpression("$.tier", "==", tier)
+                    | ComparisonExpression("$.x", "IS_NULL")
+                )
+                & ComparisonExpression("$.seats", ">", seats)
+                & ExistsComparisonExpression("$.events", "kind", "IN", tiers)
+            )
+
+        first: list[Any] = []
+        second: list[Any] = []
+        sql_a = _compile_filter(build("Gold", 5, ["a", "b"]), first, table_alias="eh")
+        sql_b = _compile_filter(build("VIP", 9, ["c", "d"]), second, table_alias="eh")
+        assert sql_a is sql_b
+        assert first == ["Gold", 5, "a", "b"]
+        assert second == ["VIP", 9, "c", "d"]
+
+        # IN arity and the table alias are part of the cache key.
+        third: list[Any] = []
+        sql_c = _compile_filter(build("VIP", 9, ["c"]), third, table_alias="eh")
+        assert sql_c.count("?") == 3 and third == ["VIP", 9, "c"]
+        assert "eh." not in _compile_filter(build("VIP", 9, ["c"]), [])
+
+    def test_compile_deep_tree_without_recursion(self):
+        expr: Any = ComparisonExpression("$.n", "==", 0)
+        for i in range(1, 3000):
+            expr = ~expr if i % 2 else expr & ComparisonExpression("$.n", "!=", i)
+        params: list[Any] = []
+        sql = _compile_filter(expr, params)
+        assert sql.count("NOT (") == 1500
+        assert params == [0, *range(2, 3000, 2)]
+
+
+class TestDispatchFilterClassification:
+    DATA = ComparisonExpression("$.tier", "==", "gold")
+    ENDPOINT = ComparisonExpression("left.$.tier", "==", "gold")
+
+    def test_none_and_endpoint_are_constant_true(self):
+        assert _classify_filter(None) == "const_true"
+        assert _classify_filter(self.ENDPOINT) == "const_true"
+        assert _classify_filter(self.ENDPOINT & self.ENDPOINT) == "const_true"
+
+    def test_data_paths_are_dynamic(self):
+        assert _classify_filter(self.DATA) == "dynamic"
+        assert _classify_filter(self.DATA & self.ENDPOINT) == "dynamic"
+
+    def test_not_endpoint_is_constant_false(self):
+        assert _classify_filter(~self.ENDPOINT) == "const_false"
+        assert _classify_filter(~self.ENDPOINT & self.DATA) == "const_false"
+        assert _classify_filter(self.ENDPOINT | self.DATA) == "const_true"
+
+    @pytest.mark.parametrize(
+        "expr",
+        [
+            ENDPOINT,
+            ~ENDPOINT,
+            ENDPOINT & ~ENDPOINT,
+            ENDPOINT | ~ENDPOINT,
+            ~(ENDPOINT | DATA),
+            ENDPOINT | DATA,
+            ~ENDPOINT & DATA,
+        ],
+    )
+    def test_constant_class_agrees_with_evaluation(self, expr: LogicalExpression):
+        cls = _classify_filter(expr)
+        assert cls != "dynamic"
+        for data in ({"tier": "gold"}, {"tier": "silver"}, {}):
+            assert _matches_filter(data, expr) is (cls == "const_true")
+
+
+class TestCompiledDispatchFilter:
+    SAMPLES: list[dict[str, Any]] = [
+        {"tier": "gold", "seats": 10, "meta": {"region": "eu"}, "events": [{"kind": "click"}]},
+        {"tier": "silver", "seats": None, "meta": {"region": None}, "events": ["click"]},
+        {"tier": None, "meta": "flat", "events": "none"},
+        {},
+    ]
+
+    @pytest.mark.parametrize(
+        "expr",
+        [
+            ComparisonExpression("$.tier", "==", "gold"),
+            ComparisonExpression("$.tier", "!=", "gold"),
+            ComparisonExpression("$.seats", ">", 5),
+            ComparisonExpression("$.seats", "<=", 10),
+            ComparisonExpression("$.tier", "IN", ["gold", "silver"]),
+            ComparisonExpression("$.tier", "IS_NULL"),
+            ComparisonExpression("$.tier", "LIKE", "%ol%"),
+            ComparisonExpression("$.meta.region", "==", "eu"),
+            ComparisonExpression("$.meta.region", "IS_NOT_NULL"),
+            ComparisonExpression("left.$.tier", "==", "gold"),
+            ExistsComparisonExpression("$.events", "kind", "==", "click"),
+            ExistsComparisonExpression("left.$.events", "kind", "==", "click"),
+            ComparisonExpression("$.tier", "==", "gold") & ComparisonExpression("$.seats", ">", 5),
+            ComparisonExpression("$.tier", "IS_NULL") | ComparisonExpression("$.seats", ">=", 10),
+            ~ComparisonExpression("$.meta.region", "==", "eu"),
+        ],
+    )
+    def test_agrees_with_matches_filter(self, expr: Any):
+        predicate = _compile_dispatch_filter(expr)
+        for data in self.SAMPLES:
+            assert predicate(data) is _matches_filter(data, expr)
@@ -2,11 +2,21 @@
 
 from __future__ import annotations
 
+import functools
 from datetime import datetime, timezone
 from typing import Any, cast
 
 from ontologia import Entity, Event, Field
 from ontologia.event_handlers import HandlerContext, on_event
+from ontologia.handlers import (
+    HandlerMeta,
+    _positional_arity,
+    on_commit,
+    on_commit_entity,
+    on_schedule,
+)
+from ontologia.runtime import Ontology
+from ontologia.runtime import Session as LegacySession
 
 
 class UserCreated(Event):
@@ -126,3 +136,168 @@ class TestHandlerContext:
         assert session.commit_calls[0]["meta"] == {"source": "import"}
         assert isinstance(session.commit_calls[0]["event"], FollowUp)
         assert ctx._commit_meta == {}
+
+
+class TestLegacyHandlerArity:
+    def test_plain_function_fast_path_matches_signature(self):
+        def one(ctx: Any) -> None: ...
+
+        def two(ctx: Any, data: Any = None) -> None: ...
+
+        def star(*args: Any) -> None: ...
+
+        def kw_only(ctx: Any, *, flag: bool = False) -> None: ...
+
+        @functools.wraps(two)
+        def wrapped(*args: Any) -> None: ...
+
+        arity = _positional_arity
+        assert arity(one) == (1, 1, False)
+        assert arity(two) == (1, 2, False)
+        assert arity(star) == (0, 0, True)
+        assert arity(kw_only) == (1, 1, False)
+        # __wrapped__ is honoured through inspect.signature
+        assert arity(wrapped) == (1, 2, False)
+        # Bound methods drop self
+        assert arity(_DummySession().ensure) == (1, 1, False)
+
+    def test_decorators_cache_call_flags(self):
+        @on_commit()
+        def ctx_only(ctx: Any) -> None: ...
+
+        @on_schedule("* * * * *")
+        def with_data(ctx: Any, data: Any = None) -> None: ...
+
+        meta = cast(HandlerMeta, ctx_only._ontologia_handler)  # type: ignore[attr-defined]
+        assert (meta.accepts_ctx, meta.accepts_trigger) == (True, False)
+        meta = cast(HandlerMeta, with_data._ontologia_handler)  # type: ignore[attr-defined]
+        assert (meta.accepts_ctx, meta.accepts_trigger) == (True, True)
+
+
+class Other(Entity):
+    id: Field[str] = Field(primary_key=True)
+
+
+class Tagged(Entity):
+    id: Field[str] = Field(primary_key=True)
+    tags: Field[list[str]]
+
+
+class TestLegacyCommitDispatch:
+    def test_typed_and_untyped_handlers_see_matching_changes(self):
+        seen: list[tuple[str, str]] = []
+
+        @on_commit_entity(Marker)
+        def on_marker(ctx: Any, marker: Marker) -> None:
+            seen.append(("marker", marker.id))
+
+        @on_commit()
+        def on_any(ctx: Any) -> None:
+            seen.append(("any", str(ctx.commit_id)))
+
+        onto = Ontology(":memory:", entity_types=[Marker, Other])
+        onto.validate()
+        session = LegacySession(onto)
+        session.ensure([Marker(id="m1"), Other(id="o1"), Marker(id="m2")])
+        session.run([on_marker, on_any])
+        onto.close()
+
+        # Same priority: ordered by handler id, so on_any precedes on_marker per change
+        assert seen == [
+            ("any", "1"),
+            ("marker", "m1"),
+            ("any", "1"),
+            ("any", "1"),
+            ("marker", "m2"),
+        ]
+
+    def test_typed_handlers_get_independent_trigger_objects(self):
+        received: list[Marker] = []
+
+        @on_commit_entity(Marker)
+        def first(ctx: Any, marker: Marker) -> None:
+            received.append(marker)
+            marker.id = "mutated"
+
+        @on_commit_entity(Marker)
+        def second(ctx: Any, marker: Marker) -> None:
+            received.append(marker)
+
+        onto = Ontology(":memory:", entity_types=[Marker])
+        onto.validate()
+        session = LegacySession(onto)
+        session.ensure(Marker(id="m1"))
+        session.run([first, second])
+        onto.close()
+
+        assert len(received) == 2
+        assert received[0] is not received[1]
+        assert received[1].id == "m1"
+        assert received[1].meta().commit_id == 1
+
+    def test_trigger_copies_do_not_share_mutable_fields(self):
+        seen: list[list[str]] = []
+
+        @on_commit_entity(Tagged)
+        def first(ctx: Any, tagged: Tagged) -> None:
+            tagged.tags.append("from_first")
+
+        @on_commit_entity(Tagged)
+        def second(ctx: Any, tagged: Tagged) -> None:
+            seen.append(list(tagged.tags))
+
+        onto = Ontology(":memory:", entity_types=[Tagged])
+        onto.validate()
+        session = LegacySession(onto)
+        session.ensure(Tagged(id="t1", tags=["x"]))
+        session.run([first, second])
+        onto.close()
+
+        assert seen == [["x"]]
+
+    def test_commit_chain_acquires_write_lock_once(self, monkeypatch: Any):
+        @on_commit_entity(Marker)
+        def follow_up(ctx: Any, marker: Marker) -> None:
+            if marker.id == "m1":
+                ctx.ensure(Marker(id="m2"))
+
+        onto = Ontology(":memory:", entity_types=[Marker])
+        onto.validate()
+        acquired: list[str] = []
+        original = onto.repo.acquire_lock
+
+        def counting_acquire(owner_id: str, *args: Any, **kwargs: Any) -> bool:
+            acquired.append(owner_id)
+            return original(owner_id, *args, **kwargs)
+
+        monkeypatch.setattr(onto.repo, "acquire_lock", counting_acquire)
+        session = LegacySession(onto)
+        session.ensure(Marker(id="m1"))
+        session.run([follow_up])
+
+        assert acquired == [onto._runtime_id]
+        assert onto._write_lock_depth == 0
+        assert onto.repo.get_latest_entity("Marker", "m2") is not None
+        assert onto.repo.acquire_lock("other", timeout_ms=0)
+        onto.close()
+
+    def test_shared_context_does_not_leak_commit_meta(self):
+        seen_meta: list[dict[str, str]] = []
+
+        @on_commit_entity(Marker)
+        def tagger(ctx: Any, marker: Marker) -> None:
+            seen_meta.append(dict(ctx._commit_meta))
+            ctx.add_commit_meta("tagged", marker.id)
+
+        @on_commit_entity(Marker)
+        def watcher(ctx: Any, marker: Marker) -> None:
+            seen_meta.append(dict(ctx._commit_meta))
+
+        onto = Ontology(":memory:", entity_types=[Marker])
+        onto.validate()
+        session = LegacySession(onto)
+        session.ensure([Marker(id="m1"), Marker(id="m2")])
+        session.run([tagger, watcher])
+        onto.close()
+
+        assert seen_meta == [{}, {}, {}, {}]
@@ -57,6 +57,10 @@ class Snapshot(Event):
     label: Field[str]
 
 
+class BatchTick(Event):
+    labels: Field[list[str]]
+
+
 def _fast_config(**kwargs) -> OntologiaConfig:
     return OntologiaConfig(
         event_poll_interval_ms=10,
@@ -369,6 +373,56 @@ class TestEventMode:
 
         assert seen == ["scheduled"]
 
+    def test_only_due_schedules_fire_in_declaration_order(self, tmp_db, monkeypatch):
+        import ontologia.session as session_module
+
+        seen: list[str] = []
+        next_fire_calls = {"count": 0}
+
+        def fake_next_fire(spec: object, after):
+            del spec
+            next_fire_calls["count"] += 1
+            if next_fire_calls["count"] <= 2:
+                return after
+            if next_fire_calls["count"] == 3:
+                return after + timedelta(hours=1)
+            return after + timedelta(minutes=1)
+
+        monkeypatch.setattr(session_module, "_next_fire", fake_next_fire)
+
+        @on_event(Tick)
+        def handle_tick(ctx: HandlerContext[Tick]) -> None:
+            seen.append(ctx.event.label)
+
+        schedules = [
+            Schedule(event=Tick(label="a"), cron="* * * * *"),
+            Schedule(event=Tick(label="b"), cron="* * * * *"),
+            Schedule(event=Tick(label="later"), cron="0 * * * *"),
+        ]
+
+        onto = Session(tmp_db, config=_fast_config(), entity_types=[Customer], relation_types=[])
+        with onto.session() as session:
+            session.run([handle_tick], schedules=schedules, max_iterations=3)
+
+        assert seen == ["a", "b"]
+
+    def test_scheduled_event_clones_do_not_alias_template(self, tmp_db):
+        template = BatchTick(labels=["a"])
+        template.priority = 7
+        template.id = "template"
+
+        onto = Session(tmp_db, config=_fast_config(), entity_types=[Customer], relation_types=[])
+        with onto.session() as session:
+            cloned = session._clone_event(template)
+
+        assert isinstance(cloned, BatchTick)
+        assert cloned.labels == ["a"]
+        assert cloned.labels is not template.labels
+        assert cloned.priority == 7
+        assert cloned.id is None
+        cloned.labels.append("b")
+        assert template.labels == ["a"]
+
     def test_run_can_be_invoked_multiple_times(self, tmp_db):
         seen: list[str] = []
 
@@ -391,6 +445,29 @@ class TestEventMode:
 
         assert seen == ["first", "second"]
 
+    def test_handler_entries_reused_across_runs(self, tmp_db):
+        @on_event(Tick)
+        def handler(ctx: HandlerContext[Tick]) -> None:
+            del ctx
+
+        onto = Session(tmp_db, config=_fast_config(), entity_types=[Customer], relation_types=[])
+        with onto.session() as session:
+            entries = session._build_handlers([handler])
+            assert session._build_handlers([handler]) is entries
+            with pytest.raises(HandlerError, match="Duplicate handler"):
+                session._build_handlers([handler, handler])
+
+            @on_event(Tick)
+            def other(ctx: HandlerContext[Tick]) -> None:
+                del ctx
+
+            # Only the latest handler list is kept, so a new list replaces it.
+            other_entries = session._build_handlers([other])
+            assert session._build_handlers([other]) is other_entries
+            rebuilt = session._build_handlers([handler])
+            assert rebuilt is not entries
+            assert [e.func for e in rebuilt] == [handler]
+
     def test_duplicate_handler_fails(self, tmp_db):
         @on_event(Tick)
         def handler(ctx: HandlerContext[Tick]) -> None:
@@ -4,6 +4,7 @@ from __future__ import annotations
 
 import json
 import sqlite3
+from typing import Any
 
 import pytest
 
@@ -24,6 +25,7 @@ from ontologia.migration import (
     _verify_token,
     upgrader,
 )
+from ontologia.runtime import Ontology
 from ontologia.storage import Repository
 
 # --- Test entity/relation types ---
@@ -89,6 +91,26 @@ class TestSchemaVersionsTable:
         assert current["schema_hash"] == "h2"
         repo.close()
 
+    def test_get_current_schema_versions_bulk(self, tmp_db):
+        repo = Repository(tmp_db)
+        repo.create_schema_version("entity", "User", '{"a":1}', "h1")
+        repo.create_schema_version("entity", "User", '{"a":2}', "h2")
+        repo.create_schema_version("relation", "Follows", '{"b":1}', "r1")
+
+        current = repo.get_current_schema_versions(
+            [("entity", "User"), ("relation", "Follows"), ("entity", "Missing")]
+        )
+        user = current[("entity", "User")]
+        assert user is not None
+        assert user["schema_version_id"] == 2
+        assert user["schema_hash"] == "h2"
+        follows = current[("relation", "Follows")]
+        assert follows is not None
+        assert follows["schema_hash"] == "r1"
+        assert current[("entity", "Missing")] is None
+        assert repo.get_current_schema_versions([]) == {}
+        repo.close()
+
     def test_get_specific_schema_version(self, tmp_db):
         repo = Repository(tmp_db)
         repo.create_schema_version("entity", "User", '{"v":1}', "h1")
@@ -289,6 +311,15 @@ class TestTokenHelpers:
         h2 = _compute_plan_hash(diffs)
         assert h1 == h2
 
+    def test_plan_hash_ignores_changed_fields_order(self):
+        changes = {
+            "age": {"stored": {"type": "int"}, "code": {"type": "str"}},
+            "name": {"stored": {"index": False}, "code": {"index": True}},
+        }
+        d1 = [TypeSchemaDiff("entity", "User", 1, changed_fields=changes)]
+        d2 = [TypeSchemaDiff("entity", "User", 1, changed_fields=dict(reversed(changes.items())))]
+        assert _compute_plan_hash(d1) == _compute_plan_hash(d2)
+
     def test_token_roundtrip(self):
         diffs = [TypeSchemaDiff(type_kind="entity", type_name="User", stored_version=1)]
         plan_hash = _compute_plan_hash(diffs)
@@ -346,6 +377,25 @@ class TestSchemaValidationLifecycle:
         assert ver["schema_version_id"] == 1
         onto.close()
 
+    def test_code_schema_cached_across_validations(self, tmp_db):
+        onto = Ontology(tmp_db, entity_types=[User])
+        onto.validate()
+        schema = onto._get_code_schema("entity", "User")
+        onto.validate()
+        assert onto._get_code_schema("entity", "User") is schema
+        onto.close()
+
+    def test_stored_schema_parsed_once_per_version(self, tmp_db):
+        onto = Ontology(tmp_db, entity_types=[User])
+        onto.validate()
+        stored = onto.repo.get_current_schema_version("entity", "User")
+        assert stored is not None
+        parsed = onto._get_stored_schema("entity", "User", stored)
+        assert parsed == json.loads(stored["schema_json"])
+        again = onto.repo.get_current_schema_version("entity", "User")
+        assert onto._get_stored_schema("entity", "User", again) is parsed
+        onto.close()
+
     def test_schema_auto_created_on_first_session(self, tmp_db):
         onto = Session(tmp_db, entity_types=[User])
         # No error at construction
@@ -433,6 +483,51 @@ class TestSchemaValidationLifecycle:
         onto.close()
 
 
+class TestLegacyTypeSpecUpgrade:
+    @staticmethod
+    def _code_schema() -> dict[str, Any]:
+        return {
+            "entity_name": "User",
+            "fields": {
+                "age": {
+                    "primary_key": False,
+                    "index": False,
+                    "type": "<class 'int'>",
+                    "type_spec": {"kind": "primitive", "name": "int"},
+                },
+            },
+        }
+
+    def _stored_without_spec(self) -> dict[str, Any]:
+        stored = self._code_schema()
+        del stored["fields"]["age"]["type_spec"]
+        return stored
+
+    def test_missing_type_spec_is_upgradable(self):
+        assert Ontology._try_legacy_type_spec_upgrade(
+            self._stored_without_spec(), self._code_schema()
+        )
+
+    def test_other_field_attribute_change_is_drift(self):
+        stored = self._stored_without_spec()
+        stored["fields"]["age"]["index"] = True
+        assert not Ontology._try_legacy_type_spec_upgrade(stored, self._code_schema())
+
+    def test_different_stored_type_spec_is_drift(self):
+        stored = self._code_schema()
+        stored["fields"]["age"]["type_spec"] = {"kind": "primitive", "name": "str"}
+        assert not Ontology._try_legacy_type_spec_upgrade(stored, self._code_schema())
+
+    def test_top_level_key_mismatch_is_drift(self):
+        stored = self._stored_without_spec()
+        stored["entity_name"] = "Other"
+        assert not Ontology._try_legacy_type_spec_upgrade(stored, self._code_schema())
+
+        code = self._code_schema()
+        code["extra"] = 1
+        assert not Ontology._try_legacy_type_spec_upgrade(self._stored_without_spec(), code)
+
+
 class TestSchemaDriftGuards:
     def test_commit_aborts_when_touched_type_schema_drifted(self, tmp_db):
         onto_seed = Session(tmp_db, entity_types=[User, Tag])
@@ -486,6 +581,35 @@ class TestSchemaDriftGuards:
         assert users[0].id == "u1"
         onto_writer.close()
 
+    def test_verified_types_skip_repeat_drift_lookups(self, tmp_db, monkeypatch):
+        onto_writer = Session(tmp_db, entity_types=[User, Tag])
+        onto_writer.validate()
+
+        class TagV2(Entity, name="Tag"):
+            id: Field[str] = Field(primary_key=True)
+            label: Field[str]
+            color: Field[str | None] = Field(default=None)
+
+        onto_migrator = Session(tmp_db, entity_types=[User, TagV2])
+        assert onto_migrator.migrate(dry_run=False, force=True).success
+        onto_migrator.close()
+
+        lookups: list[list[tuple[str, str]]] = []
+        original = onto_writer.repo.get_current_schema_versions
+
+        def recording(keys):
+            lookups.append(list(keys))
+            return original(keys)
+
+        monkeypatch.setattr(onto_writer.repo, "get_current_schema_versions", recording)
+        with onto_writer.session() as s:
+            s.ensure(User(id="u1", name="Alice", age=30))
+        with onto_writer.session() as s:
+            s.ensure(User(id="u2", name="Bob", age=31))
+
+        assert lookups == [[("entity", "User")]]
+        onto_writer.close()
+
 
 # --- Phase 4: Migration API ---
 
@@ -855,6 +979,9 @@ class TestMigrationApply:
         ver = onto.repo.get_current_schema_version("entity", "User")
         assert ver is not None
         assert ver["schema_version_id"] == 1
+        columns = onto.repo._history_columns()
+        assert "schema_version_id" in columns["entity_history"]
+        assert {"schema_version_id", "instance_key"} <= columns["relation_history"]
         onto.close()
 
 
@@ -2,9 +2,15 @@
 
 from __future__ import annotations
 
+import math
+from typing import Any
+
 import pytest
 
+from ontologia.config import OntologiaConfig
 from ontologia.filters import ComparisonExpression
+from ontologia.json_utils import loads_json
+from ontologia.storage import Repository, _compile_filter
 
 
 class TestCommits:
@@ -47,6 +53,61 @@ class TestCommits:
         assert len(commits) == 2
         assert all(c["id"] > 3 for c in commits)
 
+    def test_covering_history_index_is_opt_in(self, tmp_path):
+        db_path = str(tmp_path / "cov.db")
+        plain = Repository(db_path)
+        names = {r[0] for r in plain._conn.execute("SELECT name FROM sqlite_master")}
+        assert "idx_entity_history_covering" not in names
+        plain.close()
+
+        repo = Repository(db_path, OntologiaConfig(sqlite_covering_history_index=True))
+        try:
+            c1 = repo.create_commit()
+            repo.insert_entity("Customer", "c1", {"name": "A"}, c1)
+            c2 = repo.create_commit()
+            repo.insert_entity("Customer", "c1", {"name": "B"}, c2)
+            plan = repo._conn.execute(
+                "EXPLAIN QUERY PLAN SELECT eh.fields_json FROM entity_history eh "
+                "WHERE eh.entity_type = ? AND eh.entity_key = ? AND eh.commit_id <= ?",
+                ["Customer", "c1", c1],
+            ).fetchall()
+            assert any("COVERING INDEX idx_entity_history_covering" in row[3] for row in plan)
+            rows = repo.query_entities("Customer", as_of=c1)
+            assert [r["fields"]["name"] for r in rows] == ["A"]
+        finally:
+            repo.close()
+
+    def test_commit_scans_use_commit_index(self, repo):
+        for table, index in (
+            ("entity_history", "idx_entity_history_commit"),
+            ("relation_history", "idx_relation_history_commit"),
+        ):
+            plan = repo._conn.execute(
+                f"EXPLAIN QUERY PLAN SELECT COUNT(*) FROM {table} WHERE commit_id = ?", (1,)
+            ).fetchall()
+            assert any(index in row[3] for row in plan)
+
+    def test_list_commit_changes_classifies_in_one_pass(self, repo):
+        c1 = repo.create_commit()
+        repo.insert_entity("Customer", "c1", {"v": 1}, c1)
+        repo.insert_relation("Sub", "c1", "p1", {}, c1, instance_key="a")
+        repo.commit_transaction()
+        c2 = repo.create_commit()
+        repo.insert_entity("Customer", "c1", {"v": 2}, c2)
+        repo.insert_entity("Customer", "c2", {"v": 1}, c2)
+        repo.insert_relation("Sub", "c1", "p1", {}, c2, instance_key="a")
+        repo.insert_relation("Sub", "c1", "p1", {}, c2, instance_key="b")
+        repo.commit_transaction()
+
+        changes = repo.list_commit_changes(c2)
+        assert [(c.get("key") or c["instance_key"], c["operation"]) for c in changes] == [
+            ("c1", "update_version"),
+            ("c2", "insert"),
+            ("a", "update_version"),
+            ("b", "insert"),
+        ]
+        assert {c["operation"] for c in repo.list_commit_changes(c1)} == {"insert"}
+
 
 class TestEntityOperations:
     def test_insert_and_get_entity(self, repo):
@@ -59,6 +120,45 @@ class TestEntityOperations:
         assert result["fields"]["name"] == "Alice"
         assert result["commit_id"] == cid
 
+    def test_insert_entities_bulk(self, repo):
+        cid = repo.create_commit()
+        repo.insert_entities(
+            "Customer",
+            [("c1", {"id": "c1", "name": "Alice"}), ("c2", {"id": "c2", "name": "Bob"})],
+            cid,
+        )
+        repo.commit_transaction()
+
+        assert repo.get_latest_entity("Customer", "c1")["fields"]["name"] == "Alice"
+        result = repo.get_latest_entity("Customer", "c2")
+        assert result is not None
+        assert result["fields"]["name"] == "Bob"
+        assert result["commit_id"] == cid
+
+    def test_fields_stored_as_compact_json(self, repo):
+        c1 = repo.create_commit()
+        repo.insert_entities("Customer", [("c1", {"id": "c1", "tags": ["a", "b"]})], c1)
+        repo.commit_transaction()
+
+        stored = repo._conn.execute("SELECT fields_json FROM entity_history").fetchone()[0]
+        assert stored == '{"id":"c1","tags":["a","b"]}'
+        assert repo.get_latest_entity("Customer", "c1")["fields"]["tags"] == ["a", "b"]
+
+    def test_get_latest_entities_bulk(self, repo):
+        c1 = repo.create_commit()
+        repo.insert_entity("Customer", "c1", {"id": "c1", "name": "Alice"}, c1)
+        repo.insert_entity("Customer", "c2", {"id": "c2", "name": "Bob"}, c1)
+        repo.commit_transaction()
+        c2 = repo.create_commit()
+        repo.insert_entity("Customer", "c1", {"id": "c1", "name": "Alice Updated"}, c2)
+        repo.commit_transaction()
+
+        result = repo.get_latest_entities("Customer", ["c1", "c2", "missing", "c1"])
+        assert set(result) == {"c1", "c2"}
+        assert result["c1"] == {"fields": {"id": "c1", "name": "Alice Updated"}, "commit_id": c2}
+        assert result["c2"]["commit_id"] == c1
+        assert repo.get_latest_entities("Customer", []) == {}
+
     def test_get_entity_not_found(self, repo):
         assert repo.get_latest_entity("Customer", "nonexistent") is None
 
@@ -76,6 +176,76 @@ class TestEntityOperations:
         assert result["fields"]["name"] == "Alice Updated"
         assert result["commit_id"] == c2
 
+    def test_latest_pointer_backfilled_for_existing_history(self, tmp_db):
+        repo = Repository(tmp_db)
+        c1 = repo.create_commit()
+        repo.insert_entity("Customer", "c1", {"id": "c1", "name": "V1"}, c1)
+        repo.commit_transaction()
+        c2 = repo.create_commit()
+        repo.insert_entity("Customer", "c1", {"id": "c1", "name": "V2"}, c2)
+        repo.commit_transaction()
+        # Simulate a database written before the pointer table existed.
+        repo._conn.executescript(
+            "DROP TRIGGER trg_entity_history_latest_insert;"
+            "DROP TRIGGER trg_entity_history_latest_delete;"
+            "DROP TABLE latest_entity;"
+        )
+        repo.close()
+
+        reopened = Repository(tmp_db)
+        try:
+            latest = reopened.get_latest_entity("Customer", "c1")
+            assert latest is not None
+            assert latest["commit_id"] == c2
+            assert reopened.count_latest_entities("Customer") == 1
+        finally:
+            reopened.close()
+
+    def test_latest_pointer_follows_history_deletes(self, repo):
+        c1 = repo.create_commit()
+        repo.insert_entity("Customer", "c1", {"id": "c1", "name": "V1"}, c1)
+        repo.commit_transaction()
+        c2 = repo.create_commit()
+        repo.insert_entity("Customer", "c1", {"id": "c1", "name": "V2"}, c2)
+        repo.commit_transaction()
+
+        repo._conn.execute("DELETE FROM entity_history WHERE commit_id = ?", (c2,))
+        assert repo.get_latest_entity("Customer", "c1")["fields"]["name"] == "V1"
+        repo._conn.execute("DELETE FROM entity_history WHERE entity_type = 'Customer'")
+        assert repo.get_latest_entity("Customer", "c1") is None
+        assert repo.query_entities("Customer") == []
+
+    def test_type_counts_track_new_keys_and_purges(self, tmp_db):
+        repo = Repository(tmp_db)
+        c1 = repo.create_commit()
+        repo.insert_entity("Customer", "c1", {"id": "c1"}, c1)
+        repo.insert_entity("Customer", "c2", {"id": "c2"}, c1)
+        repo.insert_relation("Owns", "c1", "p1", {}, c1)
+        repo.commit_transaction()
+        c2 = repo.create_commit()
+        repo.insert_entity("Customer", "c1", {"id": "c1", "v": 2}, c2)
+        repo.insert_relation("Owns", "c1", "p1", {"v": 2}, c2)
+        repo.commit_transaction()
+        assert repo.count_latest_entities("Customer") == 2
+        assert repo.count_latest_relations("Owns") == 1
+        assert repo.count_latest_entities("Missing") == 0
+
+        repo._conn.execute("DELETE FROM entity_history WHERE commit_id = ?", (c2,))
+        assert repo.count_latest_entities("Customer") == 2
+        repo._conn.execute("DELETE FROM entity_history WHERE entity_key = 'c2'")
+        assert repo.count_latest_entities("Customer") == 1
+        repo._conn.commit()
+
+        # A database whose counts predate the counters table is seeded on open.
+        repo._conn.executescript("DROP TABLE type_counts;")
+        repo.close()
+        reopened = Repository(tmp_db)
+        try:
+            assert reopened.count_latest_entities("Customer") == 1
+            assert reopened.count_latest_relations("Owns") == 1
+        finally:
+            reopened.close()
+
     def test_query_entities_latest(self, repo):
         c1 = repo.create_commit()
         repo.insert_entity("Customer", "c1", {"id": "c1", "name": "Alice", "age": 30}, c1)
@@ -109,6 +279,27 @@ class TestEntityOperations:
         assert len(rows2) == 3
         assert rows[0]["key"] != rows2[0]["key"]
 
+    def test_query_entities_paged_and_unpaged_share_sql(self, repo):
+        c1 = repo.create_commit()
+        for i in range(4):
+            repo.insert_entity("Customer", f"c{i}", {"id": f"c{i}", "age": i}, c1)
+        repo.commit_transaction()
+
+        statements: list[str] = []
+        repo._conn.set_trace_callback(statements.append)
+        try:
+            all_rows = repo.query_entities("Customer", order_by="$.id")
+            tail = repo.query_entities("Customer", order_by="$.id", offset=1)
+            page = repo.query_entities("Customer", order_by="$.id", limit=2, offset=1)
+        finally:
+            repo._conn.set_trace_callback(None)
+
+        assert [r["key"] for r in all_rows] == ["c0", "c1", "c2", "c3"]
+        assert [r["key"] for r in tail] == ["c1", "c2", "c3"]
+        assert [r["key"] for r in page] == ["c1", "c2"]
+        shapes = {stmt.split(" LIMIT ")[0] for stmt in statements}
+        assert len(shapes) == 1
+
     def test_query_entities_with_history(self, repo):
         c1 = repo.create_commit()
         repo.insert_entity("Customer", "c1", {"id": "c1", "name": "V1"}, c1)
@@ -198,6 +389,34 @@ class TestRelationOperations:
         assert result is not None
         assert result["fields"]["seat_count"] == 5
 
+    def test_insert_relations_bulk(self, repo):
+        cid = repo.create_commit()
+        repo.insert_relations(
+            "Subscription",
+            [("c1", "p1", "", {"seat_count": 5}), ("c1", "p2", "", {"seat_count": 2})],
+            cid,
+        )
+        repo.commit_transaction()
+
+        assert repo.get_latest_relation("Subscription", "c1", "p1")["fields"]["seat_count"] == 5
+        assert repo.get_latest_relation("Subscription", "c1", "p2")["fields"]["seat_count"] == 2
+
+    def test_get_latest_relations_bulk(self, repo):
+        c1 = repo.create_commit()
+        repo.insert_relation("Subscription", "c1", "p1", {"seats": 5}, c1)
+        repo.insert_relation("Subscription", "c1", "p1", {"seats": 1}, c1, instance_key="a")
+        repo.commit_transaction()
+        c2 = repo.create_commit()
+        repo.insert_relation("Subscription", "c1", "p1", {"seats": 10}, c2)
+        repo.commit_transaction()
+
+        result = repo.get_latest_relations(
+            "Subscription", [("c1", "p1", ""), ("c1", "p1", "a"), ("c1", "p2", "")]
+        )
+        assert set(result) == {("c1", "p1", ""), ("c1", "p1", "a")}
+        assert result[("c1", "p1", "")] == {"fields": {"seats": 10}, "commit_id": c2}
+        assert result[("c1", "p1", "a")]["fields"] == {"seats": 1}
+
     def test_relation_not_found(self, repo):
         assert repo.get_latest_relation("Subscription", "c1", "p1") is None
 
@@ -234,6 +453,86 @@ class TestRelationOperations:
         assert len(rows) == 1
         assert rows[0]["fields"]["seats"] == 10
 
+    def test_group_by_relations_on_endpoint_fields(self, repo):
+        c1 = repo.create_commit()
+        repo.insert_entity("Customer", "c1", {"tier": "gold"}, c1)
+        repo.insert_entity("Customer", "c2", {"tier": "gold"}, c1)
+        repo.insert_entity("Product", "p1", {"kind": "book"}, c1)
+        repo.insert_relation("Sub", "c1", "p1", {"seats": 2}, c1)
+        repo.insert_relation("Sub", "c2", "p1", {"seats": 3}, c1)
+        repo.commit_transaction()
+        c2 = repo.create_commit()
+        repo.insert_entity("Customer", "c2", {"tier": "silver"}, c2)
+        repo.commit_transaction()
+
+        specs = {"total": ("SUM", "seats")}
+        by_left = repo.group_by_relations("Sub", "left.$.tier", specs, left_entity_type="Customer")
+        assert sorted((r["tier"], r["total"]) for r in by_left) == [("gold", 2), ("silver", 3)]
+        by_right = repo.group_by_relations(
+            "Sub", "right.$.kind", specs, right_entity_type="Product"
+        )
+        assert by_right == [{"kind": "book", "total": 5}]
+
+    def test_relations_for_entity_seek_the_pointer_table(self, repo):
+        c1 = repo.create_commit()
+        repo.insert_relation("Sub", "c1", "p1", {"v": 1}, c1)
+        repo.insert_relation("Sub", "c2", "p1", {"v": 1}, c1)
+        repo.insert_relation("Sub", "c1", "p2", {"v": 1}, c1)
+        repo.commit_transaction()
+        c2 = repo.create_commit()
+        repo.insert_relation("Sub", "c2", "p1", {"v": 2}, c2)
+        repo.commit_transaction()
+
+        by_right = repo.get_relations_for_entity("Sub", "Customer", "p1", direction="right")
+        assert sorted((r["left_key"], r["fields"]["v"]) for r in by_right) == [
+            ("c1", 1),
+            ("c2", 2),
+        ]
+        by_left = repo.get_relations_for_entity("Sub", "Customer", "c1")
+        assert sorted(r["right_key"] for r in by_left) == ["p1", "p2"]
+        plan = repo._conn.execute(
+            "EXPLAIN QUERY PLAN SELECT history_id FROM latest_relation "
+            "WHERE relation_type = ? AND right_key = ?",
+            ("Sub", "p1"),
+        ).fetchall()
+        assert any("idx_latest_relation_right" in row[3] for row in plan)
+
+    def test_query_relations_joins_latest_endpoints(self, repo):
+        c1 = repo.create_commit()
+        repo.insert_entity("Customer", "c1", {"tier": "gold"}, c1)
+        repo.insert_entity("Customer", "c2", {"tier": "gold"}, c1)
+        repo.insert_entity("Product", "p1", {"price": 5}, c1)
+        repo.insert_entity("Product", "p2", {"price": 50}, c1)
+        for left_key in ("c1", "c2"):
+            for right_key in ("p1", "p2"):
+                repo.insert_relation("Sub", left_key, right_key, {"seats": 1}, c1)
+        repo.commit_transaction()
+        c2 = repo.create_commit()
+        repo.insert_entity("Customer", "c2", {"tier": "silver"}, c2)
+        repo.commit_transaction()
+
+        expr = ComparisonExpression("left.$.tier", "==", "gold") & ComparisonExpression(
+            "right.$.price", ">", 10
+        )
+        statements: list[str] = []
+        repo._conn.set_trace_callback(statements.append)
+        try:
+            rows = repo.query_relations(
+                "Sub", filter_expr=expr, left_entity_type="Customer", right_entity_type="Product"
+            )
+        finally:
+            repo._conn.set_trace_callback(None)
+        assert [(r["left_key"], r["right_key"]) for r in rows] == [("c1", "p2")]
+        assert "EXISTS" not in statements[-1]
+        as_of_rows = repo.query_relations(
+            "Sub",
+            filter_expr=expr,
+            left_entity_type="Customer",
+            right_entity_type="Product",
+            as_of=c1,
+        )
+        assert sorted(r["left_key"] for r in as_of_rows) == ["c1", "c2"]
+
     def test_query_relations_left_endpoint_filter_honors_as_of(self, repo):
         c1 = repo.create_commit()
         repo.insert_entity("Customer", "c1", {"id": "c1", "tier": "Gold"}, c1)
@@ -285,6 +584,42 @@ class TestRelationOperations:
         assert len(rows) == 2
 
 
+class TestIterLatest:
+    def test_iter_latest_pages_by_key_while_rows_change(self, repo):
+        cid = repo.create_commit()
+        for i in range(5):
+            repo.insert_entity("User", f"u{i}", {"id": f"u{i}", "v": 1}, cid)
+            repo.insert_relation("Tagged", "u", f"t{i}", {"v": 1}, cid, instance_key=str(i % 2))
+        repo.commit_transaction()
+
+        # New keys sorting before the cursor land between pages; OFFSET paging would
+        # then repeat a row it already returned.
+        new_cid = repo.create_commit()
+        seen: list[str] = []
+        for batch in repo.iter_latest_entities("User", batch_size=2):
+            for key, fields, _cid, _svid in batch:
+                seen.append(key)
+                repo.insert_entity("User", key, {**fields, "v": 2}, new_cid)
+            repo.insert_entity("User", f"a{len(seen)}", {"id": f"a{len(seen)}", "v": 2}, new_cid)
+        assert seen == [f"u{i}" for i in range(5)]
+
+        # Rows already paged past vanish between pages; OFFSET paging would skip one.
+        rel_seen: list[tuple[str, str, str]] = []
+        for batch in repo.iter_latest_relations("Tagged", batch_size=2):
+            for lk, rk, ik, _fields, _cid, _svid in batch:
+                rel_seen.append((lk, rk, ik))
+            lk, rk, ik = rel_seen[-1]
+            repo._conn.execute(
+                "DELETE FROM relation_history "
+                "WHERE relation_type = ? AND left_key = ? AND right_key = ? AND instance_key = ?",
+                ("Tagged", lk, rk, ik),
+            )
+        assert rel_seen == [("u", f"t{i}", str(i % 2)) for i in range(5)]
+        repo.commit_transaction()
+        assert {e["fields"]["v"] for e in repo.query_entities("User")} == {2}
+        assert repo.count_latest_relations("Tagged") == 2
+
+
 class TestLocking:
     def test_acquire_release_lock(self, repo):
         assert repo.acquire_lock("owner-1") is True
@@ -334,3 +669,57 @@ class TestSchemaRegistry:
         repo.store_schema("entity", "Customer", {"fields": {"id": {}, "name": {}}})
         result = repo.get_schema("entity", "Customer")
         assert "name" in result["fields"]
+
+    def test_indexed_fields_get_expression_indexes(self, repo):
+        schema = {"fields": {"id": {"primary_key": True}, "email": {"index": True}}}
+        repo.store_schema("entity", "Customer", schema)
+        c1 = repo.create_commit()
+        repo.insert_entity("Customer", "c1", {"id": "c1", "email": "a@x"}, c1)
+        repo.commit_transaction()
+
+        by_email = ComparisonExpression("$.email", "==", "a@x")
+        params: list[Any] = []
+        where = _compile_filter(by_email, params, table_alias="eh")
+        plan = repo._conn.execute(
+            f"EXPLAIN QUERY PLAN SELECT eh.entity_key FROM entity_history eh "
+            f"WHERE eh.entity_type = ? AND {where}",
+            ["Customer", *params],
+        ).fetchall()
+        assert any("idx_entity_history_field_email" in row[3] for row in plan)
+        rows = repo.query_entities("Customer", filter_expr=by_email)
+        assert [r["key"] for r in rows] == ["c1"]
+
+    def test_schema_epoch_tracks_version_inserts_and_drops(self, repo):
+        empty = repo.get_schema_epoch()
+        repo.create_schema_version("entity", "Customer", '{"fields":{}}', "h1")
+        repo.create_schema_version("entity", "Product", '{"fields":{}}', "h2")
+        after_create = repo.get_schema_epoch()
+        assert after_create != empty
+        assert repo.get_schema_epoch() == after_create
+
+        repo.apply_schema_drop(affected_types=[("entity", "Customer")], purge_history=False)
+        assert repo.get_schema_epoch() != after_create
+
+    def test_schema_writes_join_the_callers_transaction(self, repo):
+        repo.create_schema_version("entity", "Customer", '{"fields":{}}', "h1")
+        repo.begin_transaction()
+        repo.store_schema("entity", "Customer", {"fields": {}, "v": 2})
+        assert repo.create_schema_version("entity", "Customer", '{"fields":{}}', "h2") == 2
+        repo.rollback_transaction()
+
+        assert repo.get_schema("entity", "Customer") is None
+        current = repo.get_current_schema_version("entity", "Customer")
+        assert current is not None and current["schema_version_id"] == 1
+
+
+class TestLoadsJson:
+    def test_parses_stored_documents(self):
+        assert loads_json('{"id": "c1", "tags": ["a"], "n": 1.5}') == {
+            "id": "c1",
+            "tags": ["a"],
+            "n": 1.5,
+        }
+
+    def test_accepts_non_finite_tokens_written_by_stdlib_json(self):
+        assert math.isnan(loads_json('{"x": NaN}')["x"])
+        assert loads_json('{"x": Infinity}')["x"] == math.inf
@@ -4,7 +4,7 @@ from __future__ import annotations
 
 import pytest
 
-from ontologia import Session
+from ontologia import OntologiaConfig, Session, StorageBackendError
 from ontologia.storage import open_repository, parse_storage_target
 
 
@@ -27,10 +27,32 @@ def test_parse_storage_target_sqlite_memory_uri() -> None:
 
 
 def test_parse_storage_target_conflicting_sqlite_raises() -> None:
-    with pytest.raises(Exception):
+    with pytest.raises(StorageBackendError):
         parse_storage_target(db_path="a.db", storage_uri="sqlite:///b.db")
 
 
+def test_parse_storage_target_conflict_checked_after_cached_parse() -> None:
+    first = parse_storage_target(storage_uri="sqlite:///tmp/cached.db")
+    assert parse_storage_target(storage_uri="sqlite:///tmp/cached.db") is first
+    assert parse_storage_target(db_path="/tmp/cached.db", storage_uri=first.uri) is first
+    with pytest.raises(StorageBackendError):
+        parse_storage_target(db_path="other.db", storage_uri=first.uri)
+    with pytest.raises(StorageBackendError):
+        parse_storage_target(db_path="a.db", storage_uri="s3://bucket/prefix")
+
+
+def test_open_repository_applies_sqlite_pragmas(tmp_path) -> None:
+    config = OntologiaConfig(sqlite_cache_size_kib=4096, sqlite_mmap_size_bytes=0)
+    repo = open_repository(str(tmp_path / "onto.db"), config=config)
+    try:
+        conn = repo._conn  # type: ignore[attr-defined]
+        assert conn.execute("PRAGMA synchronous").fetchone()[0] == 1  # NORMAL
+        assert conn.execute("PRAGMA cache_size").fetchone()[0] == -4096
+        assert conn.execute("PRAGMA temp_store").fetchone()[0] == 2  # MEMORY
+    finally:
+        repo.close()
+
+
 def test_open_repository_sqlite(tmp_path) -> None:
     db_path = str(tmp_path / "onto.db")
     repo = open_repository(db_path)
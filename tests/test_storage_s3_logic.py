@@ -2,6 +2,8 @@
 
 from __future__ import annotations
 
+from typing import Any
+
 import pytest
 
 from ontologia.filters import ComparisonExpression
@@ -192,3 +194,50 @@ def test_update_indices_after_commit_continues_after_per_type_failure() -> None:
     assert ("relation", "Subscription") in written
     assert repo._last_index_warning is not None
     assert "Customer" in repo._last_index_warning
+
+
+def test_get_current_schema_versions_reads_each_existing_document_once() -> None:
+    repo = object.__new__(S3Repository)
+    repo.prefix = "p"
+    repo._staged_dropped_updates = {}
+    repo._staged_schema_deletes = set()
+    repo._staged_schema_versions = {("entity", "B"): [{"schema_version_id": 2}]}
+    repo._read_dropped_map = lambda: {  # type: ignore[method-assign]
+        "entity": {"Gone": {"dropped": True}},
+        "relation": {},
+    }
+    listed: list[str] = []
+    reads: list[str] = []
+
+    def _iter_keys(prefix: str) -> list[str]:
+        listed.append(prefix)
+        return ["p/meta/schema/versions/entity/A.json", "p/meta/schema/versions/entity/B.json"]
+
+    def _get_json(key: str, *, required: bool = True) -> tuple[dict[str, Any] | None, None]:
+        reads.append(key)
+        return {"versions": [{"schema_version_id": 1, "schema_hash": key}]}, None
+
+    repo._iter_keys = _iter_keys  # type: ignore[method-assign]
+    repo._get_json = _get_json  # type: ignore[method-assign]
+
+    current = repo.get_current_schema_versions(
+        [
+            ("entity", "A"),
+            ("entity", "B"),
+            ("entity", "Missing"),
+            ("entity", "Gone"),
+            ("entity", "A"),
+        ]
+    )
+
+    assert listed == ["p/meta/schema/versions/"]
+    assert sorted(reads) == [
+        "p/meta/schema/versions/entity/A.json",
+        "p/meta/schema/versions/entity/B.json",
+    ]
+    a = current[("entity", "A")]
+    assert a is not None and a["schema_version_id"] == 1
+    b = current[("entity", "B")]
+    assert b is not None and b["schema_version_id"] == 2
+    assert current[("entity", "Missing")] is None
+    assert current[("entity", "Gone")] is None
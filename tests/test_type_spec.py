@@ -6,8 +6,8 @@ from typing import Optional, Union
 import pytest
 
 from ontologia import Entity, Field
-from ontologia.runtime import Ontology
-from ontologia.storage import Repository, _schema_hash
+from ontologia.runtime import Ontology, _entity_schema
+from ontologia.storage import Repository, _canonical_schema_hash, _schema_hash
 from ontologia.type_spec import build_type_spec, synthesize_type_spec_from_legacy
 
 try:
@@ -288,3 +288,14 @@ class TestSchemaUpgradeLegacy:
         with pytest.raises(SchemaOutdatedError):
             ont.validate()
         ont.close()
+
+
+class TestCanonicalSchemaHash:
+    def test_matches_hash_of_serialized_schema(self):
+        schema = _entity_schema(SimpleEntity)
+        assert _canonical_schema_hash(schema) == _schema_hash(json.dumps(schema, sort_keys=True))
+
+    def test_key_order_insensitive(self):
+        a = {"entity_name": "X", "fields": {"b": {"index": False}, "a": {"index": True}}}
+        b = {"fields": {"a": {"index": True}, "b": {"index": False}}, "entity_name": "X"}
+        assert _canonical_schema_hash(a) == _canonical_schema_hash(b)